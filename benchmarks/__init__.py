@@ -0,0 +1,4 @@
+"""
+Benchmarks of FlickTools against synthetic data, runnable without ArcGIS Pro
+(see benchmarks/README.md).
+"""
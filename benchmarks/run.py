@@ -0,0 +1,192 @@
+"""
+Runs the benchmark suite against synthetic tables and the arcpy stand-in,
+appends the results to a JSON history, and flags cases that got slower than
+the last run with the same settings.
+
+    python -m benchmarks.run [--rows 100000] [--repeat 3] [--only unique_values] [--call-cost 50] [--fail-on-regression]
+"""
+
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+# The stand-in has to be found before any real arcpy
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "standin"))
+
+import arcpy
+
+import utils.arcpy_tools as archelp
+from benchmarks import synthetic
+from benchmarks.suite import BENCHMARKS, Context
+from utils.progress import set_headless
+
+HISTORY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "history.json")
+
+def _git_commit() -> str:
+    """
+    @return: Short hash of the checked out commit, or None outside a git checkout
+    """
+
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_case(context: Context, name: str, repeat: int, memory: bool=False) -> dict:
+    """
+    Times a case, running its setup before every repeat
+
+    @context: Shared benchmark data
+    @name: Name of the case
+    @repeat: Number of timed runs
+    @memory: Also measure peak memory with tracemalloc in an extra, untimed run
+    @return: Result (In the format {"items", "seconds", "min_seconds", "items_per_second", "peak_bytes"})
+    """
+
+    function, setup = BENCHMARKS[name]
+    times = []
+    items = 0
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for i in range(repeat):
+            state = setup(context) if setup else None
+            gc.collect()
+            start = time.perf_counter()
+            items = function(context, state)
+            times.append(time.perf_counter() - start)
+
+        peak = None
+        if memory:
+            state = setup(context) if setup else None
+            gc.collect()
+            tracemalloc.start()
+            function(context, state)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+    seconds = statistics.median(times)
+    return {"items": items, "seconds": round(seconds, 6), "min_seconds": round(min(times), 6),
+            "items_per_second": round(items / seconds, 1) if seconds else None, "peak_bytes": peak}
+
+def load_history(path: str) -> list[dict]:
+    """
+    @path: Path of the history file
+    @return: Earlier runs, oldest first
+    """
+
+    if not os.path.exists(path):
+        return []
+    with open(path) as history_file:
+        return json.load(history_file)["runs"]
+
+def save_history(path: str, runs: list[dict]) -> None:
+    """
+    @path: Path of the history file
+    @runs: Every run, oldest first
+    """
+
+    with open(path, "w") as history_file:
+        json.dump({"runs": runs}, history_file, indent=1)
+    return
+
+def find_baseline(runs: list[dict], run: dict) -> dict:
+    """
+    @runs: Earlier runs
+    @run: The new run
+    @return: The latest earlier run with the same table settings and environment, or None
+    """
+
+    for earlier in reversed(runs):
+        if (all(earlier.get(key) == run[key] for key in ["settings", "numpy", "python", "machine"])
+                and earlier.get("call_cost", 0) == run["call_cost"]):
+            return earlier
+    return None
+
+def compare(run: dict, baseline: dict) -> dict:
+    """
+    @run: The new run
+    @baseline: The run to compare against (optional)
+    @return: Change in throughput of each case in both runs (In the format {<name>: <change>}),
+             a change of -0.3 is 30% fewer items per second
+    """
+
+    changes = {}
+    if baseline is None:
+        return changes
+    for name, result in run["results"].items():
+        before = baseline["results"].get(name)
+        if before and before["items_per_second"] and result["items_per_second"]:
+            changes[name] = result["items_per_second"] / before["items_per_second"] - 1
+    return changes
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark FlickTools against synthetic data.")
+    parser.add_argument("--rows", type=int, default=100000, help="Rows in the synthetic feature class")
+    parser.add_argument("--cardinality", type=int, default=1000, help="Distinct values in the value fields")
+    parser.add_argument("--null-ratio", type=float, default=0.05, help="Share of null values")
+    parser.add_argument("--string-length", type=int, default=12, help="Length of text values")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the synthetic data")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs of each case, the median is kept")
+    parser.add_argument("--only", nargs="*", help="Only run cases whose name contains one of these")
+    parser.add_argument("--call-cost", type=float, default=0, help="Microseconds each message and progressor call takes, like ArcGIS Pro's UI")
+    parser.add_argument("--memory", action="store_true", help="Measure peak memory of each case with tracemalloc")
+    parser.add_argument("--history", default=HISTORY_PATH, help="Path of the JSON history")
+    parser.add_argument("--no-save", action="store_true", help="Don't add this run to the history")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Throughput loss flagged as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with 1 if any case regressed")
+    args = parser.parse_args()
+
+    set_headless(True)
+    arcpy.CALL_COST = args.call_cost / 1000000
+    settings = synthetic.TableSettings(args.rows, args.cardinality, args.null_ratio, args.string_length, seed=args.seed)
+    names = [name for name in BENCHMARKS if not args.only or any(part in name for part in args.only)]
+
+    with tempfile.TemporaryDirectory(prefix="FlickToolsBenchmarks_") as temp_dir:
+        context = Context(settings, temp_dir)
+        run = {"time": datetime.now().isoformat(timespec="seconds"),
+               "commit": _git_commit(),
+               "python": platform.python_version(),
+               "machine": f"{platform.system()} {platform.machine()} {os.cpu_count()} cpus",
+               "numpy": archelp.np is not None,
+               "settings": settings.as_dict(),
+               "call_cost": args.call_cost,
+               "results": {}}
+        for name in names:
+            run["results"][name] = run_case(context, name, args.repeat, args.memory)
+            result = run["results"][name]
+            peak = f" {result['peak_bytes'] / 1024 / 1024:>9.1f} MB peak" if result["peak_bytes"] is not None else ""
+            print(f"{name:<40} {result['seconds']:>9.4f} s {result['items_per_second'] or 0:>14,.0f} items/s{peak}", flush=True)
+
+    runs = load_history(args.history)
+    baseline = find_baseline(runs, run)
+    changes = compare(run, baseline)
+    regressions = sorted(name for name, change in changes.items() if change < -args.threshold)
+
+    if baseline is None:
+        print("\nNo earlier run with the same settings to compare against")
+    else:
+        print(f"\nCompared with {baseline['time']} ({baseline['commit']}):")
+        for name, change in changes.items():
+            flag = "  REGRESSION" if name in regressions else ""
+            print(f"{name:<40} {change:>+8.1%}{flag}")
+
+    if not args.no_save:
+        save_history(args.history, runs + [run])
+
+    if regressions:
+        print(f"\n{len(regressions)} cases lost more than {args.threshold:.0%} throughput: {', '.join(regressions)}")
+        return 1 if args.fail_on_regression else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,597 @@
+"""
+Pure Python stand-in for the parts of arcpy the benchmarks run through.
+Tables, fields and domains live in memory and are registered with
+add_table() and add_domain() (see benchmarks.synthetic). Only the calls,
+arguments and where clauses the toolbox actually uses are supported.
+
+This is not a fake for testing tool logic against: it exists so the cost of
+FlickTools code can be measured without ArcGIS Pro. Cursor speed has nothing
+to do with a real geodatabase.
+
+Worker processes start with an empty registry. save() writes the registry to
+a file and points the ARCPY_STANDIN_DATA environment variable at it, so
+processes started afterwards (spawned pool workers) load the same tables.
+"""
+
+import os
+import pickle
+import re
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from operator import itemgetter
+from types import SimpleNamespace
+
+# Registered data (In the format {<normalized path>: <Table>} and {<workspace>: {<name>: <Domain>}})
+_tables = {}
+_domains = defaultdict(dict)
+
+# Messages sent with AddMessage/AddWarning/AddError, only counted
+message_counts = {"message": 0, "warning": 0, "error": 0}
+
+# Seconds each message and progressor call takes, to stand in for the cost of updating ArcGIS Pro
+CALL_COST = 0.0
+
+# Environment variable with the path of a registry written by save()
+DATA_ENV = "ARCPY_STANDIN_DATA"
+
+# AddField types and NumPy kinds to Field.type
+_ADD_FIELD_TYPES = {"TEXT": "String", "LONG": "Integer", "SHORT": "SmallInteger", "BIGINTEGER": "BigInteger",
+                    "DOUBLE": "Double", "FLOAT": "Single", "DATE": "Date", "GUID": "GUID"}
+_NUMPY_TYPES = {"U": "String", "i": "Integer", "f": "Double"}
+
+class ExecuteError(Exception):
+    pass
+
+class Field(object):
+    def __init__(self, name: str, type: str="String", length: int=255, domain: str="",
+                 aliasName: str=None, isNullable: bool=True) -> None:
+        self.name = name
+        self.type = type
+        self.length = length if type == "String" else 4
+        self.domain = domain
+        self.aliasName = aliasName or name
+        self.isNullable = isNullable
+        return
+
+class Table(object):
+    """
+    Rows of a table, OIDs are always the first column
+
+    @path: Path of the table
+    @fields: Fields after the OID field
+    @datatype: "Table" or "FeatureClass"
+    """
+
+    def __init__(self, path: str, fields: list[Field], datatype: str="Table") -> None:
+        self.path = _key(path)
+        self.datatype = datatype
+        self.fields = [Field("OBJECTID", "OID", isNullable=False)] + list(fields)
+        self.rows = []
+        # Selections are kept for inspection only, a path doesn't carry a selection like a layer does
+        self.selection = None
+        self._next_oid = 1
+        self._oid_index = None
+        return
+
+    def column(self, name: str) -> int:
+        """
+        @name: Field name (or OID@)
+        @return: Index of the field's column
+        """
+
+        if name.upper() == "OID@":
+            return 0
+        for i, field in enumerate(self.fields):
+            if field.name.upper() == name.upper():
+                return i
+        raise RuntimeError(f"Cannot find field '{name}'")
+
+    def append(self, values: list) -> int:
+        """
+        @values: Values of every field after the OID field
+        @return: OID of the new row
+        """
+
+        oid = self._next_oid
+        self._next_oid += 1
+        self.rows.append([oid] + list(values))
+        self._oid_index = None
+        return oid
+
+    def oid_index(self) -> dict:
+        """
+        @return: Position of each row (In the format {<oid>: <row index>})
+        """
+
+        if self._oid_index is None:
+            self._oid_index = {row[0]: i for i, row in enumerate(self.rows)}
+        return self._oid_index
+
+def _key(path: str) -> str:
+    return os.path.normpath(str(path))
+
+def _get_table(path: str) -> Table:
+    table = _tables.get(_key(path))
+    if table is None:
+        raise ExecuteError(f"ERROR 000732: Dataset {path} does not exist or is not supported")
+    return table
+
+def add_table(path: str, fields: list[Field], rows: list[list]=(), datatype: str="Table") -> Table:
+    """
+    Registers a table, replacing any table at the same path
+
+    @path: Path of the table
+    @fields: Fields after the OID field
+    @rows: Values of every field after the OID field for each row
+    @datatype: "Table" or "FeatureClass"
+    @return: The table
+    """
+
+    table = Table(path, fields, datatype)
+    for row in rows:
+        table.append(row)
+    _tables[table.path] = table
+    return table
+
+def add_domain(workspace: str, domain: "da.Domain") -> None:
+    """
+    @workspace: Workspace the domain belongs to
+    @domain: The domain
+    """
+
+    _domains[_key(workspace)][domain.name] = domain
+    return
+
+def save(path: str) -> None:
+    """
+    Writes every table and domain to a file that processes started afterwards load
+
+    @path: Path of the file
+    """
+
+    with open(path, "wb") as data_file:
+        pickle.dump((_tables, dict(_domains)), data_file, pickle.HIGHEST_PROTOCOL)
+    os.environ[DATA_ENV] = path
+    return
+
+def _load_saved() -> None:
+    """Load the registry written by save() in the parent process, if there is one"""
+
+    path = os.environ.get(DATA_ENV)
+    if path and os.path.exists(path) and not _tables:
+        with open(path, "rb") as data_file:
+            tables, domains = pickle.load(data_file)
+        _tables.update(tables)
+        _domains.update(domains)
+    return
+
+def reset() -> None:
+    """Forget every table and domain"""
+
+    _tables.clear()
+    _domains.clear()
+    return
+
+# Where clauses -------------------------------------------------------------
+
+_TOKEN = re.compile(r"\s*(?:(?P<string>'(?:[^']|'')*')|(?P<number>-?\d+(?:\.\d+)?)|(?P<name>[A-Za-z_][\w@.]*)|(?P<op><>|<=|>=|!=|=|<|>|\(|\)|,))")
+_OID_TERMS = re.compile(r"\s*(?:OR\s+)?(?P<field>\w+)\s+(?:BETWEEN\s+(?P<low>\d+)\s+AND\s+(?P<high>\d+)|IN\s*\((?P<oids>[\d,\s]+)\))", re.IGNORECASE)
+
+def _oid_rows(table: Table, clause: str) -> list:
+    """
+    Clauses from archelp.build_oid_queries() are answered from the OID index,
+    like a real geodatabase would.
+
+    @return: Rows selected by the clause, or None if it isn't an OID-only clause
+    """
+
+    oids, end = [], 0
+    for match in _OID_TERMS.finditer(clause):
+        if match.start() != end or table.column(match.group("field")) != 0:
+            return None
+        end = match.end()
+        if match.group("oids"):
+            oids.extend(int(oid) for oid in match.group("oids").split(","))
+        else:
+            oids.extend(range(int(match.group("low")), int(match.group("high")) + 1))
+    if end == 0 or clause[end:].strip():
+        return None
+
+    index = table.oid_index()
+    return [table.rows[index[oid]] for oid in sorted(set(oids)) if oid in index]
+
+def _compile(table: Table, clause: str):
+    """
+    Compiles a where clause (comparisons, BETWEEN, IN, IS [NOT] NULL, AND, OR, NOT)
+
+    @return: Function that takes a row and returns True if it's selected
+    """
+
+    out, pos, in_list = [], 0, False
+    tokens = []
+    while pos < len(clause.rstrip()):
+        match = _TOKEN.match(clause, pos)
+        if match is None:
+            raise ExecuteError(f"Invalid where clause: {clause}")
+        tokens.append((match.lastgroup, match.group(match.lastgroup)))
+        pos = match.end()
+
+    i = 0
+    while i < len(tokens):
+        kind, text = tokens[i]
+        word = text.upper()
+        if kind == "string":
+            out.append(repr(text[1:-1].replace("''", "'")))
+        elif kind == "number":
+            out.append(text)
+        elif word in ["AND", "OR", "NOT"]:
+            out.append(word.lower())
+        elif word == "IS":
+            negate = tokens[i + 1][1].upper() == "NOT"
+            out.append("is not None" if negate else "is None")
+            i += 2 if negate else 1
+        elif word == "IN":
+            out.append("in")
+            in_list = True
+        elif word == "BETWEEN":
+            operand, low, high = out.pop(), tokens[i + 1][1], tokens[i + 3][1]
+            out.append(f"({low} <= {operand} <= {high})")
+            i += 3
+        elif kind == "name":
+            out.append(f"r[{table.column(text)}]")
+        elif text == ")" and in_list:
+            out.append(",)")
+            in_list = False
+        else:
+            out.append({"=": "==", "<>": "!="}.get(text, text))
+        i += 1
+
+    test = eval(f"lambda r: {' '.join(out)}")
+
+    def where(row: list) -> bool:
+        # Comparisons with nulls are never true in SQL
+        try:
+            return test(row)
+        except TypeError:
+            return False
+    return where
+
+def _select(table: Table, clause: str) -> list:
+    """
+    @return: The rows of the table selected by a where clause
+    """
+
+    rows = table.rows
+    if clause:
+        selected = _oid_rows(table, clause)
+        if selected is not None:
+            return selected
+        where = _compile(table, clause)
+        rows = [row for row in rows if where(row)]
+    return rows
+
+# Environment, messages and progress ---------------------------------------
+
+env = SimpleNamespace(workspace=None, scratchGDB=None, overwriteOutput=True)
+
+@contextmanager
+def EnvManager(**settings):
+    previous = {name: getattr(env, name, None) for name in settings}
+    for name, value in settings.items():
+        setattr(env, name, value)
+    try:
+        yield env
+    finally:
+        for name, value in previous.items():
+            setattr(env, name, value)
+
+def _charge() -> None:
+    # Busy wait, sleep isn't precise for microseconds
+    if CALL_COST:
+        end = time.perf_counter() + CALL_COST
+        while time.perf_counter() < end:
+            pass
+    return
+
+def AddMessage(message: str) -> None:
+    _charge()
+    message_counts["message"] += 1
+
+def AddWarning(message: str) -> None:
+    _charge()
+    message_counts["warning"] += 1
+
+def AddError(message: str) -> None:
+    _charge()
+    message_counts["error"] += 1
+
+def SetProgressor(*args, **kwargs) -> None:
+    _charge()
+
+def SetProgressorPosition(*args, **kwargs) -> None:
+    _charge()
+
+def SetProgressorLabel(*args, **kwargs) -> None:
+    _charge()
+
+def ResetProgressor(*args, **kwargs) -> None:
+    _charge()
+
+# Parameters ----------------------------------------------------------------
+
+class Parameter(object):
+    def __init__(self, displayName: str="", name: str="", datatype: object="GPString", parameterType: str="Required",
+                 direction: str="Input", multiValue: bool=False, enabled: bool=True) -> None:
+        self.displayName = displayName
+        self.name = name
+        self.datatype = datatype
+        self.parameterType = parameterType
+        self.direction = direction
+        self.multiValue = multiValue
+        self.enabled = enabled
+        self.value = None
+        self.altered = False
+        self.parameterDependencies = []
+        self.filter = SimpleNamespace(type="ValueList", list=[])
+        self.schema = SimpleNamespace(clone=False)
+        self.message = ""
+        self._level = None
+        return
+
+    @property
+    def valueAsText(self) -> str:
+        if self.value is None:
+            return None
+        if isinstance(self.value, bool):
+            return str(self.value).lower()
+        if isinstance(self.value, (list, tuple)):
+            return ";".join(map(str, self.value))
+        return str(self.value)
+
+    def setErrorMessage(self, message: str) -> None:
+        self.message, self._level = message, "error"
+
+    def setWarningMessage(self, message: str) -> None:
+        self.message, self._level = message, "warning"
+
+    def clearMessage(self) -> None:
+        self.message, self._level = "", None
+
+    def hasError(self) -> bool:
+        return self._level == "error"
+
+    def hasWarning(self) -> bool:
+        return self._level == "warning"
+
+# Describing data ---------------------------------------------------------
+
+def Describe(path: str) -> SimpleNamespace:
+    table = _get_table(path)
+    return SimpleNamespace(catalogPath=table.path, path=os.path.dirname(table.path), name=os.path.basename(table.path),
+                           baseName=os.path.basename(table.path), dataType=table.datatype, hasOID=True,
+                           OIDFieldName="OBJECTID", fields=list(table.fields), FIDSet="", whereClause="")
+
+def ListFields(path: str, wild_card: str=None, field_type: str=None) -> list[Field]:
+    return list(_get_table(path).fields)
+
+def Exists(path: str) -> bool:
+    return _key(path) in _tables
+
+def AddFieldDelimiters(workspace: str, field: str) -> str:
+    return field
+
+def ValidateTableName(name: str, workspace: str=None) -> str:
+    return re.sub(r"\W", "_", os.path.basename(str(name)))
+
+def CreateUniqueName(name: str, workspace: str=None) -> str:
+    path = os.path.join(workspace or env.workspace or "", name)
+    i = 0
+    while Exists(path):
+        i += 1
+        path = os.path.join(workspace or env.workspace or "", f"{name}{i}")
+    return path
+
+def _walk_names(workspace: str, datatype: str) -> list[str]:
+    workspace = _key(workspace)
+    return sorted(os.path.basename(path) for path, table in _tables.items()
+                  if os.path.dirname(path) == workspace and (datatype is None or table.datatype == datatype))
+
+def ListTables(wild_card: str=None) -> list[str]:
+    return _walk_names(env.workspace, "Table")
+
+def ListFeatureClasses(wild_card: str=None, feature_type: str=None, feature_dataset: str=None) -> list[str]:
+    return [] if feature_dataset else _walk_names(env.workspace, "FeatureClass")
+
+def ListDatasets(wild_card: str=None, feature_type: str=None) -> list[str]:
+    return []
+
+class SpatialReference(object):
+    def __init__(self, wkid: int=4326) -> None:
+        self.factoryCode = wkid
+
+class Extent(object):
+    def __init__(self, XMin: float=0, YMin: float=0, XMax: float=0, YMax: float=0, spatial_reference=None) -> None:
+        self.XMin, self.YMin, self.XMax, self.YMax = XMin, YMin, XMax, YMax
+        self.spatialReference = spatial_reference
+
+# Geoprocessing tools -------------------------------------------------------
+
+class _Management(object):
+    def GetCount(self, path: str) -> list[str]:
+        return [str(len(_get_table(path).rows))]
+
+    def SelectLayerByAttribute(self, layer: str, selection_type: str="NEW_SELECTION", where_clause: str=None) -> str:
+        table = _get_table(layer)
+        if selection_type == "CLEAR_SELECTION":
+            table.selection = None
+            return layer
+
+        selected = {row[0] for row in _select(table, where_clause)}
+        if selection_type == "ADD_TO_SELECTION" and table.selection is not None:
+            selected |= table.selection
+        table.selection = selected
+        return layer
+
+    def CreateTable(self, out_path: str, out_name: str, *args, **kwargs) -> str:
+        path = os.path.join(out_path, out_name)
+        add_table(path, [])
+        return path
+
+    def AddField(self, table: str, field_name: str, field_type: str, field_precision=None, field_scale=None,
+                 field_length: int=None, field_alias: str=None, field_is_nullable: str="NULLABLE", *args, **kwargs) -> str:
+        target = _get_table(table)
+        target.fields.append(Field(field_name, _ADD_FIELD_TYPES.get(field_type, field_type), field_length or 255,
+                                   aliasName=field_alias))
+        for row in target.rows:
+            row.append(None)
+        return table
+
+    def Delete(self, path: str, *args, **kwargs) -> str:
+        _tables.pop(_key(path), None)
+        return path
+
+management = _Management()
+
+def Delete_management(path: str, *args, **kwargs) -> str:
+    return management.Delete(path)
+
+# Data access ---------------------------------------------------------------
+
+class _Cursor(object):
+    def __init__(self, in_table: str, field_names: list[str], where_clause: str=None, *args, **kwargs) -> None:
+        self._table = _get_table(in_table)
+        self.fields = tuple([field_names] if isinstance(field_names, str) else field_names)
+        self._columns = [self._table.column(f) for f in self.fields]
+        self._rows = _select(self._table, where_clause)
+        sql_clause = kwargs.get("sql_clause") or (args[2] if len(args) > 2 else None)
+        if sql_clause and sql_clause[1]:
+            self._order(sql_clause[1])
+        return
+
+    def _order(self, clause: str) -> None:
+        # Only "ORDER BY <field> [ASC | DESC]" is supported
+        match = re.fullmatch(r"\s*ORDER BY\s+(\w+)(?:\s+(ASC|DESC))?\s*", clause, re.IGNORECASE)
+        if match is None:
+            raise ExecuteError(f"Unsupported sql clause: {clause}")
+        column = self._table.column(match.group(1))
+        self._rows = sorted(self._rows, key=lambda row: (row[column] is None, row[column]),
+                            reverse=(match.group(2) or "").upper() == "DESC")
+        return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._rows = []
+        return
+
+    def _getter(self):
+        getter = itemgetter(*self._columns)
+        if len(self._columns) == 1:
+            return lambda row: (getter(row),)
+        return getter
+
+class _SearchCursor(_Cursor):
+    def __iter__(self):
+        return map(self._getter(), self._rows)
+
+class _UpdateCursor(_Cursor):
+    def __iter__(self):
+        getter = self._getter()
+        for row in self._rows:
+            self._current = row
+            yield list(getter(row))
+
+    def updateRow(self, values: list) -> None:
+        for column, value in zip(self._columns, values):
+            if column != 0:
+                self._current[column] = value
+        return
+
+    def deleteRow(self) -> None:
+        self._table.rows.remove(self._current)
+        self._table._oid_index = None
+        return
+
+class _InsertCursor(object):
+    def __init__(self, in_table: str, field_names: list[str], *args, **kwargs) -> None:
+        self._table = _get_table(in_table)
+        self.fields = tuple(field_names)
+        self._columns = [self._table.column(f) for f in self.fields]
+        return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        return
+
+    def insertRow(self, values: list) -> int:
+        row = [None] * (len(self._table.fields) - 1)
+        for column, value in zip(self._columns, values):
+            if column != 0:
+                row[column - 1] = value
+        return self._table.append(row)
+
+class _Editor(object):
+    def __init__(self, workspace: str) -> None:
+        self.workspace = workspace
+        self.isEditing = False
+
+    def startEditing(self, with_undo: bool=True, multiuser_mode: bool=True) -> None:
+        self.isEditing = True
+
+    def stopEditing(self, save_changes: bool=True) -> None:
+        self.isEditing = False
+
+    def startOperation(self) -> None:
+        return
+
+    def stopOperation(self) -> None:
+        return
+
+    def abortOperation(self) -> None:
+        return
+
+class _Domain(object):
+    def __init__(self, name: str, domainType: str="CodedValue", type: str="Long", codedValues: dict=None,
+                 range: list=None, description: str="") -> None:
+        self.name = name
+        self.domainType = domainType
+        self.type = type
+        self.codedValues = codedValues or {}
+        self.range = range or []
+        self.description = description
+
+def _list_domains(workspace: str) -> list:
+    return list(_domains.get(_key(workspace), {}).values())
+
+def _walk(top: str, datatype: str=None, type: str=None, **kwargs):
+    yield _key(top), [], _walk_names(top, datatype)
+
+def _numpy_array_to_table(in_array, out_table: str) -> None:
+    names = in_array.dtype.names
+    fields = [Field(name, _NUMPY_TYPES.get(in_array.dtype[name].kind, "String"),
+                    in_array.dtype[name].itemsize // 4 if in_array.dtype[name].kind == "U" else 4)
+              for name in names]
+    add_table(out_table, fields, in_array.tolist())
+
+da = SimpleNamespace(SearchCursor=_SearchCursor, UpdateCursor=_UpdateCursor, InsertCursor=_InsertCursor,
+                     Editor=_Editor, Domain=_Domain, ListDomains=_list_domains, Walk=_walk,
+                     NumPyArrayToTable=_numpy_array_to_table)
+
+# Projects ------------------------------------------------------------------
+
+class _ArcGISProject(object):
+    def __init__(self, path: str) -> None:
+        # Like arcpy outside of ArcGIS Pro, there is no current project
+        if path == "CURRENT":
+            raise OSError("CURRENT")
+        self.filePath = path
+        self.homeFolder = os.path.dirname(path)
+        self.defaultGeodatabase = os.path.join(self.homeFolder, "Default.gdb")
+
+mp = SimpleNamespace(ArcGISProject=_ArcGISProject)
+
+_load_saved()
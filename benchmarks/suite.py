@@ -0,0 +1,516 @@
+"""
+Benchmark cases. Each case is a function that takes the Context and the
+state returned by its setup function (run before every repeat and not
+timed), does the work being measured, and returns the number of items it
+processed (rows, OIDs, lookups) so throughput can be compared between runs
+of different sizes.
+"""
+
+import importlib
+import os
+import random
+import runpy
+import sys
+from contextlib import contextmanager
+
+import arcpy
+
+import utils.arcpy_tools as archelp
+import utils.profiler as profiler
+from benchmarks import synthetic
+from utils.crawler import crawl_databases
+from utils.dev import MANIFEST, loadTools
+from utils.domains import DomainValidator, clear_domains, get_domains
+from utils.progress import Progressor, set_headless
+from utils.sampling import Reservoir
+from utils.schema_index import SchemaIndex
+from utils.tool import Tool
+
+TOOLBOX = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "FlickTools.pyt")
+
+# Registered cases (In the format {<name>: (<function>, <setup function>)})
+BENCHMARKS = {}
+
+def benchmark(name: str, setup=None):
+    """
+    Registers a benchmark case
+
+    @name: Name of the case, kept the same between releases so results can be compared
+    @setup: Function that takes the Context and returns the state passed to the case (optional)
+    """
+
+    def register(function):
+        BENCHMARKS[name] = (function, setup)
+        return function
+    return register
+
+class Context(object):
+    """
+    Data shared by every case
+
+    @settings: synthetic.TableSettings of the tables
+    @temp_dir: Folder for files the cases write
+    """
+
+    def __init__(self, settings: synthetic.TableSettings, temp_dir: str) -> None:
+        self.settings = settings
+        self.temp_dir = temp_dir
+        self.tables = synthetic.build_tables(settings)
+        self.features = self.tables["features"]
+        self.join_table = self.tables["join_table"]
+        return
+
+class Messages(object):
+    """Stands in for the messages object passed to execute"""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.characters = 0
+
+    def addMessage(self, message: str) -> None:
+        self.count += 1
+        self.characters += len(message)
+
+    addWarningMessage = addErrorMessage = addMessage
+
+def run_tool(tool_class: type, values: dict) -> dict:
+    """
+    Runs a tool like the geoprocessing framework does
+
+    @tool_class: The tool class
+    @values: Parameter values by name
+    @return: The tool's parameters by name
+    """
+
+    tool = tool_class()
+    parameters = tool.getParameterInfo()
+    by_name = archelp.get_params(parameters)
+    for name, value in values.items():
+        by_name[name].value = value
+
+    tool.updateParameters(parameters)
+    tool.updateMessages(parameters)
+    tool.execute(parameters, Messages())
+    return by_name
+
+def _copy_features(context: Context) -> str:
+    return synthetic.copy_table(context.features, f"{synthetic.WORKSPACE}/features_copy")
+
+# Reading ---------------------------------------------------------------------
+
+@benchmark("read_batches[default]")
+def read_batches_default(context: Context, state: object) -> int:
+    fields = ["OID@", "TEXT_VALUE", "CODE", "PERCENT", "STRATUM", "WEIGHT"]
+    return sum(len(batch) for batch in archelp.get_batches(context.features, fields))
+
+@benchmark("read_batches[list]")
+def read_batches_list(context: Context, state: object) -> int:
+    fields = ["OID@", "TEXT_VALUE", "CODE", "PERCENT", "STRATUM", "WEIGHT"]
+    return sum(len(batch) for batch in archelp.get_batches(context.features, fields, array_type="list"))
+
+@benchmark("read_rows[row_to_dict]")
+def read_rows_dicts(context: Context, state: object) -> int:
+    # How get_rows read before batches, a dictionary for every row
+    fields = ["OID@", "TEXT_VALUE", "CODE", "PERCENT", "STRATUM", "WEIGHT"]
+    rows = 0
+    with arcpy.da.SearchCursor(context.features, fields) as cursor:
+        for row in archelp.row_to_dict(cursor):
+            rows += row["CODE"] is not None
+    return context.settings.rows
+
+@benchmark("read_rows[get_rows]")
+def read_rows_get_rows(context: Context, state: object) -> int:
+    fields = ["OID@", "TEXT_VALUE", "CODE", "PERCENT", "STRATUM", "WEIGHT"]
+    rows = 0
+    for cursor, row in archelp.get_rows(context.features, fields):
+        rows += row["CODE"] is not None
+    return context.settings.rows
+
+@benchmark("read_rows[batch columns]")
+def read_rows_columns(context: Context, state: object) -> int:
+    fields = ["OID@", "TEXT_VALUE", "CODE", "PERCENT", "STRATUM", "WEIGHT"]
+    rows = 0
+    for batch in archelp.get_batches(context.features, fields, array_type="list"):
+        rows += sum(1 for value in batch["CODE"] if value is not None)
+    return context.settings.rows
+
+@benchmark("progressor[per row step]")
+def progressor_step(context: Context, state: object) -> int:
+    steps = 1000000
+    with Progressor("Benchmark", steps) as progressor:
+        for i in range(steps):
+            progressor.step()
+    return steps
+
+@contextmanager
+def _progress_shown():
+    # Send progressor calls to the stand-in (see --call-cost) instead of skipping them
+    set_headless(False)
+    try:
+        yield
+    finally:
+        set_headless(True)
+
+@benchmark("progressor[throttled, shown]")
+def progressor_throttled(context: Context, state: object) -> int:
+    steps = 200000
+    with _progress_shown(), Progressor("Benchmark", steps) as progressor:
+        for i in range(steps):
+            progressor.step()
+    return steps
+
+@benchmark("progressor[SetProgressorPosition per row]")
+def progressor_per_row(context: Context, state: object) -> int:
+    # What tools did before Progressor, one ArcGIS Pro call per row
+    steps = 200000
+    with _progress_shown():
+        arcpy.SetProgressor("step", "Benchmark", 0, steps, 1)
+        for i in range(steps):
+            arcpy.SetProgressorPosition(i)
+        arcpy.ResetProgressor()
+    return steps
+
+# UniqueValuesInField ---------------------------------------------------------
+
+def _unique_values(context: Context, **values) -> int:
+    from tools.project.UniqueValuesInField import UniqueValuesInField
+
+    values = {"input_features": context.features, "fields": "TEXT_VALUE", "include_counts": True, **values}
+    run_tool(UniqueValuesInField, values)
+    return context.settings.rows
+
+@benchmark("unique_values[message]")
+def unique_values_message(context: Context, state: object) -> int:
+    return _unique_values(context)
+
+@benchmark("unique_values[table]")
+def unique_values_table(context: Context, state: object) -> int:
+    with arcpy.EnvManager(workspace=synthetic.WORKSPACE):
+        return _unique_values(context, output_as_table=True)
+
+@benchmark("unique_values[3 fields]")
+def unique_values_fields(context: Context, state: object) -> int:
+    return _unique_values(context, fields="TEXT_VALUE;CODE;STRATUM")
+
+@benchmark("unique_values[approximate]")
+def unique_values_approximate(context: Context, state: object) -> int:
+    return _unique_values(context, approximate=True, sketch_size=100)
+
+@benchmark("unique_values[spilled table]")
+def unique_values_spilled(context: Context, state: object) -> int:
+    from tools.project.UniqueValuesInField import UniqueValuesInField
+
+    # Keep a tenth of the distinct values in memory so the counts are merged from disk
+    class SpillingUniqueValues(UniqueValuesInField):
+        def __init__(self) -> None:
+            super().__init__()
+            self.spill_limit = max(context.settings.cardinality // 10, 1)
+
+    values = {"input_features": context.features, "fields": "TEXT_VALUE", "include_counts": True, "output_as_table": True}
+    with arcpy.EnvManager(workspace=synthetic.WORKSPACE):
+        run_tool(SpillingUniqueValues, values)
+    return context.settings.rows
+
+def _distinct_batches(num_values: int):
+    def setup(context: Context) -> list:
+        batch_size = 10000
+        return [archelp.Batch(["VALUE"], {"VALUE": [f"value {i:08d}" for i in range(start, min(start + batch_size, num_values))]},
+                              min(batch_size, num_values - start))
+                for start in range(0, num_values, batch_size)]
+    return setup
+
+def _count_spilled(batches: list) -> int:
+    # Exact counts with 20,000 distinct values in memory, then merged back in order. Run with
+    # --memory, the peak should stay the same as the number of distinct values grows.
+    from tools.project.UniqueValuesInField import UniqueValueCounter
+
+    counter = UniqueValueCounter(["VALUE"], 20000)
+    try:
+        for batch in batches:
+            counter.update(batch)
+        return sum(1 for item in counter.sorted_items(0))
+    finally:
+        counter.close()
+
+@benchmark("unique_values[spill 100k distinct]", setup=_distinct_batches(100000))
+def unique_values_spill_small(context: Context, batches: list) -> int:
+    return _count_spilled(batches)
+
+@benchmark("unique_values[spill 1m distinct]", setup=_distinct_batches(1000000))
+def unique_values_spill_large(context: Context, batches: list) -> int:
+    return _count_spilled(batches)
+
+def _render_setup(num_values: int):
+    def setup(context: Context) -> list:
+        return [(f"value {i:08d}", i % 977) for i in range(num_values)]
+    return setup
+
+def _render_message(context: Context, items: list) -> int:
+    # Only the message output, every value listed. Items per second should stay the same as the
+    # number of values grows.
+    from tools.project.UniqueValuesInField import UniqueValuesInField
+
+    tool = UniqueValuesInField()
+    parameters = tool.getParameterInfo()
+    parameters[0].value = context.features
+    parameters[1].value = "TEXT_VALUE"
+    tool._outputAsMessage([iter(items)], 1, parameters, [len(items[-1][0])], True, Messages(), max_values=0)
+    return len(items)
+
+@benchmark("unique_values[render 10k values]", setup=_render_setup(10000))
+def unique_values_render_small(context: Context, items: list) -> int:
+    return _render_message(context, items)
+
+@benchmark("unique_values[render 1m values]", setup=_render_setup(1000000))
+def unique_values_render_large(context: Context, items: list) -> int:
+    return _render_message(context, items)
+
+def _saved_tables(context: Context) -> None:
+    # Worker processes load the synthetic tables from a file
+    path = os.path.join(context.temp_dir, "standin.pickle")
+    if not os.path.exists(path):
+        arcpy.save(path)
+    return None
+
+def _count_parallel(context: Context, workers: int) -> int:
+    from tools.project.UniqueValuesInField import UniqueValuesInField
+
+    counter = UniqueValuesInField()._countParallel(context.features, ["TEXT_VALUE", "CODE", "STRATUM"], workers)
+    counter.close()
+    return context.settings.rows
+
+@benchmark("unique_values[parallel 1 worker]", setup=_saved_tables)
+def unique_values_parallel_1(context: Context, state: object) -> int:
+    return _count_parallel(context, 1)
+
+@benchmark("unique_values[parallel 2 workers]", setup=_saved_tables)
+def unique_values_parallel_2(context: Context, state: object) -> int:
+    return _count_parallel(context, 2)
+
+@benchmark("unique_values[parallel 4 workers]", setup=_saved_tables)
+def unique_values_parallel_4(context: Context, state: object) -> int:
+    return _count_parallel(context, 4)
+
+# SelectRandomByCount ---------------------------------------------------------
+
+def _select_random(context: Context, **values) -> int:
+    from tools.project.SelectRandomByCount import SelectRandomByCount
+
+    values = {"input_features": context.features, "subset_count": 1000, "seed": 1, **values}
+    run_tool(SelectRandomByCount, values)
+    return context.settings.rows
+
+@benchmark("select_random[count]")
+def select_random_count(context: Context, state: object) -> int:
+    return _select_random(context)
+
+@benchmark("select_random[strata proportion]")
+def select_random_proportion(context: Context, state: object) -> int:
+    return _select_random(context, strata_field="STRATUM", strata_method="Proportion", proportion=0.1)
+
+@benchmark("select_random[weighted strata]")
+def select_random_weighted(context: Context, state: object) -> int:
+    return _select_random(context, strata_field="STRATUM", weight_field="WEIGHT")
+
+@benchmark("sampling[reservoir]")
+def sampling_reservoir(context: Context, state: object) -> int:
+    reservoir = Reservoir(1000, random.Random(1))
+    for batch in archelp.get_batches(context.features, ["OID@"], array_type="array"):
+        reservoir.add_batch(batch["OID@"])
+    return context.settings.rows
+
+@benchmark("sampling[list then random.sample]")
+def sampling_list(context: Context, state: object) -> int:
+    # How SelectRandomByCount sampled before the reservoir, every OID held in a list
+    with arcpy.da.SearchCursor(context.features, ["OID@"]) as cursor:
+        oids = [row[0] for row in cursor]
+    random.Random(1).sample(oids, min(1000, len(oids)))
+    return context.settings.rows
+
+@benchmark("build_oid_queries[10% random]", setup=lambda context: random.Random(2).sample(range(1, context.settings.rows + 1), context.settings.rows // 10))
+def build_oid_queries(context: Context, oids: list) -> int:
+    archelp.build_oid_queries("OBJECTID", oids)
+    return len(oids)
+
+def _oid_sample(num_oids: int):
+    # A tenth of the OIDs in a range ten times the sample size, independent of --rows
+    def setup(context: Context) -> list:
+        return random.Random(2).sample(range(1, num_oids * 10 + 1), num_oids)
+    return setup
+
+def _build_oid_queries(context: Context, oids: list) -> int:
+    archelp.build_oid_queries("OBJECTID", oids)
+    return len(oids)
+
+for _num_oids, _name in [(10, "10"), (100, "100"), (1000, "1k"), (10000, "10k"), (100000, "100k"), (1000000, "1m")]:
+    benchmark(f"build_oid_queries[{_name} oids]", setup=_oid_sample(_num_oids))(_build_oid_queries)
+
+# Domains ---------------------------------------------------------------------
+
+@benchmark("field_domains[fields]", setup=lambda context: clear_domains())
+def field_domains_fields(context: Context, state: object) -> int:
+    from tools.project.FieldDomains import FieldDomains
+
+    runs = 100
+    for i in range(runs):
+        run_tool(FieldDomains, {"input_features": context.features, "fields": "CODE;PERCENT;TEXT_VALUE"})
+    return runs
+
+@benchmark("field_domains[json report]", setup=lambda context: clear_domains())
+def field_domains_report(context: Context, state: object) -> int:
+    from tools.project.FieldDomains import FieldDomains
+
+    run_tool(FieldDomains, {"bulk_report": True, "workspace": synthetic.WORKSPACE,
+                            "output_report": os.path.join(context.temp_dir, "domains.json")})
+    return len(arcpy.ListFields(context.features)) + len(arcpy.ListFields(context.join_table))
+
+@benchmark("validate_domains")
+def validate_domains(context: Context, state: object) -> int:
+    from tools.project.ValidateDomains import ValidateDomains
+
+    run_tool(ValidateDomains, {"input_features": context.features, "fields": "CODE;PERCENT"})
+    return context.settings.rows
+
+@benchmark("domain_validator[update]")
+def domain_validator(context: Context, state: object) -> int:
+    domains = get_domains(synthetic.WORKSPACE)
+    validator = DomainValidator({"CODE": ("Integer", domains["Codes"]), "PERCENT": ("Double", domains["Percent"])}, 100)
+    for batch in archelp.get_batches(context.features, ["OID@", "CODE", "PERCENT"]):
+        validator.update(batch)
+    return validator.num_rows
+
+# Updates and joins -----------------------------------------------------------
+
+@benchmark("update_columns[transform]", setup=_copy_features)
+def update_columns(context: Context, features: str) -> int:
+    def transform(batch: archelp.Batch) -> dict:
+        return {"TEXT_VALUE": [value.lower() if value else value for value in batch["TEXT_VALUE"]]}
+
+    return archelp.update_columns(features, ["TEXT_VALUE"], transform)["scanned"]
+
+@benchmark("join_fields[hash join]", setup=_copy_features)
+def join_fields_hash(context: Context, features: str) -> int:
+    return archelp.join_fields(features, "KEY", context.join_table, "KEY", ["JOINED"])["scanned"]
+
+@benchmark("join_fields[cursor per lookup]", setup=_copy_features)
+def join_fields_lookup(context: Context, features: str) -> int:
+    # The approach join_fields replaces: one join table query per target row. Only a sample of
+    # rows is joined, compare rows per second with the hash join.
+    lookups = min(context.settings.rows, 200)
+    with arcpy.da.UpdateCursor(features, ["KEY", "JOINED"], f"OBJECTID <= {lookups}") as cursor:
+        for row in cursor:
+            with arcpy.da.SearchCursor(context.join_table, ["JOINED"], f"KEY = {row[0]}") as join_cursor:
+                match = next(iter(join_cursor), None)
+            if match is not None:
+                cursor.updateRow([row[0], match[0]])
+    return lookups
+
+# Catalogs and the toolbox ----------------------------------------------------
+
+def _new_schema_index(context: Context) -> SchemaIndex:
+    path = os.path.join(context.temp_dir, "schemas.sqlite")
+    if os.path.exists(path):
+        os.remove(path)
+    return SchemaIndex(path)
+
+@benchmark("schema_index[get]", setup=_new_schema_index)
+def schema_index_get(context: Context, index: SchemaIndex) -> int:
+    lookups = 1000
+    for i in range(lookups):
+        index.get(context.features)
+    return lookups
+
+def _crawl_tree(context: Context) -> str:
+    # 20 folders of 10 folders, every third one holding a geodatabase
+    root = os.path.join(context.temp_dir, "crawl")
+    if not os.path.exists(root):
+        for i in range(20):
+            for j in range(10):
+                folder = os.path.join(root, f"folder{i}", f"sub{j}")
+                os.makedirs(folder)
+                if j % 3 == 0:
+                    os.makedirs(os.path.join(folder, f"data{j}.gdb"))
+    return root
+
+@benchmark("crawl_databases[cold]", setup=_crawl_tree)
+def crawl_cold(context: Context, root: str) -> int:
+    return sum(1 for database in crawl_databases(root))
+
+def _crawl_catalog(context: Context) -> tuple:
+    # Crawl once so the timed crawl finds every directory unchanged
+    root, catalog_path = _crawl_tree(context), os.path.join(context.temp_dir, "catalog.sqlite")
+    for database in crawl_databases(root, catalog_path=catalog_path):
+        pass
+    return root, catalog_path
+
+@benchmark("crawl_databases[unchanged catalog]", setup=_crawl_catalog)
+def crawl_catalog(context: Context, state: tuple) -> int:
+    root, catalog_path = state
+    return sum(1 for database in crawl_databases(root, catalog_path=catalog_path))
+
+@benchmark("load_tools")
+def load_tools(context: Context, state: object) -> int:
+    return len(loadTools())
+
+def _forget_tools(context: Context) -> None:
+    # Drop imported tool modules so the next import is cold
+    for name in [name for name in sys.modules if name.startswith("tools.project.")]:
+        del sys.modules[name]
+    return None
+
+@benchmark("toolbox[load]", setup=_forget_tools)
+def toolbox_load(context: Context, state: object) -> int:
+    toolbox = runpy.run_path(TOOLBOX)["Toolbox"]()
+    return len(toolbox.tools)
+
+@benchmark("toolbox[load, import every tool]", setup=_forget_tools)
+def toolbox_load_eager(context: Context, state: object) -> int:
+    # How the toolbox loaded before the manifest, every tool module imported (and reloaded) up front
+    entries = [(entry["module"], entry["class"]) for entry in __import__("json").load(open(MANIFEST))]
+    for module_name, class_name in entries:
+        getattr(importlib.reload(importlib.import_module(module_name)), class_name)
+    return len(entries)
+
+@benchmark("toolbox[open dialog, cold]", setup=_forget_tools)
+def toolbox_open_cold(context: Context, state: object) -> int:
+    # The first dialog opened for each tool imports its module
+    tools = runpy.run_path(TOOLBOX)["Toolbox"]().tools
+    for tool_class in tools:
+        tool_class().getParameterInfo()
+    return len(tools)
+
+@benchmark("toolbox[open dialog, warm]")
+def toolbox_open_warm(context: Context, state: object) -> int:
+    tools = runpy.run_path(TOOLBOX)["Toolbox"]().tools
+    opens = 100
+    for i in range(opens):
+        for tool_class in tools:
+            tool_class().getParameterInfo()
+    return opens * len(tools)
+
+class _ReadTool(Tool):
+    """Reads every row, to measure the cost of profiling a tool"""
+
+    def execute(self, parameters: list, messages: list) -> None:
+        for batch in archelp.get_batches(parameters[0], ["OID@", "TEXT_VALUE", "CODE"]):
+            pass
+        return
+
+def _profile_setup(enabled: bool):
+    def setup(context: Context) -> None:
+        profiler.set_profiling(enabled, log_path=os.path.join(context.temp_dir, "profile.jsonl"))
+        return None
+    return setup
+
+@benchmark("profiler[off]", setup=_profile_setup(False))
+def profiler_off(context: Context, state: object) -> int:
+    _ReadTool().execute([context.features], Messages())
+    return context.settings.rows
+
+@benchmark("profiler[on]", setup=_profile_setup(True))
+def profiler_on(context: Context, state: object) -> int:
+    try:
+        _ReadTool().execute([context.features], Messages())
+    finally:
+        profiler.set_profiling(False)
+    return context.settings.rows
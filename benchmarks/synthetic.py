@@ -0,0 +1,123 @@
+"""
+Synthetic tables for the benchmarks, registered with the arcpy stand-in.
+Every table is generated from a seed, so the same settings always give the
+same data.
+"""
+
+import os
+import random
+import string
+import tempfile
+
+import arcpy
+
+# Workspace the synthetic tables are registered in. The folder is created (and left empty) so the
+# workspace has a modification stamp like a real file geodatabase.
+WORKSPACE = os.path.join(tempfile.gettempdir(), "FlickToolsBenchmarks", "synthetic.gdb")
+
+class TableSettings(object):
+    """
+    Shape of a synthetic table
+
+    @rows: Number of rows
+    @cardinality: Number of distinct values in the value fields
+    @null_ratio: Share of rows with a null in each value field
+    @string_length: Length of the text values
+    @violation_ratio: Share of rows with a value their domain doesn't allow
+    @seed: Random seed
+    """
+
+    def __init__(self, rows: int=100000, cardinality: int=1000, null_ratio: float=0.05, string_length: int=12,
+                 violation_ratio: float=0.01, seed: int=0) -> None:
+        self.rows = rows
+        self.cardinality = cardinality
+        self.null_ratio = null_ratio
+        self.string_length = string_length
+        self.violation_ratio = violation_ratio
+        self.seed = seed
+        return
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+
+def _words(rng: random.Random, count: int, length: int) -> list[str]:
+    """
+    @return: count distinct random strings of the given length
+    """
+
+    words = set()
+    while len(words) < count:
+        words.add("".join(rng.choices(string.ascii_uppercase + string.digits, k=length)))
+    return sorted(words)
+
+def build_tables(settings: TableSettings) -> dict:
+    """
+    Registers a feature class and a join table in WORKSPACE
+
+    "features" has:
+        TEXT_VALUE (String, <cardinality> values, some "" and " " sentinels),
+        CODE (Integer, coded value domain "Codes"),
+        PERCENT (Double, range domain "Percent" of 0 to 100),
+        STRATUM (SmallInteger, 10 values), WEIGHT (Double), KEY (Integer, unique),
+        JOINED (String, empty until joined)
+    "join_table" has KEY and JOINED for every second key of the features, so
+    half of the features match.
+
+    @settings: Shape of the tables
+    @return: Paths of the tables (In the format {"features", "join_table", "workspace"})
+    """
+
+    os.makedirs(WORKSPACE, exist_ok=True)
+
+    rng = random.Random(settings.seed)
+    words = _words(rng, max(settings.cardinality - 2, 1), settings.string_length) + ["", " "]
+    num_codes = max(settings.cardinality, 2)
+
+    codes = {code: f"Code {code}" for code in range(num_codes)}
+    arcpy.add_domain(WORKSPACE, arcpy.da.Domain("Codes", "CodedValue", "Long", codedValues=codes))
+    arcpy.add_domain(WORKSPACE, arcpy.da.Domain("Percent", "Range", "Double", range=[0.0, 100.0]))
+
+    def null_or(value):
+        return None if rng.random() < settings.null_ratio else value
+
+    rows = []
+    for key in range(settings.rows):
+        violation = rng.random() < settings.violation_ratio
+        rows.append([null_or(rng.choice(words)),
+                     null_or(num_codes + 1 if violation else rng.randrange(num_codes)),
+                     null_or(150.0 if violation else rng.uniform(0, 100)),
+                     rng.randrange(10),
+                     rng.uniform(0.1, 10.0),
+                     key,
+                     None])
+
+    fields = [arcpy.Field("TEXT_VALUE", "String", settings.string_length),
+              arcpy.Field("CODE", "Integer", domain="Codes"),
+              arcpy.Field("PERCENT", "Double", domain="Percent"),
+              arcpy.Field("STRATUM", "SmallInteger"),
+              arcpy.Field("WEIGHT", "Double"),
+              arcpy.Field("KEY", "Integer"),
+              arcpy.Field("JOINED", "String", 20)]
+    features = f"{WORKSPACE}/features"
+    arcpy.add_table(features, fields, rows, "FeatureClass")
+
+    join_rows = [[key, f"Joined {key}"] for key in range(0, settings.rows, 2)]
+    join_table = f"{WORKSPACE}/join_table"
+    arcpy.add_table(join_table, [arcpy.Field("KEY", "Integer"), arcpy.Field("JOINED", "String", 20)], join_rows)
+
+    return {"features": features, "join_table": join_table, "workspace": WORKSPACE}
+
+def copy_table(path: str, copy_path: str) -> str:
+    """
+    Registers a copy of a table, for benchmarks that change their input
+
+    @path: Path of the table to copy
+    @copy_path: Path of the copy
+    @return: Path of the copy
+    """
+
+    table = arcpy._get_table(path)
+    copy = arcpy.add_table(copy_path, table.fields[1:], [], table.datatype)
+    copy.rows = [list(row) for row in table.rows]
+    copy._next_oid = table._next_oid
+    return copy_path
@@ -0,0 +1,30 @@
+"""
+Tests run against the arcpy stand-in used by the benchmarks, so they don't
+need ArcGIS Pro.
+
+    python -m pytest tests
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The stand-in has to be found before any real arcpy
+sys.path.insert(0, os.path.join(ROOT, "benchmarks", "standin"))
+sys.path.insert(1, ROOT)
+
+import arcpy
+import pytest
+
+@pytest.fixture
+def table():
+    """
+    @return: Path of a stand-in table with NAME (text) and CODE (integer) fields and 25 rows,
+             removed after the test
+    """
+
+    fields = [arcpy.Field("NAME", "String"), arcpy.Field("CODE", "Integer")]
+    rows = [[None if i % 10 == 0 else f"name{i % 3}", i * 2] for i in range(25)]
+    yield arcpy.add_table("memory/tests_table", fields, rows).path
+    arcpy.reset()
@@ -0,0 +1,51 @@
+import arcpy
+
+import utils.arcpy_tools as archelp
+
+FIELDS = ["OID@", "NAME", "CODE"]
+
+def _cursor_rows(table: str) -> list[tuple]:
+    with arcpy.da.SearchCursor(table, FIELDS) as cursor:
+        return [tuple(row) for row in cursor]
+
+def test_batch_columns_and_rows():
+    batch = archelp.Batch(["A", "B"], {"A": [1, 2], "B": ["x", None]}, 2)
+
+    assert len(batch) == 2
+    assert batch["B"] == ["x", None]
+    assert list(batch.dicts()) == [{"A": 1, "B": "x"}, {"A": 2, "B": None}]
+
+    rows = list(batch.rows())
+    assert rows[1]["A"] == 2
+    assert rows[1].keys() == ["A", "B"]
+    assert rows[0].as_dict() == {"A": 1, "B": "x"}
+
+def test_read_batches_splits_rows_into_chunks(table):
+    with arcpy.da.SearchCursor(table, FIELDS) as cursor:
+        batches = list(archelp.read_batches(cursor, batch_size=10, array_type="list"))
+
+    assert [len(batch) for batch in batches] == [10, 10, 5]
+    rows = [tuple(row.values()) for batch in batches for row in batch.rows()]
+    assert rows == _cursor_rows(table)
+
+def test_read_batches_keeps_nulls_and_text(table):
+    for array_type in ["numpy", "array", "list"]:
+        batches = list(archelp.get_batches(table, FIELDS, batch_size=7, array_type=array_type))
+        names = [name for batch in batches for name in batch["NAME"]]
+        codes = [int(code) for batch in batches for code in batch["CODE"]]
+
+        assert names == [row[1] for row in _cursor_rows(table)]
+        assert codes == [row[2] for row in _cursor_rows(table)]
+
+def test_read_batches_packs_numbers(table):
+    batch = next(archelp.get_batches(table, FIELDS, array_type="array"))
+
+    assert batch["CODE"].typecode == "q"
+    assert isinstance(batch["NAME"], list)
+
+def test_read_batches_empty_query(table):
+    assert list(archelp.get_batches(table, FIELDS, query="CODE < 0")) == []
+
+def test_get_rows_matches_cursor(table):
+    rows = [tuple(row[field] for field in FIELDS) for cursor, row in archelp.get_rows(table, FIELDS)]
+    assert rows == _cursor_rows(table)
@@ -0,0 +1,53 @@
+import sqlite3
+import time
+
+import pytest
+
+from utils.cache import Cache, get_cache_path
+
+@pytest.fixture
+def cache(tmp_path):
+    return Cache(get_cache_path(str(tmp_path)), "tests", ttl=60, max_entries=3)
+
+def test_set_and_get(cache):
+    assert cache.get("missing") is None
+
+    cache.set("huc", {"names": ["a", "b"], "count": 2})
+    assert cache.get("huc") == {"names": ["a", "b"], "count": 2}
+
+    cache.set("huc", [1])
+    assert cache.get("huc") == [1]
+
+def test_stale_entries(cache):
+    cache.set("old", 1)
+    with sqlite3.connect(cache.path) as connection:
+        connection.execute("UPDATE tests SET created = ?", (time.time() - 120,))
+    connection.close()
+
+    assert cache.get("old") is None
+    assert cache.get("old", allow_stale=True) == 1
+
+def test_least_recently_used_entries_are_removed(cache):
+    for key in ["a", "b", "c"]:
+        cache.set(key, key)
+        time.sleep(0.01)
+    cache.get("a")
+    cache.set("d", "d")
+
+    assert cache.get("b") is None
+    assert [cache.get(key) for key in ["a", "c", "d"]] == ["a", "c", "d"]
+
+def test_delete_and_clear(cache):
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.delete("a")
+    assert cache.get("a") is None and cache.get("b") == 2
+
+    cache.clear()
+    assert cache.get("b") is None
+
+def test_tables_are_separate(cache):
+    other = Cache(cache.path, "other")
+    cache.set("key", "first")
+    other.set("key", "second")
+    assert cache.get("key") == "first" and other.get("key") == "second"
@@ -0,0 +1,61 @@
+import os
+import random
+from collections import Counter
+
+import pytest
+
+from utils.external_sort import SortedRuns
+
+@pytest.fixture
+def temp_dir(tmp_path):
+    return str(tmp_path)
+
+def test_merge_adds_up_counts(temp_dir):
+    runs = SortedRuns(temp_dir)
+    runs.spill({"a": 2, "b": 1})
+    runs.spill({"a": 1})
+
+    assert list(runs.merge({"c": 4, "b": 1})) == [("a", 3), ("b", 2), ("c", 4)]
+    runs.close()
+
+def test_compaction_keeps_counts(temp_dir):
+    rng = random.Random(1)
+    expected = Counter()
+    runs = SortedRuns(temp_dir, max_runs=4, block_size=7)
+    for spill in range(30):
+        counts = Counter(rng.randrange(500) for i in range(rng.randrange(1, 200)))
+        expected.update(counts)
+        runs.spill(dict(counts))
+        assert len(runs) <= 4
+        assert len(os.listdir(temp_dir)) == len(runs)
+
+    assert list(runs.merge()) == sorted(expected.items())
+    assert sum(runs.sizes) >= len(expected)
+    runs.close()
+
+def test_compaction_merges_smaller_runs(temp_dir):
+    runs = SortedRuns(temp_dir, max_runs=4)
+    runs.spill({i: 1 for i in range(1000)})
+    for i in range(3):
+        runs.spill({i: 1})
+    runs.spill({5: 1})
+
+    # The large run is left alone, two of the small ones are merged to make room
+    assert sorted(runs.sizes) == [1, 1, 2, 1000]
+    assert list(runs.merge()) == [(i, 2 if i in (0, 1, 2, 5) else 1) for i in range(1000)]
+    runs.close()
+
+def test_extend_and_close_remove_files(temp_dir):
+    first, second = SortedRuns(temp_dir), SortedRuns(temp_dir)
+    first.spill({1: 1})
+    second.spill({1: 2, 2: 1})
+    first.extend(second)
+
+    assert len(second) == 0
+    assert list(first.merge()) == [(1, 3), (2, 1)]
+    first.close()
+    assert os.listdir(temp_dir) == []
+
+def test_block_for():
+    assert SortedRuns.block_for(1000, 10) == 100
+    assert SortedRuns.block_for(5, 10) == 1
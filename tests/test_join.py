@@ -0,0 +1,103 @@
+import os
+import tempfile
+
+import arcpy
+import pytest
+
+import utils.arcpy_tools as archelp
+
+@pytest.fixture
+def join_tables():
+    """
+    @return: (<target>, <join table>) stand-in tables. The target has keys 0 - 19 (and a null key),
+             the join table has keys 5 - 29 with a duplicate of key 7
+    """
+
+    target = arcpy.add_table("memory/target", [arcpy.Field("KEY", "Integer"), arcpy.Field("OWNER", "String"),
+                                               arcpy.Field("VALUE", "Double")],
+                             [[i, "old", -1.0] for i in range(20)] + [[None, "old", -1.0]]).path
+    join_rows = [[i, f"owner{i}", i * 1.5] for i in range(5, 30)] + [[7, "duplicate", 0.0]]
+    join_table = arcpy.add_table("memory/join", [arcpy.Field("JOIN_KEY", "Integer"), arcpy.Field("NAME", "String"),
+                                                 arcpy.Field("AMOUNT", "Double")], join_rows).path
+    yield target, join_table
+    arcpy.reset()
+
+def _target_rows(target: str) -> dict:
+    with arcpy.da.SearchCursor(target, ["KEY", "OWNER", "VALUE"]) as cursor:
+        return {row[0]: (row[1], row[2]) for row in cursor}
+
+def _join(target: str, join_table: str, **kwargs) -> dict:
+    return archelp.join_fields(target, "KEY", join_table, "JOIN_KEY", ["NAME", "AMOUNT"],
+                               target_fields=["OWNER", "VALUE"], **kwargs)
+
+def test_join_fields(join_tables):
+    stats = _join(*join_tables)
+    rows = _target_rows(join_tables[0])
+
+    assert rows[7] == ("owner7", 10.5)
+    assert rows[19] == ("owner19", 28.5)
+    assert rows[4] == ("old", -1.0) and rows[None] == ("old", -1.0)
+    assert stats["indexed"] == 25 and stats["duplicates"] == 1
+    assert stats["matched"] == 15 and stats["unmatched"] == 6
+    assert stats["changed"] == 15 and not stats["spilled"]
+
+def test_join_fields_clears_unmatched(join_tables):
+    stats = _join(*join_tables, keep_unmatched=False)
+    rows = _target_rows(join_tables[0])
+
+    assert rows[4] == (None, None) and rows[None] == (None, None)
+    assert rows[5] == ("owner5", 7.5)
+    assert stats["changed"] == 21
+
+def test_join_fields_queries(join_tables):
+    stats = _join(*join_tables, target_query="KEY >= 10", join_query="JOIN_KEY < 15")
+    rows = _target_rows(join_tables[0])
+
+    assert rows[12] == ("owner12", 18.0)
+    assert rows[8] == ("old", -1.0) and rows[16] == ("old", -1.0)
+    assert stats["scanned"] == 10 and stats["matched"] == 5
+
+def test_join_fields_spilled(join_tables):
+    # Too small for even the keys in the target, so the index moves to disk
+    stats = _join(*join_tables, memory_budget=500)
+
+    assert stats["spilled"] and stats["duplicates"] == 1
+    assert _target_rows(join_tables[0])[7] == ("owner7", 10.5)
+    assert [name for name in os.listdir(tempfile.gettempdir()) if name.startswith("FlickToolsJoin_")] == []
+
+def test_join_fields_restricts_to_target_keys(join_tables):
+    # The whole join table doesn't fit, the rows with keys in the target do
+    size = archelp.JoinIndex()._entry_size(5, ("owner5", 7.5))
+    stats = _join(*join_tables, memory_budget=size * 18)
+
+    assert not stats["spilled"]
+    assert stats["indexed"] == 15
+    assert _target_rows(join_tables[0])[19] == ("owner19", 28.5)
+
+def test_join_index_spill():
+    index = archelp.JoinIndex(memory_budget=300)
+    index.add_many([(i, (f"value{i}",)) for i in range(50)] + [(3, ("duplicate",))])
+
+    assert index.spilled and os.path.exists(index.spill_path)
+    assert len(index) == 50 and index.duplicates == 1
+    assert index.get_many([3, 49, 99]) == {3: ("value3",), 49: ("value49",)}
+
+    index.add(60, ("value60",))
+    index.restrict({60})
+    index.add(61, ("value61",))
+    assert index.get_many([60, 61]) == {60: ("value60",)}
+
+    path = index.spill_path
+    index.close()
+    assert not os.path.exists(path)
+
+def test_join_index_restrict():
+    index = archelp.JoinIndex()
+    index.add_many([(i, (i,)) for i in range(10)])
+    index.restrict({1, 2, 20})
+    index.add(20, (20,))
+    index.add(30, (30,))
+
+    assert len(index) == 3
+    assert index.get_many(range(40)) == {1: (1,), 2: (2,), 20: (20,)}
+    assert index.size == sum(index._entry_size(key, (key,)) for key in [1, 2, 20])
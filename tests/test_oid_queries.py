@@ -0,0 +1,33 @@
+import random
+
+import arcpy
+import pytest
+
+import utils.arcpy_tools as archelp
+
+def test_compress_oids():
+    assert archelp.compress_oids([7, 1, 2, 3, 5, 3]) == [(1, 3), (5, 5), (7, 7)]
+    assert archelp.compress_oids([]) == []
+
+def test_build_oid_queries_terms():
+    queries = archelp.build_oid_queries("OBJECTID", [1, 2, 3, 5, 9, 10])
+    assert queries == ["OBJECTID BETWEEN 1 AND 3 OR OBJECTID BETWEEN 9 AND 10 OR OBJECTID IN (5)"]
+    assert archelp.build_oid_queries("OBJECTID", []) == []
+
+@pytest.mark.parametrize("max_terms", [1, 3, 1000])
+def test_build_oid_queries_limits_terms(max_terms):
+    oids = random.Random(1).sample(range(1, 500), 120)
+    queries = archelp.build_oid_queries("OBJECTID", oids, max_terms=max_terms)
+
+    num_ranges = len(archelp.compress_oids(oids))
+    assert len(queries) == -(-num_ranges // max_terms)
+    for query in queries:
+        assert query.count("BETWEEN") + query.count(",") + query.count("IN (") <= max_terms
+
+def test_build_oid_queries_select_every_oid(table):
+    oids = [1, 2, 3, 7, 8, 12, 20, 21, 22, 25]
+    selected = set()
+    for query in archelp.build_oid_queries("OBJECTID", oids, max_terms=2):
+        with arcpy.da.SearchCursor(table, ["OID@"], query) as cursor:
+            selected.update(row[0] for row in cursor)
+    assert selected == set(oids)
@@ -0,0 +1,97 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import utils.rest as rest
+
+class Handler(BaseHTTPRequestHandler):
+    """Serves JSON with the validators set on the server, answering 304 when they match"""
+
+    def do_GET(self) -> None:
+        server = self.server
+        server.requests.append(dict(self.headers))
+        if self.path.startswith("/error"):
+            return self._send(200, {"error": {"code": 400, "message": "Invalid query"}})
+
+        etag, last_modified = server.etag, server.last_modified
+        if (etag and self.headers.get("If-None-Match") == etag) or \
+                (last_modified and self.headers.get("If-Modified-Since") == last_modified):
+            return self._send(304, None)
+        return self._send(200, server.body)
+
+    def _send(self, status: int, body: dict) -> None:
+        content = json.dumps(body).encode("utf-8") if body is not None else b""
+        self.send_response(status)
+        if self.server.etag: self.send_header("ETag", self.server.etag)
+        if self.server.last_modified: self.send_header("Last-Modified", self.server.last_modified)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args) -> None:
+        pass
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.requests, server.body = [], {"features": [1, 2, 3]}
+    server.etag, server.last_modified = '"v1"', None
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+
+    rest._validators.clear()
+    not_modified = rest.stats["not_modified"]
+    yield server
+
+    server.shutdown()
+    server.server_close()
+    rest.close_session()
+    rest._validators.clear()
+    rest.stats["not_modified"] = not_modified
+
+def test_etag_revalidation(server):
+    url = f"{server.url}/query"
+    assert rest.get_json(url, {"f": "json"}) == {"features": [1, 2, 3]}
+    assert "If-None-Match" not in server.requests[0]
+
+    not_modified = rest.stats["not_modified"]
+    assert rest.get_json(url, {"f": "json"}) == {"features": [1, 2, 3]}
+    assert server.requests[1]["If-None-Match"] == '"v1"'
+    assert rest.stats["not_modified"] == not_modified + 1
+
+def test_changed_resource_is_downloaded(server):
+    url = f"{server.url}/query"
+    rest.get_json(url)
+
+    server.etag, server.body = '"v2"', {"features": [4]}
+    assert rest.get_json(url) == {"features": [4]}
+    assert rest._validators[url][0] == '"v2"'
+
+def test_last_modified_revalidation(server):
+    server.etag, server.last_modified = None, "Wed, 21 Oct 2026 07:28:00 GMT"
+    url = f"{server.url}/query"
+    rest.get_json(url)
+
+    assert rest.get_json(url) == {"features": [1, 2, 3]}
+    assert server.requests[1]["If-Modified-Since"] == server.last_modified
+
+def test_unconditional_requests(server):
+    url = f"{server.url}/query"
+    rest.get_json(url, conditional=False)
+    rest.get_json(url, conditional=False)
+
+    assert all("If-None-Match" not in headers for headers in server.requests)
+    assert url not in rest._validators
+
+def test_params_are_part_of_the_key(server):
+    rest.get_json(f"{server.url}/query", {"where": "1=1"})
+    rest.get_json(f"{server.url}/query", {"where": "2=2"})
+    assert "If-None-Match" not in server.requests[1]
+
+def test_error_body_raises(server):
+    with pytest.raises(rest.RestError, match="Invalid query"):
+        rest.get_json(f"{server.url}/error")
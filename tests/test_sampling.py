@@ -0,0 +1,103 @@
+import random
+from array import array
+from collections import Counter
+
+from utils.sampling import ProportionSample, Reservoir, WeightedReservoir
+
+def _batches(items: list, batch_size: int) -> list:
+    return [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+
+def test_reservoir_keeps_size_items():
+    reservoir = Reservoir(10, random.Random(1))
+    for batch in _batches(list(range(1000)), 64):
+        reservoir.add_batch(batch)
+
+    assert reservoir.count == 1000
+    assert len(reservoir.items) == 10
+    assert len(set(reservoir.items)) == 10
+    assert set(reservoir.items) <= set(range(1000))
+
+def test_reservoir_short_stream():
+    reservoir = Reservoir(10, random.Random(1))
+    reservoir.add_batch(array("q", [4, 5, 6]))
+    assert sorted(reservoir.items) == [4, 5, 6]
+
+    empty = Reservoir(0, random.Random(1))
+    empty.add_batch([1, 2, 3])
+    assert empty.items == [] and empty.count == 3
+
+def test_reservoir_is_reproducible():
+    samples = []
+    for i in range(2):
+        reservoir = Reservoir(5, random.Random(7))
+        for item in range(500):
+            reservoir.add(item)
+        samples.append(reservoir.items)
+    assert samples[0] == samples[1]
+
+def test_reservoir_is_uniform():
+    # Each of 20 items should be picked in about a quarter of 4000 samples of 5
+    rng = random.Random(3)
+    picks = Counter()
+    for trial in range(4000):
+        reservoir = Reservoir(5, rng)
+        for batch in _batches(list(range(20)), 3):
+            reservoir.add_batch(batch)
+        picks.update(reservoir.items)
+
+    assert set(picks) == set(range(20))
+    assert all(850 < count < 1150 for count in picks.values())
+
+def test_weighted_reservoir_skips_unusable_weights():
+    reservoir = WeightedReservoir(10, random.Random(1))
+    reservoir.add_batch(["a", "b", "c", "d"], [1.0, 0, None, -2])
+
+    assert reservoir.count == 4
+    assert reservoir.items == ["a"]
+
+def test_weighted_reservoir_prefers_heavy_items():
+    rng = random.Random(2)
+    picks = Counter()
+    for trial in range(2000):
+        reservoir = WeightedReservoir(1, rng)
+        reservoir.add_batch(["light", "heavy"], [1, 9])
+        picks.update(reservoir.items)
+
+    assert 1700 < picks["heavy"] < 1900
+
+def test_proportion_sample_size():
+    sample = ProportionSample(0.1, random.Random(4))
+    for batch in _batches(list(range(100000)), 1000):
+        sample.add_batch(batch)
+
+    assert sample.count == 100000
+    assert len(sample.items) == 10000
+    assert len(set(sample.items)) == 10000
+    assert sample.exact
+
+def test_proportion_sample_bounds_memory():
+    sample = ProportionSample(0.01, random.Random(5))
+    for batch in _batches(list(range(200000)), 5000):
+        sample.add_batch(batch)
+
+    # About twice the sample at most, instead of every item
+    assert len(sample._candidates) < 2 * 2000 + 1024
+    assert len(sample.items) == 2000
+
+def test_proportion_sample_edges():
+    none = ProportionSample(0, random.Random(1))
+    none.add_batch([1, 2, 3])
+    assert none.items == [] and none.count == 3 and none.exact
+
+    every = ProportionSample(1.5, random.Random(1))
+    every.add_batch([1, 2, 3])
+    assert sorted(every.items) == [1, 2, 3]
+
+def test_proportion_sample_reports_dropped_items():
+    sample = ProportionSample(0.5, random.Random(6))
+    sample.add_batch(list(range(100)))
+    assert sample.exact
+
+    # Drop a candidate that belongs in the sample, like an unlucky prune would
+    sample._dropped = sample._sample()[0][0]
+    assert not sample.exact
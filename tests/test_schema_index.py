@@ -0,0 +1,36 @@
+import arcpy
+
+from utils.schema_index import SchemaIndex, get_schema
+
+class JoinedLayer(object):
+    """Stands in for an arcpy.mp Layer with a join, whose fields are qualified"""
+
+    def __init__(self, data_source: str) -> None:
+        self.dataSource = data_source
+
+def _list_fields(monkeypatch, layer: JoinedLayer) -> None:
+    list_fields = arcpy.ListFields
+    joined = [arcpy.Field("tests_table.NAME", "String"), arcpy.Field("join.STATUS", "Integer", domain="Status")]
+    monkeypatch.setattr(arcpy, "ListFields", lambda path, *args: joined if path is layer else list_fields(path, *args))
+
+def test_get_schema_of_dataset(table):
+    schema = get_schema(table)
+    assert schema["oid_field"] == "OBJECTID"
+    assert [f["name"] for f in schema["fields"]] == ["OBJECTID", "NAME", "CODE"]
+
+def test_get_schema_of_joined_layer(table, monkeypatch, tmp_path):
+    layer = JoinedLayer(table)
+    _list_fields(monkeypatch, layer)
+    index = SchemaIndex(str(tmp_path / "schema.sqlite"))
+
+    for schema in [get_schema(layer, None, ["join.STATUS"]), get_schema(layer, index, ["join.STATUS"])]:
+        fields = {f["name"]: f for f in schema["fields"]}
+        assert fields["join.STATUS"]["domain"] == "Status"
+        assert schema["path"] == get_schema(table)["path"]
+
+def test_get_schema_of_layer_keeps_source_fields(table, monkeypatch):
+    layer = JoinedLayer(table)
+    _list_fields(monkeypatch, layer)
+
+    # The layer's fields are only listed when the data source is missing one
+    assert [f["name"] for f in get_schema(layer, None, ["CODE"])["fields"]] == ["OBJECTID", "NAME", "CODE"]
@@ -0,0 +1,73 @@
+import random
+from collections import Counter
+
+import pytest
+
+from utils.sketches import HyperLogLog, SpaceSaving, stable_hash
+
+def test_stable_hash():
+    assert stable_hash("abc") == stable_hash("abc")
+    assert stable_hash("abc") != stable_hash("abd")
+    assert 0 <= stable_hash("abc") < 2 ** 64
+
+@pytest.mark.parametrize("num_values", [10, 1000, 50000])
+def test_hyperloglog_count(num_values):
+    sketch = HyperLogLog(precision=12)
+    sketch.update(str(i) for i in range(num_values))
+    sketch.update(str(i) for i in range(num_values))
+
+    # Within 4 standard errors
+    assert abs(sketch.count() - num_values) <= 4 * sketch.relative_error * num_values + 1
+
+def test_hyperloglog_merge():
+    first, second, both = HyperLogLog(10), HyperLogLog(10), HyperLogLog(10)
+    first.update(str(i) for i in range(0, 6000))
+    second.update(str(i) for i in range(4000, 10000))
+    both.update(str(i) for i in range(10000))
+
+    first.merge(second)
+    assert first.count() == both.count()
+
+    with pytest.raises(ValueError):
+        first.merge(HyperLogLog(11))
+
+def _stream(seed: int) -> Counter:
+    # A few heavy values and a long tail of rare ones
+    rng = random.Random(seed)
+    counts = Counter({f"heavy{i}": 1000 * (i + 1) for i in range(5)})
+    counts.update(f"rare{rng.randrange(5000)}" for i in range(20000))
+    return counts
+
+def _check(summary: SpaceSaving, counts: Counter) -> None:
+    top = summary.top(5)
+    assert [value for value, count, error in top] == [f"heavy{i}" for i in range(4, -1, -1)]
+    for value, count, error in summary.top(summary.capacity):
+        assert count - error <= counts[value] <= count
+
+def test_space_saving_top_values():
+    counts = _stream(1)
+    summary = SpaceSaving(50)
+    items = list(counts.items())
+    for i in range(0, len(items), 500):
+        summary.update(dict(items[i:i + 500]))
+
+    assert len(summary.counts) == 50
+    _check(summary, counts)
+
+def test_space_saving_merge():
+    first_counts, second_counts = _stream(2), _stream(3)
+    first, second = SpaceSaving(50), SpaceSaving(50)
+    first.update(first_counts)
+    second.update(second_counts)
+    first.merge(second)
+
+    _check(first, first_counts + second_counts)
+
+def test_space_saving_min_count():
+    summary = SpaceSaving(2)
+    summary.update({"a": 5})
+    assert summary.min_count() == 0
+
+    summary.update({"b": 3, "c": 1})
+    assert summary.min_count() == 3
+    assert summary.top(2) == [("a", 5, 0), ("b", 3, 0)]
@@ -0,0 +1,66 @@
+import arcpy
+import pytest
+
+import utils.arcpy_tools as archelp
+
+def _rows(table: str, fields: list[str]) -> list[list]:
+    with arcpy.da.SearchCursor(table, ["OID@"] + fields) as cursor:
+        return [list(row) for row in cursor]
+
+@pytest.fixture
+def editors(monkeypatch):
+    """Workspaces edit sessions were started in"""
+
+    started = []
+    editor = arcpy.da.Editor
+    monkeypatch.setattr(arcpy.da, "Editor", lambda workspace: started.append(workspace) or editor(workspace))
+    return started
+
+def test_transform_only_writes_changed_rows(table, monkeypatch):
+    written = []
+    update_cursor = arcpy.da.UpdateCursor
+    monkeypatch.setattr(arcpy.da, "UpdateCursor", lambda *args, **kwargs: written.append(args[2]) or update_cursor(*args, **kwargs))
+
+    before = _rows(table, ["NAME", "CODE"])
+    stats = archelp.update_columns(table, ["CODE"], lambda batch: {"CODE": [c + 1 if c % 4 == 0 else c for c in batch["CODE"]]},
+                                   batch_size=4)
+
+    assert stats["scanned"] == 25 and stats["changed"] == 13
+    assert _rows(table, ["NAME", "CODE"]) == [[oid, name, code + 1 if code % 4 == 0 else code] for oid, name, code in before]
+    assert all("OBJECTID" in query for query in written)
+
+def test_unchanged_rows_are_not_written(table):
+    stats = archelp.update_columns(table, ["NAME", "CODE"], lambda batch: {"NAME": batch["NAME"]})
+    assert stats["changed"] == 0
+
+def test_mapping_by_key(table):
+    stats = archelp.update_columns(table, ["NAME"], mapping={0: ["zero"], 4: [None], 99: ["missing"]}, key_field="CODE")
+
+    rows = {code: name for oid, name, code in _rows(table, ["NAME", "CODE"])}
+    assert stats["changed"] == 2
+    assert rows[0] == "zero" and rows[4] is None and rows[2] == "name1"
+
+def test_query_limits_rows(table):
+    stats = archelp.update_columns(table, ["NAME"], lambda batch: {"NAME": ["x"] * len(batch)}, query="CODE >= 40")
+
+    names = [name for oid, name, code in _rows(table, ["NAME", "CODE"]) if code < 40]
+    assert stats["scanned"] == 5
+    assert "x" not in names
+
+def test_needs_transform_or_mapping(table):
+    with pytest.raises(ValueError):
+        archelp.update_columns(table, ["NAME"], mapping={0: ["zero"]})
+
+def test_edit_session_only_in_geodatabases(tmp_path, editors):
+    fields = [arcpy.Field("CODE", "Integer")]
+    memory_table = arcpy.add_table("memory/edits", fields, [[1]]).path
+    gdb_table = arcpy.add_table(str(tmp_path / "data.gdb" / "edits"), fields, [[1]]).path
+    shapefile = arcpy.add_table(str(tmp_path / "edits.shp"), fields, [[1]]).path
+
+    for path in [memory_table, gdb_table, shapefile]:
+        archelp.update_columns(path, ["CODE"], lambda batch: {"CODE": [2] * len(batch)})
+    archelp.update_columns(gdb_table, ["CODE"], lambda batch: {"CODE": [3] * len(batch)}, edit_session=False)
+
+    assert editors == [str(tmp_path / "data.gdb")]
+    assert _rows(shapefile, ["CODE"]) == [[1, 2]]
+    arcpy.reset()
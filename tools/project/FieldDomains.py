@@ -1,7 +1,11 @@
 import arcpy
+import json
+import sqlite3
 
 import utils.arcpy_tools as archelp
+from utils.cache import Cache, get_cache_path
 from utils.constants.ftconstants import TAB
+from utils.domains import REPORT_FIELDS, domain_report, get_domains
 from utils.tool import Tool
 
 class FieldDomains(Tool):
@@ -9,7 +13,8 @@ class FieldDomains(Tool):
     
     def __init__(self) -> None:
         """
-        Displays the domains for one or more fields in a feature.
+        Displays the domains for one or more fields in a feature, or reports
+        the domains of every field in a geodatabase to a table or JSON file.
 
         @self.project: arcpy project object
         @self.project_location: path to the project
@@ -38,51 +43,163 @@ class FieldDomains(Tool):
             displayName = "Input Features",
             name = "input_features",
             datatype = ["GPFeatureLayer", "DEFeatureClass"],
-            parameterType = "Required",
+            parameterType = "Optional",
             direction = "Input")
         
         fields = arcpy.Parameter(
             displayName = "Field(s)",
             name = "fields",
             datatype = "Field",
-            parameterType = "Required",
+            parameterType = "Optional",
             direction = "Input",
             multiValue = True)
         fields.parameterDependencies = [input_features.name]
 
-        return [input_features, fields]
+        bulk_report = arcpy.Parameter(
+            displayName = "Report Every Field in Geodatabase",
+            name = "bulk_report",
+            datatype = "Boolean",
+            parameterType = "Optional",
+            direction = "Input")
+        bulk_report.value = False
+
+        workspace = arcpy.Parameter(
+            displayName = "Geodatabase",
+            name = "workspace",
+            datatype = "DEWorkspace",
+            parameterType = "Optional",
+            direction = "Input",
+            enabled = False)
+
+        output_report = arcpy.Parameter(
+            displayName = "Output Report (table or .json file)",
+            name = "output_report",
+            datatype = ["DETable", "DEFile"],
+            parameterType = "Optional",
+            direction = "Output",
+            enabled = False)
+
+        return [input_features, fields, bulk_report, workspace, output_report]
+
+    def updateParameters(self, parameters: list[arcpy.Parameter]) -> None:
+        """
+        Modify the values and properties of parameters before internal
+        validation is performed. This method is called whenever a parameter
+        has been changed.
+        """
+
+        # Allows reference to parameters by name instead of index
+        local_params = archelp.get_params(parameters)
+
+        # The report covers a whole geodatabase instead of the selected fields
+        bulk_report = bool(local_params["bulk_report"].value)
+        local_params["input_features"].enabled = not bulk_report
+        local_params["fields"].enabled = not bulk_report
+        local_params["workspace"].enabled = bulk_report
+        local_params["output_report"].enabled = bulk_report
+
+        return
+
+    def updateMessages(self, parameters: list[arcpy.Parameter]) -> None:
+        """
+        Modify the messages created by internal validation for each tool
+        parameter.  This method is called after internal validation.
+        """
+
+        local_params = archelp.get_params(parameters)
+
+        # Parameters are optional so either mode can be used, require the ones the mode needs
+        if local_params["bulk_report"].value:
+            required = ["workspace", "output_report"]
+        else:
+            required = ["input_features", "fields"]
+
+        for name in required:
+            if local_params[name].value is None:
+                local_params[name].setErrorMessage(f"{local_params[name].displayName} is required.")
+
+        return
+
+    def _getCache(self) -> Cache:
+        """
+        Get the domain cache in the project home folder, or None when not
+        running in a project or the cache database can't be opened.
+        """
+
+        try:
+            return Cache(get_cache_path(self.project_location), "domains")
+        except (OSError, sqlite3.Error):
+            return None
+
+    def _writeReport(self, workspace: str, output_report: str) -> None:
+        """
+        Report the domain of every field in a geodatabase.
+
+        @workspace: Path of the geodatabase
+        @output_report: Table to write the report to, or a .json file
+        """
+
+        cache = self._getCache()
+        rows = domain_report(workspace, cache)
+
+        if output_report.lower().endswith(".json"):
+            report = {"workspace": workspace, "domains": get_domains(workspace, cache), "fields": rows}
+            with open(output_report, "w") as report_file:
+                json.dump(report, report_file, indent=2, default=str)
+        else:
+            # Range values can be numbers or dates, so every column except the count is text
+            columns, dtypes = {}, {}
+            for f in REPORT_FIELDS:
+                if f == "CODED_VALUES":
+                    columns[f], dtypes[f] = [row[f] for row in rows], "i4"
+                else:
+                    columns[f] = [("" if row[f] is None else str(row[f])) for row in rows]
+                    dtypes[f] = f"U{max(max(map(len, columns[f]), default=1), 1)}"
+            archelp.write_table(output_report, columns, dtypes)
+
+        num_domains = len({row["DOMAIN"] for row in rows if row["DOMAIN"]})
+        archelp.msg(f"Reported {len(rows)} fields in {len({row['DATASET'] for row in rows})} datasets "
+                    f"using {num_domains} domains to {output_report}")
+
+        return
 
     def execute(self, parameters:list[arcpy.Parameter], messages:list) -> None:
         """The source code of the tool."""
         
         # Allows reference to parameters by name instead of index
         self.params = archelp.get_params(parameters)
+
+        if self.params["bulk_report"].value:
+            self._writeReport(self.params["workspace"].valueAsText, self.params["output_report"].valueAsText)
+            return
       
-        # Get all domains objects and filtered field objects in input features
-        feature_properties = arcpy.Describe(self.params["input_features"].valueAsText)
-        domains = {d.name: d for d in arcpy.da.ListDomains(feature_properties.path)}
-        fields = [f for f in feature_properties.fields if f.name in self.params["fields"].valueAsText.split(";")]
+        # Get all domains and filtered fields in input features. The schema and domains are only
+        # read again when the workspace has changed since the last run.
+        field_names = self.params["fields"].valueAsText.split(";")
+        schema = self.getSchema(parameters[0].value, field_names)
+        domains = get_domains(schema["workspace"], self._getCache())
+        fields = [f for f in schema["fields"] if f["name"] in field_names]
 
         # Build output for each input field
         out_message = []
         num_fields = len(fields)
 
         for counter, field in enumerate(fields):
-            out_message.append(f"## FIELD: {field.aliasName} [{field.name}]\n")
+            out_message.append(f"## FIELD: {field['alias']} [{field['name']}]\n")
             
             # Build info about domain if there is one
-            if field.domain in domains:
-                domain = domains[field.domain]
+            if field["domain"] in domains:
+                domain = domains[field["domain"]]
 
-                out_message.append((f"{TAB}Domain: {domain.name}\n"
-                                    f"{TAB}Type: {domain.domainType}\n"
-                                    f"{TAB}Nullable: {field.isNullable}\n\n"))
+                out_message.append((f"{TAB}Domain: {domain['name']}\n"
+                                    f"{TAB}Type: {domain['type']}\n"
+                                    f"{TAB}Nullable: {field['nullable']}\n\n"))
                 
-                if domain.domainType == "CodedValue":
-                    out_message.append(archelp.print_dict(domain.codedValues, tab_num=1))
-                elif domain.domainType == "Range":
-                    out_message.append((f"{TAB}Min: {domain.range[0]}\n"
-                                        f"{TAB}Max: {domain.range[1]}\n"))
+                if domain["type"] == "CodedValue":
+                    out_message.append(archelp.print_dict(dict(domain["coded_values"]), tab_num=1))
+                elif domain["type"] == "Range":
+                    out_message.append((f"{TAB}Min: {domain['range'][0]}\n"
+                                        f"{TAB}Max: {domain['range'][1]}\n"))
             else:
                 out_message.append(f"{TAB}Domain: <None>\n")
 
@@ -1,7 +1,10 @@
 import arcpy
 import random
+from collections import defaultdict
 
 import utils.arcpy_tools as archelp
+from utils.progress import Progressor
+from utils.sampling import ProportionSample, Reservoir, WeightedReservoir
 from utils.tool import Tool
 
 class SelectRandomByCount(Tool):
@@ -9,7 +12,9 @@ class SelectRandomByCount(Tool):
     
     def __init__(self) -> None:
         """
-        Selects a random subset of rows in a given feature. 
+        Selects a random subset of rows in a given feature. The subset can be
+        stratified by a field (a count or proportion of each stratum) and
+        weighted by a numeric field.
         
         Credit for portions of this tool can be found at: https://gis.stackexchange.com/questions/78251/how-to-randomly-subset-x-of-selected-points
 
@@ -29,6 +34,9 @@ class SelectRandomByCount(Tool):
         
         # Parameters
         self.params = {}
+
+        # Stratum sample sizes
+        self.strata_methods = ["Count", "Proportion"]
         
         return
     
@@ -67,7 +75,75 @@ class SelectRandomByCount(Tool):
             parameterType = "Derived",
             direction = "Output")
 
-        return [p_input_feautres, p_subset_count, p_selected_feautres, p_selected_count]
+        p_seed = arcpy.Parameter(
+            displayName = "Random Seed",
+            name = "seed",
+            datatype = "GPLong",
+            parameterType = "Optional",
+            direction = "Input")
+
+        p_strata_field = arcpy.Parameter(
+            displayName = "Strata Field",
+            name = "strata_field",
+            datatype = "Field",
+            parameterType = "Optional",
+            direction = "Input")
+        p_strata_field.parameterDependencies = [p_input_feautres.name]
+
+        p_strata_method = arcpy.Parameter(
+            displayName = "Sample Per Stratum",
+            name = "strata_method",
+            datatype = "GPString",
+            parameterType = "Optional",
+            direction = "Input",
+            enabled = False)
+        p_strata_method.filter.type = "ValueList"
+        p_strata_method.filter.list = self.strata_methods
+        p_strata_method.value = self.strata_methods[0]
+
+        p_proportion = arcpy.Parameter(
+            displayName = "Stratum Proportion",
+            name = "proportion",
+            datatype = "GPDouble",
+            parameterType = "Optional",
+            direction = "Input",
+            enabled = False)
+        p_proportion.filter.type = "Range"
+        p_proportion.filter.list = [0.0, 1.0]
+
+        p_weight_field = arcpy.Parameter(
+            displayName = "Weight Field",
+            name = "weight_field",
+            datatype = "Field",
+            parameterType = "Optional",
+            direction = "Input")
+        p_weight_field.parameterDependencies = [p_input_feautres.name]
+        p_weight_field.filter.list = ["Short", "Long", "Single", "Double", "Integer", "SmallInteger"]
+
+        return [p_input_feautres, p_subset_count, p_selected_feautres, p_selected_count, p_seed,
+                p_strata_field, p_strata_method, p_proportion, p_weight_field]
+
+    def updateParameters(self, parameters: list[arcpy.Parameter]) -> None:
+        """
+        Modify the values and properties of parameters before internal
+        validation is performed. This method is called whenever a parameter
+        has been changed.
+        """
+
+        # Allows reference to parameters by name instead of index
+        local_params = archelp.get_params(parameters)
+
+        # The sample size of each stratum is either the subset count or a proportion of the stratum
+        by_proportion = bool(local_params["strata_field"].value) and local_params["strata_method"].valueAsText == "Proportion"
+        local_params["strata_method"].enabled = bool(local_params["strata_field"].value)
+        local_params["proportion"].enabled = by_proportion
+
+        # Subset count is required, so fill it while it isn't used
+        local_params["subset_count"].enabled = not by_proportion
+        if by_proportion and local_params["subset_count"].value is None:
+            local_params["subset_count"].value = 0
+
+        return
 
     def updateMessages(self, parameters: list[arcpy.Parameter]) -> None:
         """
@@ -75,40 +151,111 @@ class SelectRandomByCount(Tool):
         parameter.  This method is called after internal validation.
         """
 
-        if (parameters[0].value != None) and (parameters[1].value != None) and (int(parameters[1].value) > int(arcpy.management.GetCount(parameters[0].value)[0])):
-            parameters[1].setWarningMessage("Subset Count is greater than the number of rows in Input Features.")
+        local_params = archelp.get_params(parameters)
+        by_proportion = bool(local_params["strata_field"].value) and local_params["strata_method"].valueAsText == "Proportion"
+
+        if by_proportion and local_params["proportion"].value is None:
+            local_params["proportion"].setErrorMessage("Stratum Proportion is required when sampling a proportion of each stratum.")
+
+        if by_proportion and local_params["weight_field"].value:
+            local_params["weight_field"].setErrorMessage("Weighted samples need a count per stratum, not a proportion.")
 
         return
 
     def execute(self, parameters: list[arcpy.Parameter], messages: list) -> None:
         """The source code of the tool."""
 
-        # Get parameter and row count values
+        # Get parameter values
         input_features = parameters[0].valueAsText
         subset_count = int(parameters[1].valueAsText)
-        layer_count = int(arcpy.management.GetCount(input_features)[0])
-    
-        # Correct subset count if entered value is greater than the number of rows in the input features
-        if layer_count < subset_count:
-            subset_count = layer_count
+        seed = parameters[4].value
+        strata_field = parameters[5].valueAsText
+        by_proportion = bool(strata_field) and parameters[6].valueAsText == "Proportion"
+        proportion = parameters[7].value
+        weight_field = parameters[8].valueAsText
+
+        # Sample OIDs in a single pass, only the samples are kept in memory. If the subset count is
+        # greater than the number of rows in a stratum, every row in the stratum ends up in the sample.
+        rng = random.Random(seed)
+        samplers = self._sample(input_features, subset_count, rng,
+                                strata_field, proportion if by_proportion else None, weight_field)
+
+        # Proportion samples almost never drop a row that belonged in the sample. Strata where one
+        # was dropped are sampled again, now that their sizes are known.
+        if by_proportion:
+            sizes = {stratum: round(proportion * sampler.count) for stratum, sampler in samplers.items() if not sampler.exact}
+            if sizes:
+                samplers.update(self._sample(input_features, 0, rng, strata_field, sizes=sizes))
+        randOids = [oid for sampler in samplers.values() for oid in sampler.items]
+        if strata_field:
+            arcpy.AddMessage(f"Sampled {len(samplers)} strata of {strata_field}")
+        elif subset_count > sum(sampler.count for sampler in samplers.values()):
+            # Checked here instead of in updateMessages, the samplers count the rows for free
+            arcpy.AddWarning("Subset Count is greater than the number of rows in Input Features.")
         
-        # Select subset from the input features
+        # Select subset from the input features. Large subsets are compressed into OID ranges and
+        # selected in chunks, or set directly on the layer if it's a map layer.
         #
-        # Credit for this portion of the tool can be found at:
+        # Credit for the original version of this portion of the tool can be found at:
         #   https://gis.stackexchange.com/questions/78251/how-to-randomly-subset-x-of-selected-points
-        if subset_count != 0:
-            oids = [oid for oid, in arcpy.da.SearchCursor (input_features, "OID@")]
-            oidFldName = arcpy.Describe(input_features).OIDFieldName
-            path = arcpy.Describe(input_features).path
-            delimOidFld = arcpy.AddFieldDelimiters(path, oidFldName)
-            randOids = random.sample(oids, subset_count)
-            oidsStr = ", ".join(map(str, randOids))
-            sql = "{0} IN ({1})".format(delimOidFld, oidsStr)
-            selected_features = arcpy.SelectLayerByAttribute_management (input_features, "", sql)
+        selected_features = archelp.select_by_oids(input_features, randOids, parameters[0].value)
 
         # Update derived parameters and print message to geoprocessing window
         parameters[2].value = selected_features
-        parameters[3].value = int(arcpy.management.GetCount(parameters[2].value)[0])
+        parameters[3].value = len(randOids)
         arcpy.AddMessage(f"Number of selected features = {parameters[3].valueAsText}")
 
-        return
\ No newline at end of file
+        return
+
+    def _sample(self, input_features: str, subset_count: int, rng: random.Random, strata_field: str=None,
+                proportion: float=None, weight_field: str=None, sizes: dict=None) -> dict:
+        """
+        Samples the OIDs of the input features in one pass. Each stratum gets its own sampler,
+        rows without strata all go into a single stratum (None).
+
+        @input_features: Input features
+        @subset_count: Number of rows to sample from each stratum
+        @rng: Random number generator shared by every stratum
+        @strata_field: Field to stratify the sample by (optional)
+        @proportion: Proportion of each stratum to sample instead of the subset count (optional)
+        @weight_field: Field with the weight of each row (optional)
+        @sizes: Only sample these strata, each with a reservoir of the given size (optional)
+                (In the format {<stratum>: <sample size>})
+        @return: The sampler of each stratum (In the format {<stratum>: <sampler>})
+        """
+
+        if sizes is not None:
+            samplers = {stratum: Reservoir(size, rng) for stratum, size in sizes.items()}
+        elif weight_field:
+            samplers = defaultdict(lambda: WeightedReservoir(subset_count, rng))
+        elif proportion is not None:
+            samplers = defaultdict(lambda: ProportionSample(proportion, rng))
+        else:
+            samplers = defaultdict(lambda: Reservoir(subset_count, rng))
+
+        fields = ["OID@"] + [f for f in [strata_field, weight_field] if f]
+        with Progressor("Sampling rows...") as progressor:
+            for batch in archelp.get_batches(input_features, fields, array_type="array"):
+                oids = batch["OID@"]
+                weights = batch[weight_field] if weight_field else None
+
+                if not strata_field:
+                    groups = {None: (oids, weights)}
+                else:
+                    # Split the batch by stratum so each sampler still gets whole batches
+                    groups = defaultdict(lambda: ([], [] if weight_field else None))
+                    for i, stratum in enumerate(batch[strata_field]):
+                        group_oids, group_weights = groups[stratum]
+                        group_oids.append(oids[i])
+                        if weight_field: group_weights.append(weights[i])
+
+                for stratum, (group_oids, group_weights) in groups.items():
+                    if sizes is not None and stratum not in samplers:
+                        continue
+                    if weight_field:
+                        samplers[stratum].add_batch(group_oids, group_weights)
+                    else:
+                        samplers[stratum].add_batch(group_oids)
+                progressor.step(len(batch))
+
+        return samplers
\ No newline at end of file
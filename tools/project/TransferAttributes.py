@@ -0,0 +1,168 @@
+import arcpy
+
+import utils.arcpy_tools as archelp
+from utils.constants.ftconstants import JOIN_MEMORY_BUDGET, TAB
+from utils.tool import Tool
+
+class TransferAttributes(Tool):
+    """Tool Definition"""
+
+    def __init__(self) -> None:
+        """
+        Copies fields from a join table to the rows of a target with a matching key.
+
+        @self.project: arcpy project object
+        @self.project_location: path to the project
+        @self.project_name: name of the project
+        @self.default_gdb: path to the default gdb
+        @self.params: tool parameters (set with archelp.get_parameters())
+        """
+        # Initialize the parent class
+        super().__init__()
+
+        # Overrides
+        self.label = "Transfer Attributes"
+        self.description = "Copies fields from a join table to the rows of a target with a matching key."
+        self.category = "General"
+
+        # Parameters
+        self.params = {}
+
+        # AddField types of each Field.type
+        self.field_types = {"String": "TEXT", "Integer": "LONG", "SmallInteger": "SHORT", "BigInteger": "BIGINTEGER",
+                            "Double": "DOUBLE", "Single": "FLOAT", "Date": "DATE", "GUID": "GUID"}
+
+        # Field filter keywords of the types that can be transferred
+        self.filter_types = ["Text", "Short", "Long", "Single", "Double", "Date", "GUID"]
+
+        return
+
+    def getParameterInfo(self) -> list:
+        """Define parameter definitions."""
+
+        target = arcpy.Parameter(
+            displayName = "Target Features",
+            name = "target",
+            datatype = ["GPFeatureLayer", "GPTableView"],
+            parameterType = "Required",
+            direction = "Input")
+
+        target_key = arcpy.Parameter(
+            displayName = "Target Key Field",
+            name = "target_key",
+            datatype = "Field",
+            parameterType = "Required",
+            direction = "Input")
+        target_key.parameterDependencies = [target.name]
+
+        join_table = arcpy.Parameter(
+            displayName = "Join Table",
+            name = "join_table",
+            datatype = ["GPTableView", "GPFeatureLayer", "DETable"],
+            parameterType = "Required",
+            direction = "Input")
+
+        join_key = arcpy.Parameter(
+            displayName = "Join Key Field",
+            name = "join_key",
+            datatype = "Field",
+            parameterType = "Required",
+            direction = "Input")
+        join_key.parameterDependencies = [join_table.name]
+
+        fields = arcpy.Parameter(
+            displayName = "Fields to Transfer",
+            name = "fields",
+            datatype = "Field",
+            parameterType = "Required",
+            direction = "Input",
+            multiValue = True)
+        fields.parameterDependencies = [join_table.name]
+        fields.filter.list = self.filter_types
+
+        keep_unmatched = arcpy.Parameter(
+            displayName = "Keep Values of Unmatched Rows",
+            name = "keep_unmatched",
+            datatype = "Boolean",
+            parameterType = "Optional",
+            direction = "Input")
+        keep_unmatched.value = True
+
+        memory_budget = arcpy.Parameter(
+            displayName = "Memory Budget (MB)",
+            name = "memory_budget",
+            datatype = "GPLong",
+            parameterType = "Optional",
+            direction = "Input")
+        memory_budget.value = JOIN_MEMORY_BUDGET // (1024 * 1024)
+
+        updated_features = arcpy.Parameter(
+            displayName = "Updated Features",
+            name = "updated_features",
+            datatype = ["GPFeatureLayer", "GPTableView"],
+            parameterType = "Derived",
+            direction = "Output")
+        updated_features.parameterDependencies = [target.name]
+        updated_features.schema.clone = True
+
+        return [target, target_key, join_table, join_key, fields, keep_unmatched, memory_budget, updated_features]
+
+    def _addMissingFields(self, target: str, join_table: object, fields: list[str]) -> list[str]:
+        """
+        Add the transferred fields that the target doesn't have yet.
+
+        @target: Target features
+        @join_table: Join table (path, layer name or layer)
+        @fields: Fields to transfer
+        @return: Names of the fields that were added
+        """
+
+        target_fields = {f["name"].lower() for f in self.getSchema(self.params["target"].value, fields)["fields"]}
+        join_fields = {f["name"]: f for f in self.getSchema(join_table, fields)["fields"]}
+
+        added = []
+        for name in fields:
+            if name.lower() in target_fields:
+                continue
+            field = join_fields[name]
+            arcpy.management.AddField(target, name, self.field_types[field["type"]],
+                                      field_length = field["length"] if field["type"] == "String" else None,
+                                      field_alias = field["alias"])
+            added.append(name)
+        if added:
+            archelp.mark_schema_changed()
+        return added
+
+    def execute(self, parameters: list[arcpy.Parameter], messages: list) -> None:
+        """The source code of the tool."""
+
+        # Allows reference to parameters by name instead of index
+        self.params = archelp.get_params(parameters)
+        target = self.params["target"].valueAsText
+        join_table = self.params["join_table"].valueAsText
+        fields = self.params["fields"].valueAsText.split(";")
+        keep_unmatched = self.params["keep_unmatched"].value is not False
+        memory_budget = int(self.params["memory_budget"].value or JOIN_MEMORY_BUDGET // (1024 * 1024)) * 1024 * 1024
+
+        added = self._addMissingFields(target, self.params["join_table"].value, fields)
+        if added:
+            archelp.msg(f"Added fields: {', '.join(added)}")
+
+        # Index the join table once and stream the target once, writing only the rows that change
+        stats = archelp.join_fields(target, self.params["target_key"].valueAsText,
+                                    join_table, self.params["join_key"].valueAsText, fields,
+                                    keep_unmatched = keep_unmatched, memory_budget = memory_budget)
+
+        archelp.msg((f"Indexed {stats['indexed']} join keys"
+                     f"{' (spilled to disk)' if stats['spilled'] else ''}, {stats['duplicates']} duplicate keys ignored\n"
+                     f"{TAB}Target rows: {stats['scanned']}\n"
+                     f"{TAB}Matched: {stats['matched']}\n"
+                     f"{TAB}Unmatched: {stats['unmatched']}\n"
+                     f"{TAB}Changed: {stats['changed']}\n"
+                     f"{TAB}Time: {stats['seconds']:.1f} s ({stats['rows_per_second']:.0f} rows/s)"))
+        if stats["duplicates"]:
+            archelp.msg("The join table has duplicate keys, only the first row of each key was used", "warning")
+
+        self.params["updated_features"].value = self.params["target"].value
+
+        return
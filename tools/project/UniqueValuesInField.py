@@ -2,12 +2,307 @@
 # Relying on the index of multiple lists isn't great
 
 import arcpy
-from os import path as os_path
-from collections import defaultdict
+import io
+from os import cpu_count, path as os_path
+from collections import Counter, defaultdict
+from concurrent.futures import as_completed
+from itertools import islice
 
 import utils.arcpy_tools as archelp
+import utils.profiler as profiler
+from utils.constants.ftconstants import MESSAGE_PAGE_SIZE, SPILL_BLOCK_SIZE, UNIQUE_VALUES_MAX_LISTED, UNIQUE_VALUES_SPILL_LIMIT
+from utils.external_sort import SortedRuns
+from utils.progress import MessageBuffer, Progressor
+from utils.sketches import HyperLogLog, SpaceSaving
 from utils.tool import Tool
 
+# Labels used in place of values that would be invisible in the output
+SENTINEL_LABELS = {"": "<Empty String>", " ": "<Space>", "  ": "<Double Space>"}
+
+def _label(value) -> str:
+    """
+    Converts a field value to the label used in the tool output.
+
+    @value: Field value
+    @return: "<Null>", a sentinel label or the value as a string
+    """
+
+    if value is None:
+        return "<Null>"
+    value = str(value)
+    return SENTINEL_LABELS.get(value, value)
+
+def _count_column(column) -> list[tuple]:
+    """
+    Counts the distinct values in a column from archelp.read_batches().
+
+    @column: A numpy array, array.array or list of values
+    @return: Pairs of (<value>, <count>) for each distinct value
+    """
+
+    if archelp.np is not None and isinstance(column, archelp.np.ndarray):
+        values, counts = archelp.np.unique(column, return_counts=True)
+        return zip(values.tolist(), counts.tolist())
+    return Counter(column).items()
+
+class UniqueValueCounter(object):
+    """
+    Counts the unique values of one or more fields a batch of columns at a time. Values are
+    counted per batch first, so labels and lengths are only built once for each distinct value.
+    A field with more than spill_limit distinct values in memory has its counts spilled to
+    sorted runs on disk, so memory stays bounded no matter the cardinality. The runs are read
+    back in blocks sized so that merging them holds about spill_limit entries.
+
+    @self.fields: Fields to count
+    @self.row_dicts: One dictionary per field of the counts in memory (In the format {<label>: <count>})
+    @self.spills: SortedRuns of the counts spilled for each field, or None if it never spilled
+    @self.spill_limit: Number of distinct values kept in memory per field (None keeps every value)
+    @self.len_longest_values: Length of the longest label in each field
+    @self.num_rows: Number of rows counted
+    """
+
+    def __init__(self, fields: list[str], spill_limit: int=None) -> None:
+        self.fields = list(fields)
+        self.row_dicts = [defaultdict(int) for f in self.fields]
+        self.spills = [None for f in self.fields]
+        self.spill_limit = spill_limit
+        self.len_longest_values = [0 for f in self.fields]
+        self.num_rows = 0
+
+    @property
+    def spilled(self) -> bool:
+        """True if any field's counts were spilled to disk"""
+        return any(self.spills)
+
+    def _newRuns(self) -> SortedRuns:
+        """Sorted runs with blocks sized from the spill limit"""
+        return SortedRuns(block_size=SortedRuns.block_for(self.spill_limit or SPILL_BLOCK_SIZE))
+
+    def _spill_large(self, i: int) -> None:
+        """
+        Spill a field's counts to disk if it has too many distinct values in memory.
+
+        @i: Index of the field
+        """
+
+        if self.spill_limit and len(self.row_dicts[i]) > self.spill_limit:
+            if self.spills[i] is None:
+                self.spills[i] = self._newRuns()
+            self.spills[i].spill(self.row_dicts[i])
+            self.row_dicts[i] = defaultdict(int)
+
+    def update(self, batch: archelp.Batch) -> None:
+        """
+        Add the values in a batch to the counts.
+
+        @batch: Batch with a column for each field
+        """
+
+        for i, field in enumerate(self.fields):
+            row_dict = self.row_dicts[i]
+            longest = self.len_longest_values[i]
+            for value, count in _count_column(batch[field]):
+                f_val = _label(value)
+                row_dict[f_val] += count
+                if len(f_val) > longest: longest = len(f_val)
+            self.len_longest_values[i] = longest
+            self._spill_large(i)
+
+        self.num_rows += len(batch)
+
+    def merge(self, other: "UniqueValueCounter") -> None:
+        """
+        Add the counts from another counter of the same fields. Spilled counts are taken over
+        from the other counter.
+
+        @other: Counter to merge into this one
+        """
+
+        for i in range(len(self.fields)):
+            row_dict = self.row_dicts[i]
+            for f_val, count in other.row_dicts[i].items():
+                row_dict[f_val] += count
+            self.len_longest_values[i] = max(self.len_longest_values[i], other.len_longest_values[i])
+
+            if other.spills[i] is not None:
+                if self.spills[i] is None:
+                    self.spills[i] = self._newRuns()
+                self.spills[i].extend(other.spills[i])
+            self._spill_large(i)
+
+        self.num_rows += other.num_rows
+
+    def sorted_items(self, i: int):
+        """
+        @i: Index of the field
+        @return: Iterator of (<label>, <count>) sorted by label. Spilled counts are merged from
+                 disk as the iterator is read
+        """
+
+        if self.spills[i] is None:
+            return iter(sorted(self.row_dicts[i].items()))
+        return self.spills[i].merge(self.row_dicts[i])
+
+    def close(self) -> None:
+        """Remove any spilled counts from disk"""
+
+        for spill in self.spills:
+            if spill is not None:
+                spill.close()
+
+class FieldSketch(object):
+    """
+    Fixed-memory summary of the values in a single field. Sentinel labels are always counted
+    exactly, everything else goes into a distinct count estimate and a top values summary.
+
+    @self.distinct: HyperLogLog estimate of the number of distinct labels
+    @self.top_values: Space-Saving summary of the most frequent labels
+    @self.sentinels: Exact counts of sentinel labels (In the format {<label>: <count>})
+    """
+
+    def __init__(self, sketch_size: int) -> None:
+        self.distinct = HyperLogLog()
+        self.top_values = SpaceSaving(sketch_size)
+        self.sentinels = defaultdict(int)
+
+    def update(self, labels: dict) -> None:
+        """
+        @labels: Counts of labels (In the format {<label>: <count>})
+        """
+
+        values = {}
+        for f_val, count in labels.items():
+            self.distinct.add(f_val)
+            if f_val == "<Null>" or f_val in SENTINEL_LABELS.values():
+                self.sentinels[f_val] += count
+            else:
+                values[f_val] = count
+        self.top_values.update(values)
+
+    def merge(self, other: "FieldSketch") -> None:
+        """
+        @other: Sketch of the same field to combine with this one
+        """
+
+        self.distinct.merge(other.distinct)
+        self.top_values.merge(other.top_values)
+        for f_val, count in other.sentinels.items():
+            self.sentinels[f_val] += count
+
+class ApproximateValueCounter(UniqueValueCounter):
+    """
+    Counts unique values exactly until a field has more than sketch_size distinct values, then
+    switches that field to a FieldSketch so memory stays bounded no matter the cardinality.
+
+    @self.sketch_size: Number of distinct values kept before switching, and the number of
+                       values tracked by each sketch
+    @self.sketches: FieldSketch for each field, or None while a field is still counted exactly
+    """
+
+    def __init__(self, fields: list[str], sketch_size: int) -> None:
+        super().__init__(fields)
+        self.sketch_size = sketch_size
+        self.sketches = [None for f in self.fields]
+
+    def _add(self, i: int, labels: dict) -> None:
+        """
+        Add counts of labels to a field, switching it to a sketch if it gets too large.
+
+        @i: Index of the field
+        @labels: Counts of labels (In the format {<label>: <count>})
+        """
+
+        if labels:
+            self.len_longest_values[i] = max(self.len_longest_values[i], max(map(len, labels)))
+
+        if self.sketches[i] is not None:
+            self.sketches[i].update(labels)
+            return
+
+        row_dict = self.row_dicts[i]
+        for f_val, count in labels.items():
+            row_dict[f_val] += count
+        if len(row_dict) > self.sketch_size:
+            self.sketches[i] = FieldSketch(self.sketch_size)
+            self.sketches[i].update(row_dict)
+            self.row_dicts[i] = defaultdict(int)
+
+    def update(self, batch: archelp.Batch) -> None:
+        """
+        Add the values in a batch to the counts.
+
+        @batch: Batch with a column for each field
+        """
+
+        for i, field in enumerate(self.fields):
+            labels = defaultdict(int)
+            for value, count in _count_column(batch[field]):
+                labels[_label(value)] += count
+            self._add(i, labels)
+
+        self.num_rows += len(batch)
+
+    def merge(self, other: "ApproximateValueCounter") -> None:
+        """
+        Add the counts from another counter of the same fields.
+
+        @other: Counter to merge into this one
+        """
+
+        for i in range(len(self.fields)):
+            self._add(i, other.row_dicts[i])
+            if other.sketches[i] is not None:
+                if self.sketches[i] is None:
+                    self.sketches[i] = FieldSketch(self.sketch_size)
+                    self.sketches[i].update(self.row_dicts[i])
+                    self.row_dicts[i] = defaultdict(int)
+                self.sketches[i].merge(other.sketches[i])
+                self.len_longest_values[i] = max(self.len_longest_values[i], other.len_longest_values[i])
+
+        self.num_rows += other.num_rows
+
+    def top_dicts(self, num_values: int) -> list[dict]:
+        """
+        Exact counts for fields that were never sketched, and the sentinel and top value
+        estimates for fields that were.
+
+        @num_values: Number of top values to include for sketched fields
+        @return: One dictionary per field (In the format {<label>: <count>})
+        """
+
+        row_dicts = []
+        for row_dict, sketch in zip(self.row_dicts, self.sketches):
+            if sketch is not None:
+                row_dict = dict(sketch.sentinels)
+                row_dict.update((f_val, count) for f_val, count, error in sketch.top_values.top(num_values))
+            row_dicts.append(row_dict)
+
+        return row_dicts
+
+def _count_partition(input_features: str, input_fields: list[str], where_clause: str, sketch_size: int=None,
+                     spill_limit: int=None) -> UniqueValueCounter:
+    """
+    Counts the unique values in one partition of the input. Runs in a worker process.
+
+    @input_features: Path to the input features
+    @input_fields: Fields to count
+    @where_clause: Query that selects the partition
+    @sketch_size: Count approximately with this sketch size (optional)
+    @spill_limit: Distinct values kept in memory per field when counting exactly (optional)
+    @return: Counter for the partition
+    """
+
+    counter = ApproximateValueCounter(input_fields, sketch_size) if sketch_size else UniqueValueCounter(input_fields, spill_limit)
+    try:
+        for batch in archelp.get_batches(input_features, input_fields, where_clause):
+            counter.update(batch)
+    except BaseException:
+        # Nothing will take over the runs this partition spilled
+        counter.close()
+        raise
+
+    return counter
+
 class UniqueValuesInField(Tool):
     """Tool Definition"""
     
@@ -34,6 +329,12 @@ class UniqueValuesInField(Tool):
         
         # Acceptable field types
         self.field_types = ["Short","Long","Single","Double","Text","Date","Integer","SmallInteger","String"]
+
+        # Number of most frequent values listed for fields that are counted approximately
+        self.top_values = 25
+
+        # Number of distinct values per field counted in memory before counts are spilled to disk
+        self.spill_limit = UNIQUE_VALUES_SPILL_LIMIT
         
         return
     
@@ -81,7 +382,46 @@ class UniqueValuesInField(Tool):
             direction = "Output",
             enabled = False)
 
-        return [input_features, fields, include_counts, output_as_table, output_table]
+        workers = arcpy.Parameter(
+            displayName = "Parallel Workers",
+            name = "workers",
+            datatype = "GPLong",
+            parameterType = "Optional",
+            direction = "Input")
+        workers.filter.type = "Range"
+        workers.filter.list = [1, cpu_count() or 1]
+        workers.value = 1
+
+        approximate = arcpy.Parameter(
+            displayName = "Approximate Counts",
+            name = "approximate",
+            datatype = "Boolean",
+            parameterType = "Optional",
+            direction = "Input")
+        approximate.value = False
+
+        sketch_size = arcpy.Parameter(
+            displayName = "Sketch Size",
+            name = "sketch_size",
+            datatype = "GPLong",
+            parameterType = "Optional",
+            direction = "Input",
+            enabled = False)
+        sketch_size.filter.type = "Range"
+        sketch_size.filter.list = [self.top_values, 10000000]
+        sketch_size.value = 10000
+
+        max_values = arcpy.Parameter(
+            displayName = "Maximum Values Listed (0 lists every value)",
+            name = "max_values",
+            datatype = "GPLong",
+            parameterType = "Optional",
+            direction = "Input")
+        max_values.filter.type = "Range"
+        max_values.filter.list = [0, 100000000]
+        max_values.value = UNIQUE_VALUES_MAX_LISTED
+
+        return [input_features, fields, include_counts, output_as_table, output_table, workers, approximate, sketch_size, max_values]
     
     def updateParameters(self, parameters: list[arcpy.Parameter]) -> None:
         """
@@ -93,14 +433,6 @@ class UniqueValuesInField(Tool):
         # Allows reference to parameters by name instead of index
         local_params = archelp.get_params(parameters)
 
-        # If multiple fields have been entered, disable checkbox and output path. Else, enable checkbox
-        if local_params["fields"].altered and len(local_params["fields"].valueAsText.split(";")) > 1:
-            local_params["output_as_table"].enabled = False
-            local_params["output_as_table"].value = False
-            local_params["output_table"].enabled = False
-        else:
-            local_params["output_as_table"].enabled = True
-        
         # If checkbox to output as table is enabled and has been checked, enable and autofill path
         if not parameters[3].value:
             parameters[4].enabled = False
@@ -115,72 +447,175 @@ class UniqueValuesInField(Tool):
             else:
                 parameters[4].value = default_path
 
+        # Sketch size is only used when counting approximately
+        local_params["sketch_size"].enabled = bool(local_params["approximate"].value)
+
+        # Tables always get every value
+        local_params["max_values"].enabled = not parameters[3].value
+
         return
     
-    def _outputAsTable(self, row_dicts, output_table, input_fields, len_longest_values, count_cb) -> None:
+    def _countParallel(self, input_features: str, input_fields: list[str], workers: int, sketch_size: int=None) -> UniqueValueCounter:
         """
-        Generate a new table with the output of the tool.
+        Count unique values by splitting the input into OID ranges and counting each range in a
+        separate process.
+
+        @input_features: Input features
+        @input_fields: Fields to count
+        @workers: Number of worker processes
+        @sketch_size: Count approximately with this sketch size (optional)
+        @return: Merged counter, or None if the input can't be split
         """
 
-        # Create table with appropriate fields
+        # Workers open the data by path, so layer selections can't be passed along. Definition
+        # queries are added to each partition's where clause.
+        desc = arcpy.Describe(input_features)
+        if getattr(desc, "FIDSet", ""):
+            archelp.msg("Input features have a selection, counting with a single worker.", "warning")
+            return None
+        layer_query = getattr(desc, "whereClause", "")
+
+        # Use more partitions than workers so uneven OID ranges still balance out
+        where_clauses = archelp.get_oid_ranges(input_features, workers * 4)
+        if layer_query:
+            where_clauses = [f"({layer_query}) AND ({clause})" for clause in where_clauses]
+
+        counter = ApproximateValueCounter(input_fields, sketch_size) if sketch_size else UniqueValueCounter(input_fields, self.spill_limit)
+        progressor = Progressor(f"Reading input rows with {workers} workers...", len(where_clauses))
+        with archelp.get_process_pool(workers) as pool, progressor:
+            futures = [pool.submit(_count_partition, desc.catalogPath, input_fields, clause, sketch_size, self.spill_limit)
+                       for clause in where_clauses]
+            try:
+                for future in as_completed(futures):
+                    counter.merge(future.result())
+                    progressor.step()
+            except BaseException:
+                # Remove the spilled runs of every partition, merged or not
+                pool.shutdown(wait=True, cancel_futures=True)
+                for future in futures:
+                    if not future.cancelled() and future.exception() is None:
+                        future.result().close()
+                counter.close()
+                raise
+
+        return counter
+
+    def _outputSketchSummary(self, counter: ApproximateValueCounter, input_fields: list[str]) -> None:
+        """
+        Print the distinct count estimate and top values with error bounds for each field that
+        was counted approximately.
+        """
+
+        message_buffer = MessageBuffer()
+        for field, sketch in zip(input_fields, counter.sketches):
+            if sketch is None: continue
+
+            top_values = sketch.top_values.top(self.top_values)
+            key_padding = max([len(f_val) for f_val, count, error in top_values] + [0])
+            out_message = [f"## FIELD: {field} (approximate)\n",
+                           f"     Distinct values: ~{sketch.distinct.count()} (+/- {sketch.distinct.relative_error:.1%})\n"]
+            for f_val, count in sorted(sketch.sentinels.items()):
+                out_message.append(f"     {f_val:<{key_padding}}: {count}\n")
+            out_message.append(f"\n     Top {len(top_values)} values (count, max overcount):\n")
+            for f_val, count, error in top_values:
+                out_message.append(f"     {f_val:<{key_padding}}: {count: <10} +{error}\n")
+            message_buffer.add("".join(out_message))
+
+        message_buffer.flush()
+
+        return
+
+    def _outputAsTable(self, field_items, output_table, input_fields, len_longest_values, count_cb, spilled=False) -> None:
+        """
+        Generate a new table with the output of the tool. A single field is written as
+        <field>_VALUES and <field>_COUNT columns, multiple fields are written in long format with
+        a FIELD_NAME column. Spilled counts are streamed into the table as they are merged, so
+        they never have to be in memory at once.
+        """
+
+        # Build output rows sorted by value
         arcpy.SetProgressor("default", "Creating output table...")
-        t_path, t_name = os_path.split(output_table)
-        arcpy.management.CreateTable(t_path, t_name)
-        arcpy.management.AddField(output_table, f"{input_fields[0]}_VALUES", "TEXT", field_length = len_longest_values[0])
-        if count_cb: arcpy.management.AddField(output_table, f"{input_fields[0]}_COUNT", "LONG")
-
-        # Set progressor for populating table step
-        arcpy.SetProgressor("step", "Populating output table...")
-        num_rows = len(row_dicts[0])
-        row_pos = 0
-
-        # Set list of fields for insert cursor, removing count field if necessary
-        cursor_fields = [f"{input_fields[0]}_VALUES", f"{input_fields[0]}_COUNT"]
-        if not count_cb: cursor_fields[:] = [f"{input_fields[0]}_VALUES"]
-
-        # Iterate through rows dicts, adding a row to new table for each key in dictionary and updating progressor
-        with arcpy.da.InsertCursor(output_table, cursor_fields) as cursor:
-            for row in sorted(row_dicts[0].items()): 
-                row_pos += 1
-                arcpy.SetProgressorPosition(int((row_pos / num_rows) * 100))
-                
-                if not count_cb: row = (row[0],)
-                cursor.insertRow(row)
+        if len(input_fields) == 1:
+            rows = ((f_val, count) for f_val, count in field_items[0])
+            value_field, count_field = f"{input_fields[0]}_VALUES", f"{input_fields[0]}_COUNT"
+            dtypes = {value_field: f"U{max(len_longest_values[0], 1)}"}
+        else:
+            rows = ((field, f_val, count) for field, items in zip(input_fields, field_items) for f_val, count in items)
+            value_field, count_field = "VALUE", "COUNT"
+            dtypes = {"FIELD_NAME": f"U{max(map(len, input_fields))}", value_field: f"U{max(max(len_longest_values), 1)}"}
+
+        # Add the count column if necessary
+        if count_cb:
+            dtypes[count_field] = "i4"
+        else:
+            rows = (row[:-1] for row in rows)
+
+        if spilled:
+            archelp.create_table(output_table, dtypes)
+            archelp.insert_rows(output_table, list(dtypes), rows)
+        else:
+            # Write the whole table at once
+            rows = list(rows)
+            columns = {field: [row[i] for row in rows] for i, field in enumerate(dtypes)}
+            archelp.write_table(output_table, columns, dtypes)
         
         return
     
-    def _outputAsMessage(self, row_dicts, num_fields, parameters, len_longest_values, count_cb, messages) -> None:
+    def _formatField(self, field: str, attributes: dict, items, len_longest_value: int, count_cb: bool, max_values: int=None):
         """
-        Print messages to the geoprocssing window with the output of the tool.
+        Format the output message of a single field, five values to a line.
+
+        @field: Field name
+        @attributes: Field schema from getSchema()
+        @items: Iterator of (<label>, <count>) sorted by label
+        @len_longest_value: Length of the longest label
+        @count_cb: Include counts
+        @max_values: Maximum number of values listed, the rest are summarized (optional)
+        @yield: Each line of the message
+        """
+
+        yield f"## FIELD: {field}"
+        yield f"     Type: {attributes['type']}"
+        yield f"     Domain: {attributes['domain']}"
+        yield ""
+
+        items = iter(items)
+        listed = islice(items, max_values) if max_values else items
+        yield from archelp.format_entries(listed, len_longest_value, per_line=5, tab_padding="     ",
+                                          values=bool(count_cb), value_width=10)
+
+        # Values past the limit are only counted
+        remaining = sum(1 for item in items)
+        if remaining:
+            yield f"     ... {remaining} more"
+
+    def _outputAsMessage(self, field_items, num_fields, parameters, len_longest_values, count_cb, messages, max_values=None) -> None:
+        """
+        Print messages to the geoprocssing window with the output of the tool. Lines are written
+        to a page as they are formatted and each page is sent once it reaches MESSAGE_PAGE_SIZE
+        characters, so large fields never build one huge message.
         """
 
         # Collect the list of fields from input and the attributes of those fields
         input_fields = parameters[1].valueAsText.split(";")
-        field_attributes = dict([(f.name, f) for f in arcpy.ListFields(parameters[0].valueAsText) if f.name in input_fields])
+        field_attributes = dict([(f["name"], f) for f in self.getSchema(parameters[0].value, input_fields)["fields"] if f["name"] in input_fields])
+        send = messages.addMessage if messages is not None else archelp.msg
 
-        # Generate and then print an output for each dictionary in list
-        # Might be good to add the field type to each output here
+        # Generate and then print an output for each field, at least one message per field
         arcpy.SetProgressor("default", "Generating output message(s)...")
         for i in range(num_fields):
-            num_f = 0
-            out_message = f"## FIELD: {input_fields[i]}\n     Type: {field_attributes[input_fields[i]].type}\n     Domain: {field_attributes[input_fields[i]].domain}\n\n     "
-            
-            # Create a new line of five values and append it to the message
-            for values in sorted(row_dicts[i].items()):
-                out_message = out_message + f"{values[0]}{' ' * (len_longest_values[i] - len(str(values[0])))}"
-                if count_cb:
-                    out_message = out_message + f": {values[1]: <10}"
-                else:
-                    out_message = out_message + "    "
-                
-                num_f += 1
-                if num_f == 5:
-                    num_f = 0
-                    out_message = out_message + "\n     "
-                
-            if num_f < 5 and i < (num_fields - 1): out_message = out_message + "\n"
-            out_message = out_message + "\n"
-            messages.addMessage(out_message)
+            page = io.StringIO()
+            for line in self._formatField(input_fields[i], field_attributes[input_fields[i]], field_items[i],
+                                          len_longest_values[i], count_cb, max_values):
+                page.write(line)
+                page.write("\n")
+                if page.tell() >= MESSAGE_PAGE_SIZE:
+                    send(page.getvalue())
+                    page = io.StringIO()
+
+            if i < num_fields - 1: page.write("\n")
+            if page.tell():
+                send(page.getvalue())
 
         return
 
@@ -195,41 +630,46 @@ class UniqueValuesInField(Tool):
         count_cb = parameters[2].value
         output_cb = parameters[3].value
         output_table = parameters[4].valueAsText
+        workers = int(parameters[5].value or 1)
+        sketch_size = int(parameters[7].value or 10000) if parameters[6].value else None
+        max_values = int(parameters[8].value) if parameters[8].value is not None else UNIQUE_VALUES_MAX_LISTED
 
-        # Define variables to hold number of fields, length of longest field value, and list of dictionaries with
-        # each unique value in each of the fields
+        # Count the unique values in each field in batches of columns and store length of longest field value
         num_fields = len(input_fields)
-        len_longest_values = [0 for i in range(num_fields)]
-        row_dicts = [defaultdict(int) for i in range(num_fields)]
-
-        # Populate the list of dictionaries with unique values in each field and store length of longest field
-        arcpy.SetProgressor("step", "Reading input rows...")
-        num_rows = int(arcpy.management.GetCount(input_features)[0])
-        row_pos = 0
-        with arcpy.da.SearchCursor(input_features, input_fields) as cursor:
-            for row in cursor:
-                row_pos += 1
-                arcpy.SetProgressorPosition(int((row_pos / num_rows) * 100))
-                for i in range(num_fields):
-                    if row[i] == None:
-                        f_val = "<Null>"
-                    elif str(row[i]) == "":
-                        f_val = "<Empty String>"
-                    elif str(row[i]) == " ":
-                        f_val = "<Space>"
-                    elif str(row[i]) == "  ":
-                        f_val = "<Double Space>"
-                    else:
-                        f_val = str(row[i])
-
-                    row_dicts[i][f_val] += 1
-                    if len(f_val) > len_longest_values[i]: len_longest_values[i] = len(f_val)
-
-        # Generate different outputs depending on which option user selected
-        if output_cb:
-            self._outputAsTable(row_dicts, output_table, input_fields, len_longest_values, count_cb)
-        elif not output_cb:
-            self._outputAsMessage(row_dicts, num_fields, parameters, len_longest_values, count_cb, messages)
+        counter = None
+        if workers > 1:
+            counter = self._countParallel(input_features, input_fields, workers, sketch_size)
+
+        if counter is None:
+            counter = ApproximateValueCounter(input_fields, sketch_size) if sketch_size else UniqueValueCounter(input_fields, self.spill_limit)
+            num_rows = int(arcpy.management.GetCount(input_features)[0])
+            with Progressor("Reading input rows...", num_rows) as progressor:
+                for batch in archelp.get_batches(input_features, input_fields):
+                    counter.update(batch)
+                    progressor.step(len(batch))
+
+        len_longest_values = counter.len_longest_values
+
+        try:
+            # Values of each field sorted by label, merged from disk for fields that were spilled
+            field_items = [counter.sorted_items(i) for i in range(num_fields)]
+            if counter.spilled:
+                archelp.msg("Too many unique values to sort in memory, merging counts from disk.")
+
+            # Fields with too many distinct values to count exactly only output their top values
+            if sketch_size:
+                self._outputSketchSummary(counter, input_fields)
+                field_items = [iter(sorted(row_dict.items())) for row_dict in counter.top_dicts(self.top_values)]
+
+            # Generate different outputs depending on which option user selected
+            if output_cb:
+                with profiler.span("output table"):
+                    self._outputAsTable(field_items, output_table, input_fields, len_longest_values, count_cb, counter.spilled)
+            elif not output_cb:
+                with profiler.span("output messages"):
+                    self._outputAsMessage(field_items, num_fields, parameters, len_longest_values, count_cb, messages, max_values)
+        finally:
+            counter.close()
 
         # Allows reference to parameters by name instead of index
         self.params = archelp.get_params(parameters)
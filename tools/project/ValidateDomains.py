@@ -0,0 +1,154 @@
+import arcpy
+import sqlite3
+
+import utils.arcpy_tools as archelp
+from utils.cache import Cache, get_cache_path
+from utils.constants.ftconstants import TAB
+from utils.domains import DomainValidator, get_domains
+from utils.progress import Progressor
+from utils.tool import Tool
+
+class ValidateDomains(Tool):
+    """Tool Definition"""
+
+    def __init__(self) -> None:
+        """
+        Finds the rows with values that aren't allowed by their field's domain.
+
+        @self.project: arcpy project object
+        @self.project_location: path to the project
+        @self.project_name: name of the project
+        @self.default_gdb: path to the default gdb
+        @self.params: tool parameters (set with archelp.get_parameters())
+        """
+        # Initialize the parent class
+        super().__init__()
+
+        # Overrides
+        self.label = "Validate Domains"
+        self.description = "Finds the rows with values that aren't allowed by their field's domain."
+        self.category = "General"
+
+        # Parameters
+        self.params = {}
+
+        return
+
+    def getParameterInfo(self) -> list:
+        """Define parameter definitions."""
+
+        input_features = arcpy.Parameter(
+            displayName = "Input Features",
+            name = "input_features",
+            datatype = ["GPFeatureLayer", "GPTableView"],
+            parameterType = "Required",
+            direction = "Input")
+
+        fields = arcpy.Parameter(
+            displayName = "Field(s) (all fields with a domain if empty)",
+            name = "fields",
+            datatype = "Field",
+            parameterType = "Optional",
+            direction = "Input",
+            multiValue = True)
+        fields.parameterDependencies = [input_features.name]
+
+        select_violations = arcpy.Parameter(
+            displayName = "Select Rows With Violations",
+            name = "select_violations",
+            datatype = "Boolean",
+            parameterType = "Optional",
+            direction = "Input")
+        select_violations.value = False
+
+        max_oids = arcpy.Parameter(
+            displayName = "Object IDs Listed Per Field",
+            name = "max_oids",
+            datatype = "GPLong",
+            parameterType = "Optional",
+            direction = "Input")
+        max_oids.value = 100
+
+        selected_features = arcpy.Parameter(
+            displayName = "Features With Selection",
+            name = "selected_features",
+            datatype = ["GPFeatureLayer", "GPTableView"],
+            parameterType = "Derived",
+            direction = "Output")
+        selected_features.parameterDependencies = [input_features.name]
+        selected_features.schema.clone = True
+
+        violation_count = arcpy.Parameter(
+            displayName = "Violation Count",
+            name = "violation_count",
+            datatype = "GPLong",
+            parameterType = "Derived",
+            direction = "Output")
+
+        return [input_features, fields, select_violations, max_oids, selected_features, violation_count]
+
+    def _getCache(self) -> Cache:
+        """
+        Get the domain cache in the project home folder, or None when not
+        running in a project or the cache database can't be opened.
+        """
+
+        try:
+            return Cache(get_cache_path(self.project_location), "domains")
+        except (OSError, sqlite3.Error):
+            return None
+
+    def execute(self, parameters: list[arcpy.Parameter], messages: list) -> None:
+        """The source code of the tool."""
+
+        # Allows reference to parameters by name instead of index
+        self.params = archelp.get_params(parameters)
+        input_features = self.params["input_features"].valueAsText
+        select_violations = bool(self.params["select_violations"].value)
+        max_oids = self.params["max_oids"].value
+        max_oids = 100 if max_oids is None else max(int(max_oids), 0)
+
+        # Get the domain of each field to check
+        field_names = self.params["fields"].valueAsText.split(";") if self.params["fields"].value else None
+        schema = self.getSchema(parameters[0].value, field_names)
+        domains = get_domains(schema["workspace"], self._getCache())
+        fields = {f["name"]: (f["type"], domains[f["domain"]]) for f in schema["fields"]
+                  if f["domain"] in domains and (field_names is None or f["name"] in field_names)}
+
+        if field_names:
+            for name in field_names:
+                if name not in fields:
+                    archelp.msg(f"{name} doesn't have a domain and was skipped", "warning")
+
+        if not fields:
+            archelp.msg("No fields with domains to check", "warning")
+            self.params["violation_count"].value = 0
+            return
+
+        # Check every field in a single pass. Every offending OID is kept when selecting them,
+        # otherwise only the ones that are listed.
+        validator = DomainValidator(fields, None if select_violations else max_oids)
+        with Progressor("Checking domains...") as progressor:
+            for batch in archelp.get_batches(input_features, ["OID@"] + list(fields)):
+                validator.update(batch)
+                progressor.step(len(batch))
+
+        # Build output for each field
+        out_message = [f"Checked {validator.num_rows} rows\n"]
+        for field, (field_type, domain) in fields.items():
+            count = validator.counts[field]
+            out_message.append(f"\n## FIELD: {field} [{domain['name']}, {domain['type']}]\n"
+                               f"{TAB}Violations: {count}\n")
+            if count and max_oids:
+                oids = validator.oids[field][:max_oids]
+                more = f" ... {count - len(oids)} more" if count > len(oids) else ""
+                out_message.append(f"{TAB}OIDs: {', '.join(map(str, oids))}{more}\n")
+        archelp.msg("".join(out_message))
+
+        if select_violations:
+            oids = {oid for field_oids in validator.oids.values() for oid in field_oids}
+            self.params["selected_features"].value = archelp.select_by_oids(input_features, oids, parameters[0].value)
+
+        self.params["violation_count"].value = sum(validator.counts.values())
+
+        return
@@ -1,7 +1,10 @@
 import arcpy
 import requests
+import sqlite3
 
 import utils.arcpy_tools as archelp
+import utils.rest as rest
+from utils.cache import Cache, get_cache_path
 from utils.constants.ftconstants import STATES
 from utils.tool import Tool
 
@@ -33,6 +36,12 @@ class ZoomToHUC(Tool):
         # USGS feature layer numbers for each HUC layer
         self.huc_layers = {"HUC2": 1, "HUC4": 2, "HUC6": 3, "HUC8": 4,
                            "HUC10": 5, "HUC12": 6, "HUC14": 7, "HUC16": 8}
+
+        # USGS Watershed Boundary Dataset REST service
+        self.wbd_url = "https://hydrowfs.nationalmap.gov/arcgis/rest/services/wbd/MapServer"
+
+        # Set when the watershed cache is found locked by another session
+        self._cache_locked = False
         
         return
     
@@ -67,7 +76,15 @@ class ZoomToHUC(Tool):
             direction = "Input")
         huc.filter.type = "ValueList"
 
-        return [state, huc_level, huc]
+        offline = arcpy.Parameter(
+            displayName = "Offline",
+            name = "offline",
+            datatype = "Boolean",
+            parameterType = "Optional",
+            direction = "Input")
+        offline.value = False
+
+        return [state, huc_level, huc, offline]
     
     def updateParameters(self, parameters: list[arcpy.Parameter]) -> None:
         """
@@ -79,27 +96,145 @@ class ZoomToHUC(Tool):
         # Allows reference to parameters by name instead of index
         self.params = archelp.get_params(parameters)
 
-        if not self.params["state"].hasBeenValidated or not self.params["huc_level"].hasBeenValidated:
-            # Get all HUCs in current state from USGS REST 
-            # Probably need a try except around this
+        if not self.params["state"].hasBeenValidated or not self.params["huc_level"].hasBeenValidated or not self.params["offline"].hasBeenValidated:
+            # Get all HUCs in current state from the cache or USGS REST
             layer = self.huc_layers[self.params["huc_level"].valueAsText]
             state = STATES[self.params["state"].valueAsText]
             huc_level = self.params["huc_level"].valueAsText.lower()
-            base_url = f"https://hydrowfs.nationalmap.gov/arcgis/rest/services/wbd/MapServer/{layer}/query"
-            query = {
-                "where": f"states LIKE '%{state}%'",
-                "returnGeometry": "false",
-                "outFields": f"{huc_level},name",
-                "f": "pjson"}
-            resp = requests.get(base_url, query).json()
-
-            # Parse response and set list for huc field
-            layer_list = [f"{i['attributes']['name']} [{i['attributes'][huc_level]}]" for i in resp['features']]
-            self.params["huc"].filter.list = sorted(layer_list)
+            self.params["huc"].filter.list = self._getHucList(layer, state, huc_level, bool(self.params["offline"].value))
             self.params["huc"].value = None
 
         return
 
+    def updateMessages(self, parameters: list[arcpy.Parameter]) -> None:
+        """
+        Modify the messages created by internal validation for each tool
+        parameter. This method is called after internal validation.
+        """
+
+        # Allows reference to parameters by name instead of index
+        local_params = archelp.get_params(parameters)
+
+        if not local_params["huc"].filter.list:
+            if local_params["offline"].value:
+                local_params["huc"].setWarningMessage("No cached watersheds for this state and level. Run once while online to cache them.")
+            else:
+                local_params["huc"].setWarningMessage("Could not get watersheds for this state and level from the USGS.")
+
+        return
+
+    def _getCache(self) -> Cache:
+        """
+        Get the watershed cache in the project home folder, or None when not
+        running in a project or the cache database can't be opened.
+        """
+
+        self._cache_locked = False
+        try:
+            return Cache(get_cache_path(self.project_location), "wbd")
+        except (OSError, sqlite3.Error):
+            return None
+
+    def _cacheGet(self, cache: Cache, key: str, offline: bool) -> object:
+        """
+        Get an entry from the cache, or None when there isn't one or the
+        cache database is locked (another ArcGIS Pro session writing to it).
+
+        @cache: Cache from _getCache() (None skips the cache)
+        @key: Key of the entry
+        @offline: Return the entry even if it is stale
+        @return: The cached value, or None
+        """
+
+        if cache is None:
+            return None
+        try:
+            return cache.get(key, allow_stale=offline)
+        except sqlite3.Error:
+            self._cache_locked = True
+            return None
+
+    def _cacheSet(self, cache: Cache, key: str, value: object) -> None:
+        """
+        Store an entry in the cache, skipping it when the cache database is
+        locked (or was when the entry was looked up, so it isn't waited on twice).
+
+        @cache: Cache from _getCache() (None skips the cache)
+        @key: Key of the entry
+        @value: Value to store
+        """
+
+        if cache is None or self._cache_locked:
+            return
+        try:
+            cache.set(key, value)
+        except sqlite3.Error:
+            pass
+        return
+
+    def _getHucList(self, layer: int, state: str, huc_level: str, offline: bool=False) -> list[str]:
+        """
+        Get the sorted list of watersheds in a state, from the cache if possible.
+
+        @layer: USGS feature layer number of the HUC level
+        @state: State abbreviation
+        @huc_level: Lowercase HUC level (huc8, huc10, etc.)
+        @offline: Only use the cache, even if the entry is stale
+        @return: List of watersheds (In the format "<name> [<huc>]")
+        """
+
+        cache = self._getCache()
+        key = f"list/{layer}/{state}"
+        huc_list = self._cacheGet(cache, key, offline)
+        if huc_list is not None or offline:
+            return huc_list or []
+
+        query = {
+            "where": f"states LIKE '%{state}%'",
+            "returnGeometry": "false",
+            "outFields": f"{huc_level},name",
+            "f": "pjson"}
+        try:
+            resp = rest.get_json(f"{self.wbd_url}/{layer}/query", query)
+        except (requests.RequestException, rest.RestError):
+            return []
+
+        # Parse response and cache the list for the huc field
+        huc_list = sorted([f"{i['attributes']['name']} [{i['attributes'][huc_level]}]" for i in resp['features']])
+        self._cacheSet(cache, key, huc_list)
+
+        return huc_list
+
+    def _getHucExtent(self, layer: int, huc_level: str, huc: str, wkid: int, offline: bool=False) -> dict:
+        """
+        Get the extent of a watershed, from the cache if possible.
+
+        @layer: USGS feature layer number of the HUC level
+        @huc_level: Lowercase HUC level (huc8, huc10, etc.)
+        @huc: Watershed code
+        @wkid: Factory code of the output spatial reference
+        @offline: Only use the cache, even if the entry is stale
+        @return: Extent from the REST response, or None if offline and not cached
+        """
+
+        cache = self._getCache()
+        key = f"extent/{layer}/{huc}/{wkid}"
+        extent = self._cacheGet(cache, key, offline)
+        if extent is not None or offline:
+            return extent
+
+        query_params = {"where": f"{huc_level} = '{huc}'",
+                        "returnExtentOnly": "true",
+                        "outSR": f"{wkid}",
+                        "f": "pjson"}
+        extent = rest.get_json(f"{self.wbd_url}/{layer}/query", query_params)['extent']
+
+        # Only cache valid extents
+        if "NaN" not in [extent[i] for i in ['xmin','ymin','xmax','ymax']]:
+            self._cacheSet(cache, key, extent)
+
+        return extent
+
     def execute(self, parameters: list[arcpy.Parameter], messages: list) -> None:
         """The source code of the tool."""
 
@@ -108,27 +243,29 @@ class ZoomToHUC(Tool):
         current_view = self.project.activeView
 
         if current_view is not None:
-            # Get extent of specified HUC from USGS REST
-            # Probably should put a try block in here
+            # Get extent of specified HUC from the cache or USGS REST
             layer = self.huc_layers[self.params["huc_level"].valueAsText]
             huc_level = self.params["huc_level"].valueAsText.lower()
             huc = self.params["huc"].valueAsText.split(" ")[-1][1:-1]
-            base_url = f"https://hydrowfs.nationalmap.gov/arcgis/rest/services/wbd/MapServer/{layer}/query"
-            query_params = {"where": f"{huc_level} = '{huc}'",
-                            "returnExtentOnly": "true",
-                            "outSR": f"{current_view.map.spatialReference.factoryCode}",
-                            "f": "pjson"}
-            resp = requests.get(base_url, query_params).json()
-            ext_list = [resp['extent'][i] for i in ['xmin','ymin','xmax','ymax']]
+            wkid = current_view.map.spatialReference.factoryCode
+            try:
+                extent = self._getHucExtent(layer, huc_level, huc, wkid, bool(self.params["offline"].value))
+            except (requests.RequestException, rest.RestError) as e:
+                archelp.msg(f"Error: Could not get watershed extent from the USGS. {e}", "error")
+                return
+            if extent is None:
+                archelp.msg("Error: Watershed extent is not cached. Run once while online to cache it.", "error")
+                return
+            ext_list = [extent[i] for i in ['xmin','ymin','xmax','ymax']]
 
             # Print some value messages to the geoprocessing window.
-            archelp.msg(f"WHERE: {query_params['where']}\nWKID: {query_params['outSR']}\nEXTENT: {ext_list}")
+            archelp.msg(f"WHERE: {huc_level} = '{huc}'\nWKID: {wkid}\nEXTENT: {ext_list}\nREQUESTS: {rest.get_stats()}")
             
             # Set the map extent using the extent recieved from the REST request if it is valid.
             if "NaN" not in ext_list:
-                ext = arcpy.Extent(XMin = resp['extent']['xmin'], YMin = resp['extent']['ymin'], 
-                                   XMax = resp['extent']['xmax'], YMax = resp['extent']['ymax'], 
-                                   spatial_reference = arcpy.SpatialReference(resp['extent']['spatialReference']['latestWkid']))
+                ext = arcpy.Extent(XMin = extent['xmin'], YMin = extent['ymin'], 
+                                   XMax = extent['xmax'], YMax = extent['ymax'], 
+                                   spatial_reference = arcpy.SpatialReference(extent['spatialReference']['latestWkid']))
                 current_view.camera.setExtent(ext)
             else:
                 archelp.msg("Error: Invalid extent. Check tool parameters.", "error")
@@ -1,7 +1,12 @@
 import arcpy
+import os
 import requests
+import sqlite3
 
 import utils.arcpy_tools as archelp
+import utils.rest as rest
+from utils.constants.ftconstants import PLSS_INDEX_NAME, PLSS_WKID
+from utils.plss_index import PLSSIndex, to_extent
 from utils.tool import Tool
 
 class ZoomToTRS(Tool):
@@ -27,6 +32,9 @@ class ZoomToTRS(Tool):
         
         # Parameters
         self.params = {}
+
+        # Oregon Department of Forestry PLSS REST service (layer 0 is townships, layer 1 is sections)
+        self.plss_url = "https://gis.odf.oregon.gov/ags1/rest/services/Public/PLSS/MapServer"
         
         return
     
@@ -225,34 +233,58 @@ class ZoomToTRS(Tool):
         current_view = self.project.activeView
 
         if current_view is not None:
-            # Set REST parameters depending on whether or not a section has been specified.
-            if parsed_params['sec'] == None or parsed_params['sec'] == "":
-                url_base = r"https://gis.odf.oregon.gov/ags1/rest/services/Public/PLSS/MapServer/0/query?"
-                section_param = ""
-            else:
-                url_base = r"https://gis.odf.oregon.gov/ags1/rest/services/Public/PLSS/MapServer/1/query?"
-                section_param = f" and Section = '{parsed_params['sec']}'"
-
-            # Build a dictionary of REST parameters based on the parsed parameters and map spatial reference.
-            query_params = {"where": f"Twn = '{parsed_params['twn']}' and TwnChar = '{parsed_params['twn_char']}' and Rng = '{parsed_params['rng']}' and RngChar = '{parsed_params['rng_char']}'{section_param}",
-                            "returnExtentOnly": "true",
-                            "outSR": f"{current_view.map.spatialReference.factoryCode}",
-                            "f": "pjson"}
-            
-            # Perform the REST request to get extent of township and range or section.
-            # Probably should put a try block in here
-            resp = requests.get(url = url_base, params = query_params).json()
-            ext_list = [resp['extent'][i] for i in ['xmin','ymin','xmax','ymax']]
+            # Look up the extent in the local PLSS index in the project folder first. A locked,
+            # read-only or corrupt index is skipped and the extent comes from the PLSS service.
+            key = [parsed_params[k] for k in ["twn", "twn_char", "rng", "rng_char", "sec"]]
+            index, wkid, extent = None, PLSS_WKID, None
+            try:
+                index = PLSSIndex(os.path.join(self.project_location, PLSS_INDEX_NAME))
+                wkid = index.wkid
+                extent = index.lookup(*key)
+            except (OSError, sqlite3.Error) as e:
+                index = None
+                archelp.msg(f"Could not read the PLSS index, using the PLSS service. {e}", "warning")
+            source = "PLSS index"
+
+            if extent is None:
+                # Set REST parameters depending on whether or not a section has been specified.
+                if parsed_params['sec'] == None or parsed_params['sec'] == "":
+                    url_base = f"{self.plss_url}/0/query?"
+                    section_param = ""
+                else:
+                    url_base = f"{self.plss_url}/1/query?"
+                    section_param = f" and Section = '{parsed_params['sec']}'"
+
+                # Build a dictionary of REST parameters based on the parsed parameters and index spatial reference.
+                query_params = {"where": f"Twn = '{parsed_params['twn']}' and TwnChar = '{parsed_params['twn_char']}' and Rng = '{parsed_params['rng']}' and RngChar = '{parsed_params['rng_char']}'{section_param}",
+                                "returnExtentOnly": "true",
+                                "outSR": f"{wkid}",
+                                "f": "pjson"}
+                
+                # Perform the REST request to get extent of township and range or section.
+                try:
+                    resp = rest.get_json(url_base, query_params)
+                except (requests.RequestException, rest.RestError) as e:
+                    archelp.msg(f"Error: Could not get extent from the PLSS service. {e}", "error")
+                    return
+                ext_list = [resp['extent'][i] for i in ['xmin','ymin','xmax','ymax']]
+                source = f"REST ({query_params['where']}, {rest.get_stats()['last_ms']} ms)"
+
+                # Add valid extents to the index so the next lookup is local.
+                if "NaN" not in ext_list:
+                    extent = tuple(ext_list)
+                    if index is not None:
+                        try:
+                            index.add([key + ext_list])
+                        except (OSError, sqlite3.Error) as e:
+                            archelp.msg(f"Could not add the extent to the PLSS index. {e}", "warning")
 
             # Print some value messages to the geoprocessing window.
-            messages.addMessage(f"WHERE: {query_params['where']}\nWKID: {query_params['outSR']}\nEXTENT: {ext_list}")
+            messages.addMessage(f"SOURCE: {source}\nWKID: {wkid}\nEXTENT: {list(extent) if extent else 'NaN'}")
             
-            # Set the map extent using the extent recieved from the REST request if it is valid.
-            if "NaN" not in ext_list:
-                ext = arcpy.Extent(XMin = resp['extent']['xmin'], YMin = resp['extent']['ymin'], 
-                                   XMax = resp['extent']['xmax'], YMax = resp['extent']['ymax'], 
-                                   spatial_reference = arcpy.SpatialReference(resp['extent']['spatialReference']['latestWkid']))
-                current_view.camera.setExtent(ext)
+            # Set the map extent, projected to the map spatial reference, if it is valid.
+            if extent is not None:
+                current_view.camera.setExtent(to_extent(extent, wkid, current_view.map.spatialReference))
             else:
                 archelp.msg("Error: Invalid extent. Check tool parameters.", "error")
         else:
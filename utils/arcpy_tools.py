@@ -1,7 +1,25 @@
 import arcpy
+import multiprocessing
 import os
+import pickle
+import sqlite3
+import sys
+import tempfile
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 
 import utils.constants.ftconstants as ftconstants
+import utils.profiler as profiler
+from utils.crawler import crawl_databases
+from utils.progress import Progressor, send_message
+
+# NumPy ships with ArcGIS Pro, but fall back to array.array columns without it
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 # Use this module for any helper functions or classes that you want to use 
 # between tools. If you find yourself re-impelementing the same function in 
@@ -23,20 +41,329 @@ def row_to_dict(cursor: arcpy.da.SearchCursor) -> dict:
     for row in cursor:
         yield dict(zip(cursor.fields, row))
 
-def get_databases(location: str, database_name: str="None") -> list:
+class RowView(object):
+    """
+    Read-only view of a single row in a Batch. Values are looked up in the
+    batch columns on access, so no per-row container is built.
+    """
+
+    __slots__ = ("_batch", "_index")
+
+    def __init__(self, batch: "Batch", index: int) -> None:
+        self._batch = batch
+        self._index = index
+
+    def __getitem__(self, field: str):
+        return self._batch.columns[field][self._index]
+
+    def __iter__(self):
+        return iter(self._batch.fields)
+
+    def __len__(self) -> int:
+        return len(self._batch.fields)
+
+    def __repr__(self) -> str:
+        return f"RowView({self.as_dict()})"
+
+    def keys(self) -> list[str]:
+        return list(self._batch.fields)
+
+    def values(self) -> list:
+        return [self._batch.columns[f][self._index] for f in self._batch.fields]
+
+    def items(self) -> list[tuple]:
+        return list(zip(self._batch.fields, self.values()))
+
+    def as_dict(self) -> dict:
+        return dict(self.items())
+
+class Batch(object):
+    """
+    A fixed-size chunk of cursor rows stored as one column per field
+
+    @fields: The field names in cursor order
+    @columns: Dictionary of columns (In the format {<field>: <column>})
+    @size: Number of rows in the batch
+    """
+
+    __slots__ = ("fields", "columns", "size")
+
+    def __init__(self, fields: list[str], columns: dict, size: int) -> None:
+        self.fields = fields
+        self.columns = columns
+        self.size = size
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, field: str):
+        return self.columns[field]
+
+    def rows(self) -> RowView:
+        """
+        @yield: A RowView for each row in the batch
+        """
+
+        for index in range(self.size):
+            yield RowView(self, index)
+
+    def dicts(self) -> dict:
+        """
+        @yield: A dictionary for each row in the batch
+                (In the format {<field>: <value>})
+        """
+
+        fields = self.fields
+        for row in zip(*[self.columns[f] for f in fields]):
+            yield dict(zip(fields, row))
+
+def _to_column(values: tuple, array_type: str):
+    """
+    Converts a tuple of cursor values to a column. Only columns of plain ints
+    or floats are packed into arrays, everything else (strings, dates, nulls,
+    mixed types) is kept as a list so the original values are preserved.
+
+    @values: The values in the column
+    @array_type: The column type to build (numpy, array, list)
+    @return: A numpy array, array.array or list
+    """
+
+    if array_type == "list":
+        return list(values)
+
+    value_types = set(map(type, values))
+    if value_types == {int}:
+        typecode = "q"
+    elif value_types == {float}:
+        typecode = "d"
+    else:
+        return list(values)
+
+    try:
+        if array_type == "numpy" and np is not None:
+            return np.array(values, dtype = "int64" if typecode == "q" else "float64")
+        return array(typecode, values)
+    except OverflowError:
+        return list(values)
+
+def read_batches(cursor: arcpy.da.SearchCursor, batch_size: int=ftconstants.BATCH_SIZE, array_type: str="numpy") -> Batch:
+    """
+    Reads a cursor in fixed-size chunks of columns
+
+    @cursor: The cursor to read (anything iterable with a 'fields' attribute)
+    @batch_size: Maximum number of rows in each batch
+    @array_type: The column type to build (numpy, array, list). Numeric
+                 columns fall back to array.array if numpy is not available
+    @yield: A Batch of columns for each chunk of rows
+
+    Usage:
+    >>> with arcpy.da.SearchCursor(<features>, <fields>) as cursor:
+    >>>     for batch in read_batches(cursor):
+    >>>         print(batch['fieldName'])
+    """
+
+    fields = list(cursor.fields)
+    iterator = iter(cursor)
+    while True:
+        start = time.perf_counter()
+        rows = list(islice(iterator, batch_size))
+        if not rows:
+            return
+        columns = zip(*rows)
+        batch = Batch(fields, {f: _to_column(c, array_type) for f, c in zip(fields, columns)}, len(rows))
+
+        # Only the time spent reading is counted, not the time the caller spends on the batch
+        profiler.add("read rows", time.perf_counter() - start, rows=len(batch))
+        yield batch
+
+def get_batches(features: str, fields: list[str], query: str=None, batch_size: int=ftconstants.BATCH_SIZE, array_type: str="numpy") -> Batch:
+    """
+    Gets the rows from the feature class in column batches
+
+    @features: The feature class to get the rows from
+    @fields: The fields to get from the feature class
+    @query: The query to filter the rows by (optional)
+    @batch_size: Maximum number of rows in each batch
+    @array_type: The column type to build (numpy, array, list)
+    @yield: A Batch of columns (In the format {<field>: <column>})
+
+    Usage:
+    >>> for batch in get_batches(<features>, <fields>, <query>):
+    >>>     print(len(batch), batch['fieldName'])
+    >>>     for row in batch.rows():
+    >>>         print(row['fieldName'])
+    """
+
+    with arcpy.da.SearchCursor(features, fields, query) as cursor:
+        yield from read_batches(cursor, batch_size, array_type)
+
+def _get_oid_bounds(features: str, oid_field: str, path: str) -> tuple[int, int]:
+    """
+    Finds the lowest and highest OID. Geodatabases sort the rows, so only the
+    first row of an ascending and a descending cursor is read. Other workspaces
+    (shapefiles, dBASE tables) ignore ORDER BY and have every OID read instead.
+
+    @features: The features
+    @oid_field: Delimited OID field name
+    @path: Describe().path of the features
+    @return: (<min OID>, <max OID>), or None if there are no rows
+    """
+
+    if os.path.splitext(get_workspace(path))[1].lower() in [".gdb", ".sde", ".gpkg", ".sqlite"]:
+        bounds = []
+        for order in ["ASC", "DESC"]:
+            with arcpy.da.SearchCursor(features, ["OID@"], sql_clause=(None, f"ORDER BY {oid_field} {order}")) as cursor:
+                row = next(iter(cursor), None)
+            if row is None:
+                return None
+            bounds.append(int(row[0]))
+        return tuple(bounds)
+
+    min_oid = max_oid = None
+    for batch in get_batches(features, ["OID@"]):
+        column = batch["OID@"]
+        if np is not None and isinstance(column, np.ndarray):
+            low, high = int(column.min()), int(column.max())
+        else:
+            low, high = int(min(column)), int(max(column))
+        min_oid = low if min_oid is None else min(min_oid, low)
+        max_oid = high if max_oid is None else max(max_oid, high)
+    return None if min_oid is None else (min_oid, max_oid)
+
+def get_oid_ranges(features: str, num_ranges: int) -> list[str]:
+    """
+    Splits the features into contiguous OID ranges of equal width
+
+    @features: The features to split
+    @num_ranges: The number of ranges to split the features into
+    @return: A list of where clauses, one for each range
+             (In the format "<OID field> >= <start> AND <OID field> < <end>")
+
+    Usage:
+    >>> for where_clause in get_oid_ranges(<features>, 4):
+    >>>     for batch in get_batches(<features>, <fields>, where_clause):
+    >>>         print(len(batch))
+    """
+
+    desc = arcpy.Describe(features)
+    oid_field = arcpy.AddFieldDelimiters(desc.path, desc.OIDFieldName)
+    bounds = _get_oid_bounds(features, oid_field, desc.path)
+    if bounds is None:
+        return []
+    min_oid, max_oid = bounds
+
+    step = -(-(max_oid - min_oid + 1) // max(num_ranges, 1))
+
+    return [f"{oid_field} >= {start} AND {oid_field} < {start + step}"
+            for start in range(min_oid, max_oid + 1, step)]
+
+def get_process_pool(max_workers: int) -> ProcessPoolExecutor:
+    """
+    Creates a process pool that can be used from inside ArcGIS Pro. Functions
+    submitted to the pool must be importable at the module level.
+
+    @max_workers: The number of worker processes
+    @return: A concurrent.futures process pool
+    """
+
+    context = multiprocessing.get_context("spawn")
+
+    # Inside ArcGIS Pro sys.executable is ArcGISPro.exe, so workers have to be
+    # started with the python interpreter from the active environment instead
+    interpreter = os.path.join(sys.exec_prefix, "pythonw.exe")
+    if not os.path.basename(sys.executable).lower().startswith("python") and os.path.exists(interpreter):
+        context.set_executable(interpreter)
+
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=context)
+
+def compress_oids(oids: list[int]) -> list[tuple[int, int]]:
+    """
+    Compresses OIDs into contiguous ranges
+
+    @oids: The OIDs to compress (any order, duplicates are ignored)
+    @return: A sorted list of inclusive ranges (In the format [(<start>, <end>), ...])
+
+    Usage:
+    >>> compress_oids([7, 1, 2, 3, 5])
+    >>> [(1, 3), (5, 5), (7, 7)]
+    """
+
+    ranges = []
+    for oid in sorted(set(oids)):
+        if ranges and oid == ranges[-1][1] + 1:
+            ranges[-1][1] = oid
+        else:
+            ranges.append([oid, oid])
+    return [tuple(r) for r in ranges]
+
+def build_oid_queries(oid_field: str, oids: list[int], max_terms: int=ftconstants.SQL_MAX_TERMS) -> list[str]:
     """
-    Gets all the databases in the location
+    Builds where clauses that select a set of OIDs. Runs of consecutive OIDs
+    become BETWEEN terms and the rest are grouped into IN lists. Each clause
+    has at most max_terms terms so it stays under workspace SQL limits.
+
+    @oid_field: The delimited OID field name
+    @oids: The OIDs to select
+    @max_terms: Maximum number of OIDs and ranges in each clause
+    @return: A list of where clauses that together select every OID
+    """
+
+    queries = []
+    ranges = compress_oids(oids)
+    for i in range(0, len(ranges), max_terms):
+        chunk = ranges[i:i + max_terms]
+        singles = [str(start) for start, end in chunk if start == end]
+        terms = [f"{oid_field} BETWEEN {start} AND {end}" for start, end in chunk if start != end]
+        if singles:
+            terms.append(f"{oid_field} IN ({', '.join(singles)})")
+        queries.append(" OR ".join(terms))
+    return queries
+
+def select_by_oids(features: str, oids: list[int], layer: object=None, max_terms: int=ftconstants.SQL_MAX_TERMS) -> object:
+    """
+    Selects a set of OIDs in a layer, choosing the cheapest method for the
+    number of OIDs. Small sets are selected with a single query. Large sets
+    are passed straight to the layer's selection set if a map layer is
+    given, or selected with several bounded queries otherwise.
+
+    @features: The layer to select from
+    @oids: The OIDs to select
+    @layer: The arcpy.mp Layer for the features (optional)
+    @max_terms: Maximum number of OIDs and ranges in each query
+    @return: The layer with the selection
+    """
+
+    oids = sorted(set(oids))
+    if not oids:
+        return arcpy.management.SelectLayerByAttribute(features, "CLEAR_SELECTION")
+
+    # Map layers can take the OID set directly without building any SQL
+    if len(oids) > max_terms and layer is not None and hasattr(layer, "setSelectionSet"):
+        layer.setSelectionSet(oids, "NEW")
+        return layer
+
+    desc = arcpy.Describe(features)
+    oid_field = arcpy.AddFieldDelimiters(desc.path, desc.OIDFieldName)
+    queries = build_oid_queries(oid_field, oids, max_terms)
+
+    selected = arcpy.management.SelectLayerByAttribute(features, "NEW_SELECTION", queries[0])
+    for query in queries[1:]:
+        selected = arcpy.management.SelectLayerByAttribute(features, "ADD_TO_SELECTION", query)
+    return selected
+
+def get_databases(location: str, database_name: str="None", catalog_path: str=None) -> list:
+    """
+    Gets all the databases in the location. Directories are searched
+    concurrently and geodatabases aren't searched inside, use
+    utils.crawler.crawl_databases directly to get results as they are found.
 
     @location: The location to search for databases
     @database_name: The name of the database to search for (default is None)
+    @catalog_path: Catalog database used to skip directories that haven't changed since the last search (optional)
     @return: A list of databases
     """
 
-    databases = []
-    for root, dirs, files in os.walk(location):
-        for dir in dirs:
-            if dir.endswith(".gdb"):
-                databases.append(os.path.join(root, dir))
+    databases = list(crawl_databases(location, catalog_path=catalog_path))
     if database_name != "None":
         databases = [x for x in databases if x.lower().endswith(database_name)]
     return databases
@@ -52,10 +379,10 @@ def walk_database(database: str, datatype: str=None, dataset: str=None) -> dict[
              (In the format {<feature class name>:<feature class path>})
     """
 
-    feature_classes = []
-    arcpy.env.workspace = database
-    feature_classes = [os.path.join(database, dataset, fc) 
-                       for fc in arcpy.ListFeatureClasses(feature_dataset=dataset, feature_type=datatype)]
+    # Only set the workspace for the listing so the global environment isn't changed
+    with arcpy.EnvManager(workspace = database):
+        feature_classes = [os.path.join(database, dataset or "", fc) 
+                           for fc in arcpy.ListFeatureClasses(feature_dataset=dataset, feature_type=datatype)]
     
     return {os.path.basename(path):path for path in feature_classes}
 
@@ -68,11 +395,134 @@ def get_tables(database: str) -> dict[str]:
              (In the format {<table name>: table path>})
     """
 
-    tables = []
-    arcpy.env.workspace = database
-    tables = [os.path.join(database, table) for table in arcpy.ListTables()]
+    with arcpy.EnvManager(workspace = database):
+        tables = [os.path.join(database, table) for table in arcpy.ListTables()]
     return {os.path.basename(path):path for path in tables}
 
+def list_datasets(database: str, datatypes: list[str]=["FeatureClass", "Table"]) -> tuple:
+    """
+    Lists the datasets in a database in a single walk, including the ones in
+    feature datasets. Unlike walk_database and get_tables this doesn't list
+    each feature dataset separately or use the workspace environment.
+
+    @database: The database to walk (path to the database)
+    @datatypes: The arcpy.da.Walk data types to list
+    @yield: (<dataset name>, <dataset path>, <data type>) for each dataset
+    """
+
+    for datatype in datatypes:
+        for dirpath, dirnames, filenames in arcpy.da.Walk(database, datatype = datatype):
+            for filename in filenames:
+                yield filename, os.path.join(dirpath, filename), datatype
+
+def get_workspace(path: str) -> str:
+    """
+    Gets the workspace a dataset is stored in. Datasets in a feature dataset
+    are stored in the feature dataset's geodatabase.
+
+    @path: Path of a dataset (Describe().path of a feature class or table)
+    @return: Path of the workspace
+    """
+
+    while path and os.path.splitext(path)[1].lower() not in [".gdb", ".sde", ".gpkg", ".sqlite"]:
+        parent = os.path.dirname(path)
+        if parent == path or not os.path.splitext(parent)[1]:
+            break
+        path = parent
+    return path
+
+def supports_edit_session(workspace: str) -> bool:
+    """
+    @workspace: Path of a workspace (from get_workspace())
+    @return: True for geodatabases, False for memory workspaces and folders of shapefiles
+             or other files, where an edit session isn't needed or can't be started
+    """
+
+    return os.path.splitext(workspace)[1].lower() in [".gdb", ".sde", ".geodatabase"]
+
+def is_file_path(path: str) -> bool:
+    """
+    @path: Path of a dataset or workspace
+    @return: True for paths on disk, False for memory workspaces and service URLs
+    """
+
+    return os.path.isabs(path) and "://" not in path
+
+def normalize_path(path: str) -> str:
+    """
+    @path: Path of a dataset or workspace
+    @return: The normalized path, paths that aren't on disk are returned unchanged
+    """
+
+    return os.path.normpath(path) if is_file_path(path) else path
+
+# Count of schema changes made through FlickTools (see mark_schema_changed())
+schema_changes = 0
+
+def mark_schema_changed() -> None:
+    """
+    Records that the schema of a dataset was changed (fields added, a table
+    created), so cached workspace stamps are checked again before the next
+    schema lookup
+    """
+
+    global schema_changes
+    schema_changes += 1
+    return
+
+def get_workspace_stamp(workspace: str) -> str:
+    """
+    Gets a stamp that changes whenever the schema of a workspace may have
+    changed. File geodatabases use the latest modification time of their
+    files. Enterprise geodatabases don't change their connection file, so
+    their stamp also rolls over every WORKSPACE_STAMP_TTL seconds.
+
+    @workspace: Path of the workspace
+    @return: The modification stamp, or None for workspaces that aren't on disk
+             (memory workspaces, services). Their changes can't be detected, so
+             don't cache anything read from them
+    """
+
+    if not is_file_path(workspace) or not os.path.exists(workspace):
+        return None
+
+    if os.path.isdir(workspace):
+        with os.scandir(workspace) as entries:
+            mtime = max((entry.stat().st_mtime_ns for entry in entries if entry.is_file()), default=0)
+        return str(mtime)
+
+    mtime = os.stat(workspace).st_mtime_ns
+    if workspace.lower().endswith(".sde"):
+        return f"{mtime}/{int(time.time() // ftconstants.WORKSPACE_STAMP_TTL)}"
+    return str(mtime)
+
+def field_to_dict(field: arcpy.Field) -> dict:
+    """
+    @field: arcpy Field object
+    @return: The field as it's stored in a schema snapshot
+             (In the format {"name", "type", "length", "domain", "alias", "nullable"})
+    """
+
+    return {"name": field.name, "type": field.type, "length": field.length, "domain": field.domain,
+            "alias": field.aliasName, "nullable": field.isNullable}
+
+def describe_dataset(dataset: str) -> dict:
+    """
+    Builds a schema snapshot of a dataset
+
+    @dataset: Path of a feature class or table
+    @return: The snapshot (In the format {"path", "name", "datatype", "workspace", "oid_field",
+             "fields": [{"name", "type", "length", "domain", "alias", "nullable"}]})
+    """
+
+    desc = arcpy.Describe(dataset)
+    return {"path": normalize_path(desc.catalogPath),
+            "name": desc.name,
+            "datatype": desc.dataType,
+            "workspace": normalize_path(get_workspace(desc.path)),
+            "oid_field": desc.OIDFieldName if getattr(desc, "hasOID", True) else None,
+            "fields": [field_to_dict(f) for f in desc.fields]}
+
 def get_project(project_location: str) -> str:
     """
     Gets the project from the project path
@@ -94,21 +544,7 @@ def msg(message: str="", level: str="message") -> None:
     @level: The level of the message (message, warning, error)
     """
     
-    message = str(message)
-    level = str(level).lower()
-    level = ("message" if level not in ["message", "warning", "error"] else level)
-    # Message
-    if level == "message":
-        print(message)
-        arcpy.AddMessage(message)
-    # Warning
-    elif level == "warning":
-        print(f"WARNING: {message}")
-        arcpy.AddWarning(message)
-    # Error
-    elif level == "error":
-        print(f"ERROR: {message}")
-        arcpy.AddError(message)
+    send_message(message, level)
     return
 
     
@@ -143,9 +579,12 @@ def get_rows(features: str, fields: list[str], query: str=None)-> dict:
     >>>     print(row['fieldName'])
     """
     
+    # Rows are read ahead in batches, so the cursor should only be used for
+    # its properties (fields, etc.), not its position
     with arcpy.da.SearchCursor(features, fields, query) as cursor:
-        for row in row_to_dict(cursor):
-            yield cursor, row
+        for batch in read_batches(cursor, array_type="list"):
+            for row in batch.dicts():
+                yield cursor, row
                 
 def update_rows(features: str, fields: list[str], query: str=None) -> dict:
     """
@@ -161,20 +600,416 @@ def update_rows(features: str, fields: list[str], query: str=None) -> dict:
     >>> for cursor, row in update_rows(<features>, <fields>, <query>):
     >>>     row['fieldName'] = <value>
     >>>     cursor.updateRow(list(row.values()))
+
+    Use update_columns for large updates, it computes new values a batch at a
+    time and only writes the rows that changed.
     """
 
     with arcpy.da.UpdateCursor(features, fields, query) as cursor:
         for row in row_to_dict(cursor):
             yield cursor, row
             
-def insert_rows(features:str, fields: list[str], rows: list[list], query: str=None) -> int:
+def _changed_rows(old_columns: dict, new_columns: dict, num_rows: int) -> list[int]:
+    """
+    @old_columns: Current values (In the format {<field>: <column>})
+    @new_columns: New values for the same fields
+    @num_rows: Number of rows in the columns
+    @return: Positions of the rows where any value changed
+    """
+
+    changed = np.zeros(num_rows, dtype=bool) if np is not None else None
+    changed_rows = set()
+    for field, new in new_columns.items():
+        old = old_columns[field]
+        if np is not None and isinstance(old, np.ndarray) and isinstance(new, np.ndarray):
+            changed |= (old != new)
+        else:
+            changed_rows.update(i for i, (o, n) in enumerate(zip(old, new)) if o != n)
+
+    if changed is not None:
+        changed_rows.update(np.flatnonzero(changed).tolist())
+    return sorted(changed_rows)
+
+def _to_value(value: object) -> object:
+    """
+    @value: A value from a column
+    @return: The value as a plain Python value (cursors don't take NumPy scalars)
+    """
+
+    return value.item() if np is not None and isinstance(value, np.generic) else value
+
+def update_columns(features: str, fields: list[str], transform=None, mapping: dict=None, key_field: str=None,
+                   query: str=None, batch_size: int=ftconstants.BATCH_SIZE, edit_session: bool=True,
+                   progress_total: int=None) -> dict:
+    """
+    Updates the rows in the feature class a batch at a time. The rows are read
+    in column batches and the new values are computed for the whole batch,
+    then only the rows whose values changed are written with an update cursor
+    limited to their OIDs.
+
+    @features: The feature class to update the rows in
+    @fields: The fields to update
+    @transform: Function that takes a Batch (with an "OID@" column and a column for each field)
+                and returns the new columns (In the format {<field>: <column>}) (optional)
+    @mapping: New values by key, used instead of a transform
+              (In the format {<key>: [<value for each field>]}) (optional)
+    @key_field: The field with the keys of the mapping (optional)
+    @query: The query to filter the rows by (optional)
+    @batch_size: Maximum number of rows read at a time, and changed rows written at a time
+    @edit_session: Make the updates in an edit session, so nothing is saved if an update fails.
+                   Only geodatabases get an edit session, see supports_edit_session()
+    @progress_total: Number of rows expected, shows a step progressor if given (optional)
+    @raises ValueError: If neither a transform nor a mapping and key field are given
+    @return: Update stats (In the format {"scanned", "changed", "seconds", "rows_per_second"})
+
+    Usage:
+    >>> update_columns(<features>, ["NAME"], lambda batch: {"NAME": [n.strip() for n in batch["NAME"]]})
+    >>> update_columns(<features>, ["STATUS"], mapping={"A": ["Active"]}, key_field="CODE")
+    """
+
+    if transform is None:
+        if mapping is None or key_field is None:
+            raise ValueError("update_columns needs a transform, or a mapping and key field")
+
+        def transform(batch: Batch) -> dict:
+            columns = {field: list(batch[field]) for field in fields}
+            for i, key in enumerate(batch[key_field]):
+                values = mapping.get(key)
+                if values is not None:
+                    for field, value in zip(fields, values):
+                        columns[field][i] = value
+            return columns
+
+    desc = arcpy.Describe(features)
+    oid_field = arcpy.AddFieldDelimiters(desc.path, desc.OIDFieldName)
+    read_fields = ["OID@"] + list(fields) + ([key_field] if key_field and key_field not in fields else [])
+    stats = {"scanned": 0, "changed": 0}
+    pending = {}
+
+    def flush() -> None:
+        # Write the waiting changes, only visiting the rows that changed
+        with profiler.span("update rows", rows=len(pending)):
+            for oid_query in build_oid_queries(oid_field, list(pending)):
+                with arcpy.da.UpdateCursor(features, ["OID@"] + list(fields), oid_query) as cursor:
+                    for row in cursor:
+                        values = pending.get(row[0])
+                        if values is not None:
+                            cursor.updateRow([row[0]] + values)
+        stats["changed"] += len(pending)
+        pending.clear()
+        return
+
+    editor = None
+    workspace = os.path.normpath(get_workspace(desc.path))
+    if edit_session and supports_edit_session(workspace):
+        editor = arcpy.da.Editor(workspace)
+        editor.startEditing(False, True)
+        editor.startOperation()
+
+    start = time.perf_counter()
+    progressor = Progressor("Updating rows...", progress_total)
+    try:
+        for batch in get_batches(features, read_fields, query, batch_size):
+            new_columns = transform(batch)
+            oids = batch["OID@"]
+            for i in _changed_rows(batch.columns, new_columns, len(batch)):
+                pending[int(oids[i])] = [_to_value(new_columns[field][i] if field in new_columns else batch[field][i])
+                                         for field in fields]
+
+            stats["scanned"] += len(batch)
+            progressor.step(len(batch))
+            if len(pending) >= batch_size:
+                flush()
+        flush()
+    except Exception:
+        if editor is not None:
+            editor.abortOperation()
+            editor.stopEditing(False)
+        raise
+    finally:
+        progressor.close()
+
+    if editor is not None:
+        editor.stopOperation()
+        editor.stopEditing(True)
+
+    stats["seconds"] = time.perf_counter() - start
+    stats["rows_per_second"] = stats["scanned"] / stats["seconds"] if stats["seconds"] else 0.0
+    return stats
+
+class JoinIndex(object):
+    """
+    Hash index of key -> values for joining tables. Entries are kept in a
+    dictionary until their estimated size passes the memory budget, then
+    every entry is moved to a temporary SQLite database on disk.
+
+    @memory_budget: Maximum estimated size of the in-memory index in bytes
+    @get_keys: Function that returns the only keys worth indexing. It is called
+               once, when the index first passes the memory budget, and entries
+               with other keys are dropped before deciding to spill (optional)
+
+    Usage:
+    >>> index = JoinIndex()
+    >>> index.add(<key>, (<value>, <value>))
+    >>> found = index.get_many([<key>, <key>])
+    >>> index.close()
+    """
+
+    # Rough per-entry cost of a dictionary slot and tuple header
+    _ENTRY_OVERHEAD = 100
+
+    # SQLite limits the number of parameters in a query
+    _MAX_PARAMS = 900
+
+    def __init__(self, memory_budget: int=ftconstants.JOIN_MEMORY_BUDGET, get_keys=None) -> None:
+        self.memory_budget = memory_budget
+        self.size = 0
+        self.duplicates = 0
+        self.spill_path = None
+        self.keys = None
+
+        self._get_keys = get_keys
+
+        self._entries = {}
+        self._connection = None
+        self._count = 0
+        return
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def spilled(self) -> bool:
+        """True if the index was moved to disk"""
+        return self._connection is not None
+
+    def _spill(self) -> None:
+        """Move every entry to a temporary SQLite database"""
+
+        handle, self.spill_path = tempfile.mkstemp(suffix=".sqlite", prefix="FlickToolsJoin_")
+        os.close(handle)
+        self._connection = sqlite3.connect(self.spill_path)
+        self._connection.execute("PRAGMA journal_mode = OFF")
+        self._connection.execute("PRAGMA synchronous = OFF")
+        self._connection.execute("CREATE TABLE entries (key PRIMARY KEY, value BLOB)")
+        self._insert(self._entries.items())
+        self._entries = {}
+        return
+
+    def _insert(self, entries) -> None:
+        """
+        @entries: (<key>, <values>) pairs to write to the spilled index
+        """
+
+        self._connection.executemany("INSERT OR IGNORE INTO entries VALUES (?, ?)",
+                                     ((key, pickle.dumps(values)) for key, values in entries))
+        return
+
+    def _entry_size(self, key: object, values: tuple) -> int:
+        """Estimated size of an entry in bytes"""
+        return sys.getsizeof(key) + sys.getsizeof(values) + sum(map(sys.getsizeof, values)) + self._ENTRY_OVERHEAD
+
+    def restrict(self, keys: set) -> None:
+        """
+        Only keep (and from now on only add) entries with these keys
+
+        @keys: The keys to keep
+        """
+
+        self.keys = keys
+        if self._connection is not None:
+            return
+        self._entries = {key: values for key, values in self._entries.items() if key in keys}
+        self._count = len(self._entries)
+        self.size = sum(self._entry_size(key, values) for key, values in self._entries.items())
+        return
+
+    def add(self, key: object, values: tuple) -> None:
+        """
+        Add an entry. The first entry for a key is kept, later ones are counted as duplicates.
+
+        @key: The join key
+        @values: The values to join
+        """
+
+        self.add_many([(key, values)])
+        return
+
+    def add_many(self, entries: list[tuple]) -> None:
+        """
+        @entries: (<key>, <values>) pairs to add
+        """
+
+        keys = self.keys
+        if self._connection is not None:
+            before = self._connection.total_changes
+            entries = [entry for entry in entries if keys is None or entry[0] in keys]
+            self._insert(entries)
+            added = self._connection.total_changes - before
+            self.duplicates += len(entries) - added
+            self._count += added
+            return
+
+        index = self._entries
+        for key, values in entries:
+            if keys is not None and key not in keys:
+                continue
+            if key in index:
+                self.duplicates += 1
+                continue
+            index[key] = values
+            self._count += 1
+            self.size += self._entry_size(key, values)
+
+        if self.size > self.memory_budget:
+            # Drop the entries nothing will look up before moving to disk
+            if self._get_keys is not None and self.keys is None:
+                self.restrict(self._get_keys())
+            if self.size > self.memory_budget:
+                self._spill()
+        return
+
+    def get_many(self, keys) -> dict:
+        """
+        @keys: Keys to look up
+        @return: The values of the keys that are in the index (In the format {<key>: <values>})
+        """
+
+        if self._connection is None:
+            index = self._entries
+            return {key: index[key] for key in set(keys) if key in index}
+
+        found = {}
+        unique_keys = [_to_value(key) for key in set(keys)]
+        for start in range(0, len(unique_keys), self._MAX_PARAMS):
+            chunk = unique_keys[start:start + self._MAX_PARAMS]
+            query = f"SELECT key, value FROM entries WHERE key IN ({', '.join('?' * len(chunk))})"
+            for key, value in self._connection.execute(query, chunk):
+                found[key] = pickle.loads(value)
+        return found
+
+    def close(self) -> None:
+        """Remove the spilled index from disk"""
+
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+            os.remove(self.spill_path)
+        self._entries = {}
+        return
+
+def _get_key_set(features: str, key_field: str, query: str=None) -> set:
+    """
+    @features: The features to read
+    @key_field: The key field
+    @query: The query to filter the rows by (optional)
+    @return: Every key in the features
+    """
+
+    keys = set()
+    for batch in get_batches(features, [key_field], query, array_type="list"):
+        keys.update(batch[key_field])
+    keys.discard(None)
+    return keys
+
+def build_join_index(features: str, key_field: str, fields: list[str], query: str=None, keys: set=None,
+                     memory_budget: int=ftconstants.JOIN_MEMORY_BUDGET, get_keys=None) -> JoinIndex:
+    """
+    Builds a hash index of the values of some fields by a key field
+
+    @features: The features to index
+    @key_field: The key field
+    @fields: The fields to index the values of
+    @query: The query to filter the rows by (optional)
+    @keys: Only index these keys (optional)
+    @memory_budget: Maximum estimated size of the in-memory index in bytes
+    @get_keys: Function that returns the keys to index, only called if the index
+               passes the memory budget (see JoinIndex) (optional)
+    @return: The JoinIndex
+    """
+
+    index = JoinIndex(memory_budget, get_keys)
+    if keys is not None:
+        index.restrict(keys)
+    with Progressor("Indexing join table...") as progressor:
+        for batch in get_batches(features, [key_field] + list(fields), query, array_type="list"):
+            entries = zip(batch[key_field], zip(*[batch[field] for field in fields]))
+            index.add_many((key, values) for key, values in entries if key is not None)
+            progressor.step(len(batch))
+    return index
+
+def join_fields(target: str, target_key: str, join_table: str, join_key: str, fields: list[str],
+                target_fields: list[str]=None, keep_unmatched: bool=True, target_query: str=None,
+                join_query: str=None, memory_budget: int=ftconstants.JOIN_MEMORY_BUDGET,
+                edit_session: bool=True) -> dict:
+    """
+    Copies fields from a join table to a target by matching keys (a hash
+    join). The join table is indexed once and the target is streamed once
+    through update_columns, so only rows whose values change are written.
+    Nothing is counted first. If the index passes the memory budget, the
+    target's keys are read and only join rows with a key in the target are
+    kept, the index only moves to disk if it is still over the budget.
+
+    @target: The features to update
+    @target_key: The key field in the target
+    @join_table: The table to copy values from
+    @join_key: The key field in the join table
+    @fields: The fields to copy from the join table
+    @target_fields: The fields in the target to write to (default is the same names as fields)
+    @keep_unmatched: Keep the current values of target rows without a match, instead of setting them to null
+    @target_query: The query to filter the target rows by (optional)
+    @join_query: The query to filter the join table rows by (optional)
+    @memory_budget: Maximum estimated size of the in-memory index in bytes, the index is
+                    moved to disk past it
+    @edit_session: Make the updates in an edit session (geodatabases only, see update_columns())
+    @return: Join stats (In the format {"indexed", "duplicates", "spilled", "scanned", "matched",
+             "unmatched", "changed", "seconds", "rows_per_second"})
+
+    Usage:
+    >>> stats = join_fields(<parcels>, "APN", <assessor table>, "APN", ["OWNER", "VALUE"])
+    """
+
+    target_fields = list(target_fields or fields)
+    start = time.perf_counter()
+
+    # The target's keys are only read if the whole join table doesn't fit in the budget
+    index = build_join_index(join_table, join_key, fields, join_query, memory_budget = memory_budget,
+                             get_keys = lambda: _get_key_set(target, target_key, target_query))
+    stats = {"indexed": len(index), "duplicates": index.duplicates, "spilled": index.spilled, "matched": 0}
+
+    def transform(batch: Batch) -> dict:
+        found = index.get_many(batch[target_key])
+        stats["matched"] += sum(1 for key in batch[target_key] if key in found)
+
+        columns = {}
+        for i, field in enumerate(target_fields):
+            current = batch[field]
+            columns[field] = [found[key][i] if key in found else (current[j] if keep_unmatched else None)
+                              for j, key in enumerate(batch[target_key])]
+        return columns
+
+    try:
+        update_stats = update_columns(target, target_fields, transform, key_field=target_key,
+                                      query=target_query, edit_session=edit_session)
+    finally:
+        index.close()
+
+    stats.update(scanned = update_stats["scanned"],
+                 unmatched = update_stats["scanned"] - stats["matched"],
+                 changed = update_stats["changed"],
+                 seconds = time.perf_counter() - start)
+    stats["rows_per_second"] = stats["scanned"] / stats["seconds"] if stats["seconds"] else 0.0
+    return stats
+
+def insert_rows(features:str, fields: list[str], rows: list[list], query: str=None, progress_total: int=None) -> int:
     """
     Inserts the rows into the feature class
     
     @features: The feature class to insert the rows into
     @fields: The fields to insert
     @query: The query to filter the rows by (optional)
-    @rows: The rows to insert
+    @rows: The rows to insert (any iterable of rows)
+    @progress_total: Number of rows expected, shows a step progressor if given (optional)
     @return: count of rows inserted
     
     Usage:
@@ -183,14 +1018,98 @@ def insert_rows(features:str, fields: list[str], rows: list[list], query: str=No
     """
     
     row_count = 0
+    progressor = Progressor("Inserting rows...", progress_total) if progress_total else None
     
-    with arcpy.da.InsertCursor(features, fields, query) as cursor:
+    with profiler.span("insert rows") as span, arcpy.da.InsertCursor(features, fields, query) as cursor:
         for row in rows:
             cursor.insertRow(row)
             row_count += 1
+            if progressor: progressor.step()
+        span.add(rows=row_count)
+
+    if progressor: progressor.close()
     
     return row_count #len(rows)
 
+def insert_columns(features: str, columns: dict, progress_total: int=None) -> int:
+    """
+    Inserts column arrays into an existing feature class
+
+    @features: The feature class to insert the rows into
+    @columns: Dictionary of columns (In the format {<field>: <column>})
+    @progress_total: Number of rows expected, updates the step progressor if given (optional)
+    @return: count of rows inserted
+
+    Usage:
+    >>> insert_columns(<features>, {<field>: [<value>, <value>], <field>: [<value>, <value>]})
+    """
+
+    return insert_rows(features, list(columns), zip(*columns.values()), progress_total=progress_total)
+
+# Field types used to create tables from NumPy types
+_FIELD_TYPES = {"U": "TEXT", "i": "LONG", "f": "DOUBLE"}
+
+def create_table(table: str, dtypes: dict) -> str:
+    """
+    Creates a new empty table with a field for each NumPy type, replacing
+    the table if it exists and overwriteOutput is set
+
+    @table: Path of the table to create
+    @dtypes: NumPy type of each field (In the format {<field>: <type>}),
+             "U<length>" for text, "i4" for long integers or "f8" for doubles
+    @return: Path of the table
+
+    Usage:
+    >>> create_table(<table>, {"NAME": "U10", "COUNT": "i4"})
+    >>> insert_rows(<table>, ["NAME", "COUNT"], <rows>)
+    """
+
+    if arcpy.env.overwriteOutput and arcpy.Exists(table):
+        arcpy.management.Delete(table)
+
+    t_path, t_name = os.path.split(table)
+    arcpy.management.CreateTable(t_path, t_name)
+    for field, dtype in dtypes.items():
+        kind, size = dtype[0], dtype[1:]
+        arcpy.management.AddField(table, field, _FIELD_TYPES[kind], field_length = int(size) if kind == "U" else None)
+    mark_schema_changed()
+    return table
+
+def write_table(table: str, columns: dict, dtypes: dict) -> int:
+    """
+    Creates a new table and writes column arrays to it in one go. The table is
+    written with arcpy.da.NumPyArrayToTable, or created field by field and
+    filled with an insert cursor if NumPy is not available.
+
+    @table: Path of the table to create
+    @columns: Dictionary of columns (In the format {<field>: <column>})
+    @dtypes: NumPy type of each column (In the format {<field>: <type>}),
+             "U<length>" for text, "i4" for long integers or "f8" for doubles
+    @return: count of rows written
+
+    Usage:
+    >>> columns = {"NAME": ["a", "b"], "COUNT": [1, 2]}
+    >>> write_table(<table>, columns, {"NAME": "U10", "COUNT": "i4"})
+    """
+
+    num_rows = len(next(iter(columns.values()), []))
+
+    # NumPyArrayToTable doesn't respect overwriteOutput
+    if arcpy.env.overwriteOutput and arcpy.Exists(table):
+        arcpy.management.Delete(table)
+
+    if np is not None:
+        with profiler.span("write table", rows=num_rows):
+            out_array = np.empty(num_rows, dtype=[(field, dtypes[field]) for field in columns])
+            for field, column in columns.items():
+                out_array[field] = column
+            arcpy.da.NumPyArrayToTable(out_array, table)
+        mark_schema_changed()
+        return num_rows
+
+    create_table(table, {field: dtypes[field] for field in columns})
+    return insert_columns(table, columns, progress_total=num_rows)
+
 # Probably be good to add some error checking to this. Maybe check to see if workplace exists
 def create_scratch_name(data_type: str, prefix: str="scratch", suffix: str="", workspace: str=None, name_list: list[str]=None) -> str:
     """
@@ -239,6 +1158,37 @@ def delete_scratch_names(scratch_names: list[str]) -> list[str]:
 
     return cant_delete
 
+def format_entries(entries, key_padding: int, per_line: int=1, tab_padding: str="", values: bool=True,
+                   value_width: int=0):
+    """
+    Formats (<key>, <value>) pairs into lines of aligned entries. Lines are
+    built as they are read, so any number of entries can be streamed.
+
+    @entries: Iterable of (<key>, <value>) pairs
+    @key_padding: Width keys are padded to
+    @per_line: Number of entries on each line
+    @tab_padding: Text at the start of each line
+    @values: Include the values ("<key>: <value>"), or only the keys
+    @value_width: Width values are padded to
+    @yield: Each line, without a newline
+
+    Usage:
+    >>> for line in format_entries(<counts>.items(), 12, per_line=5, value_width=10):
+    >>>     print(line)
+    """
+
+    line = []
+    for key, value in entries:
+        if values:
+            line.append(f"{str(key).ljust(key_padding)}: {str(value).ljust(value_width)}")
+        else:
+            line.append(f"{str(key).ljust(key_padding)}    ")
+        if len(line) == per_line:
+            yield tab_padding + "".join(line)
+            line = []
+    if line:
+        yield tab_padding + "".join(line)
+
 def print_dict(dict_to_print: dict, tab_num: int = 0, tab: str = ftconstants.TAB) -> str:
     """
     Pretty print a dictionary.
@@ -248,12 +1198,9 @@ def print_dict(dict_to_print: dict, tab_num: int = 0, tab: str = ftconstants.TAB
     """
 
     key_padding = len(max([str(k) for k in dict_to_print.keys()], key = len)) + 1
-    tab_padding = tab * tab_num
 
     # Could make this recursive to print nested dictionaries
-    dict_string = [f"{tab_padding}{k:<{key_padding}}: {v}\n" for k, v in dict_to_print.items()]
-    
-    return "".join(dict_string)
+    return "".join(f"{line}\n" for line in format_entries(dict_to_print.items(), key_padding, tab_padding = tab * tab_num))
 
 # def print_layout(layout=None, page_name:str="LAYOUT", quality:str="BEST", resolution:int=300, is_mapseries:bool=False):
 #     """
@@ -0,0 +1,118 @@
+"""
+Persistent key/value cache stored in a SQLite database. Use this for
+results from slow sources (REST services, large scans) that rarely change,
+so they can be served instantly in later sessions.
+"""
+
+import json
+import os
+import sqlite3
+import time
+import zlib
+from contextlib import contextmanager
+
+import utils.constants.ftconstants as ftconstants
+
+def get_cache_path(folder: str) -> str:
+    """
+    Gets the path of the FlickTools cache database in a folder
+
+    @folder: The folder to keep the cache in (usually the project home folder)
+    @return: Path to the cache database
+    """
+
+    return os.path.join(folder, ftconstants.CACHE_NAME)
+
+class Cache(object):
+    """
+    Key/value cache in a table of a SQLite database. Values are anything that
+    can be written as JSON and are stored compressed.
+
+    @path: Path to the SQLite database (created if it doesn't exist)
+    @table: Name of the table to keep the entries in
+    @ttl: Number of seconds before an entry is considered stale
+    @max_entries: Maximum number of entries kept, least recently used
+                  entries are removed first
+
+    Usage:
+    >>> cache = Cache(get_cache_path(<folder>), "my_table")
+    >>> value = cache.get(<key>)
+    >>> if value is None:
+    >>>     value = <slow lookup>
+    >>>     cache.set(<key>, value)
+    """
+
+    def __init__(self, path: str, table: str, ttl: float=ftconstants.CACHE_TTL, max_entries: int=ftconstants.CACHE_MAX_ENTRIES) -> None:
+        self.path = path
+        self.table = table
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        with self._connect() as connection:
+            connection.execute(f"CREATE TABLE IF NOT EXISTS {self.table} "
+                               "(key TEXT PRIMARY KEY, value BLOB, created REAL, accessed REAL)")
+        return
+
+    @contextmanager
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection that commits and closes when the block ends"""
+
+        connection = sqlite3.connect(self.path, timeout=5)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def get(self, key: str, allow_stale: bool=False) -> object:
+        """
+        @key: The key to look up
+        @allow_stale: Return the entry even if it is older than the ttl
+        @return: The cached value, or None if there isn't a usable entry
+        """
+
+        with self._connect() as connection:
+            entry = connection.execute(f"SELECT value, created FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            if entry is None:
+                return None
+
+            value, created = entry
+            now = time.time()
+            if not allow_stale and now - created > self.ttl:
+                return None
+
+            connection.execute(f"UPDATE {self.table} SET accessed = ? WHERE key = ?", (now, key))
+
+        return json.loads(zlib.decompress(value))
+
+    def set(self, key: str, value: object) -> None:
+        """
+        @key: The key to store the value under
+        @value: The value to store
+        """
+
+        now = time.time()
+        blob = zlib.compress(json.dumps(value).encode("utf-8"))
+        with self._connect() as connection:
+            connection.execute(f"INSERT OR REPLACE INTO {self.table} VALUES (?, ?, ?, ?)", (key, blob, now, now))
+
+            # Drop least recently used entries beyond the size limit
+            connection.execute(f"DELETE FROM {self.table} WHERE key IN "
+                               f"(SELECT key FROM {self.table} ORDER BY accessed DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
+        return
+
+    def delete(self, key: str) -> None:
+        """
+        @key: The key to remove
+        """
+
+        with self._connect() as connection:
+            connection.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+        return
+
+    def clear(self) -> None:
+        """Remove every entry in the table"""
+
+        with self._connect() as connection:
+            connection.execute(f"DELETE FROM {self.table}")
+        return
@@ -1,4 +1,28 @@
 TAB = "    "
+BATCH_SIZE = 50000
+PROGRESS_INTERVAL = 0.5
+MESSAGE_INTERVAL = 1.0
+CACHE_NAME = "FlickToolsCache.sqlite"
+CACHE_TTL = 30 * 24 * 60 * 60
+CACHE_MAX_ENTRIES = 1000
+PLSS_INDEX_NAME = "PLSSIndex.sqlite"
+PLSS_WKID = 4326
+REST_TIMEOUT = (5, 30)
+REST_RETRIES = 3
+REST_BACKOFF = 0.5
+SQL_MAX_TERMS = 1000
+WORKSPACE_STAMP_TTL = 10 * 60
+CATALOG_NAME = "FlickToolsCatalog.sqlite"
+CRAWL_WORKERS = 8
+SCHEMA_STAMP_INTERVAL = 5.0
+JOIN_MEMORY_BUDGET = 512 * 1024 * 1024
+PROFILE_LOG_NAME = "FlickToolsProfile.jsonl"
+PROFILE_TOP_FUNCTIONS = 15
+UNIQUE_VALUES_SPILL_LIMIT = 1000000
+SPILL_MAX_RUNS = 64
+SPILL_BLOCK_SIZE = 10000
+MESSAGE_PAGE_SIZE = 64 * 1024
+UNIQUE_VALUES_MAX_LISTED = 0
 STATES = {
     'Alabama':'AL','Alaska':'AK','Arizona':'AZ','Arkansas':'AR','California':'CA','Colorado':'CO','Connecticut':'CT','Delaware':'DE','Florida':'FL','Georgia':'GA',
     'Hawaii':'HI','Idaho':'ID','Illinois':'IL','Indiana':'IN','Iowa':'IA','Kansas':'KS','Kentucky':'KY','Louisiana':'LA','Maine':'ME','Maryland':'MD',
@@ -0,0 +1,169 @@
+"""
+Concurrent search for file geodatabases. Directories are listed by a pool
+of threads (listing is I/O bound, so threads overlap the waits on network
+drives), .gdb folders are never descended into, and results are yielded as
+soon as they are found.
+
+A catalog database can be given to remember what each directory contained.
+Directories whose modification time hasn't changed since the last crawl are
+not listed again; only their subdirectories are checked.
+"""
+
+import json
+import os
+import sqlite3
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+
+import utils.constants.ftconstants as ftconstants
+
+def is_database(path: str) -> bool:
+    """
+    @path: Path of a directory
+    @return: True if the directory is a file geodatabase
+    """
+
+    return path.lower().endswith(".gdb")
+
+def _scan_directory(path: str, known: tuple=None) -> tuple:
+    """
+    Lists the geodatabases and subdirectories in a directory.
+
+    @path: Directory to list
+    @known: (<mtime>, <databases>, <subdirectories>) from the last crawl (optional)
+    @return: (<mtime>, <databases>, <subdirectories>), the known contents are
+             reused if the directory hasn't changed
+    """
+
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None, [], []
+
+    if known is not None and known[0] == mtime:
+        return known
+
+    databases, subdirectories = [], []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if not entry.is_dir(follow_symlinks=False):
+                        continue
+                except OSError:
+                    continue
+                if is_database(entry.name):
+                    databases.append(entry.path)
+                else:
+                    subdirectories.append(entry.path)
+    except OSError:
+        pass
+
+    return mtime, databases, subdirectories
+
+class CrawlCatalog(object):
+    """
+    Contents of each crawled directory in a SQLite database
+
+    @path: Path to the catalog database (created if it doesn't exist)
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+        with self._connect() as connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS directories "
+                               "(path TEXT PRIMARY KEY, mtime INTEGER, databases TEXT, subdirectories TEXT)")
+        return
+
+    @contextmanager
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection that commits and closes when the block ends"""
+
+        connection = sqlite3.connect(self.path, timeout=5)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def load(self, location: str) -> dict:
+        """
+        @location: Top directory of a crawl
+        @return: Known directories under the location
+                 (In the format {<path>: (<mtime>, <databases>, <subdirectories>)})
+        """
+
+        prefix = os.path.join(location, "")
+        with self._connect() as connection:
+            rows = connection.execute("SELECT path, mtime, databases, subdirectories FROM directories "
+                                      "WHERE path = ? OR substr(path, 1, ?) = ?",
+                                      (location, len(prefix), prefix)).fetchall()
+        return {path: (mtime, json.loads(databases), json.loads(subdirectories))
+                for path, mtime, databases, subdirectories in rows}
+
+    def save(self, location: str, directories: dict, complete: bool) -> None:
+        """
+        @location: Top directory of the crawl
+        @directories: Directories seen in the crawl
+                      (In the format {<path>: (<mtime>, <databases>, <subdirectories>)})
+        @complete: The whole location was crawled, so directories that weren't seen are removed
+        """
+
+        prefix = os.path.join(location, "")
+        with self._connect() as connection:
+            if complete:
+                connection.execute("DELETE FROM directories WHERE path = ? OR substr(path, 1, ?) = ?",
+                                   (location, len(prefix), prefix))
+            connection.executemany("INSERT OR REPLACE INTO directories VALUES (?, ?, ?, ?)",
+                                   [(path, mtime, json.dumps(databases), json.dumps(subdirectories))
+                                    for path, (mtime, databases, subdirectories) in directories.items()
+                                    if mtime is not None])
+        return
+
+def crawl_databases(location: str, workers: int=ftconstants.CRAWL_WORKERS, catalog_path: str=None) -> str:
+    """
+    Finds every file geodatabase under a directory
+
+    @location: The directory to search
+    @workers: Number of directories listed at the same time
+    @catalog_path: Catalog database used to skip unchanged directories (optional)
+    @yield: Path of each geodatabase, in the order they are found
+
+    Usage:
+    >>> for database in crawl_databases(<folder>, catalog_path=<catalog>):
+    >>>     print(database)
+    """
+
+    location = os.path.normpath(location)
+    if is_database(location):
+        yield location
+        return
+
+    catalog = CrawlCatalog(catalog_path) if catalog_path else None
+    known = catalog.load(location) if catalog else {}
+    seen = {}
+    complete = False
+
+    executor = ThreadPoolExecutor(max_workers=max(workers, 1))
+    try:
+        pending = {executor.submit(_scan_directory, location, known.get(location)): location}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = pending.pop(future)
+                mtime, databases, subdirectories = future.result()
+                seen[path] = (mtime, databases, subdirectories)
+
+                for subdirectory in subdirectories:
+                    pending[executor.submit(_scan_directory, subdirectory, known.get(subdirectory))] = subdirectory
+                yield from databases
+        complete = True
+    finally:
+        # Don't wait for directories nobody will read if the caller stopped early
+        executor.shutdown(wait=complete, cancel_futures=True)
+
+        # Remember what was seen, even if the caller stopped early
+        if catalog is not None:
+            catalog.save(location, seen, complete)
+    return
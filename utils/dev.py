@@ -3,6 +3,14 @@ A general purpose module for any backend related functions
 put functions that have to do with managing the toolbox or error handling here
 """
 
+import importlib
+import json
+import os
+from traceback import format_exc
+
+# Tools listed in the toolbox, in order
+MANIFEST = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tools", "manifest.json")
+
 def buildDevError(label: str, desc: str):
     class Development(object):
         def __init__(self):
@@ -13,4 +21,145 @@ def buildDevError(label: str, desc: str):
             self.alias = self.label.replace(" ", "")
             self.description = desc
             return
-    return Development
\ No newline at end of file
+    return Development
+
+def isDevMode() -> bool:
+    """
+    Dev mode reloads every module each time the toolbox is loaded, so code
+    changes show up without restarting ArcGIS Pro. Turn it on by setting the
+    FLICKTOOLS_DEV environment variable to 1.
+
+    @return: True if dev mode is on
+    """
+
+    return os.environ.get("FLICKTOOLS_DEV", "").lower() in ["1", "true", "yes"]
+
+def importTool(module_name: str, class_name: str, label: str, reload: bool=False):
+    """
+    Imports a tool class, or builds a placeholder tool with the traceback if
+    the import fails
+
+    @module_name: Module that contains the tool
+    @class_name: Name of the tool class
+    @label: Tool label used for the placeholder
+    @reload: Reload the module if it is already imported
+    @return: The tool class
+    """
+
+    try:
+        module = importlib.import_module(module_name)
+        if reload: module = importlib.reload(module)
+        return getattr(module, class_name)
+    except (ImportError, AttributeError):
+        return buildDevError(label, format_exc())
+
+def buildLazyTool(module_name: str, class_name: str, label: str, category: str, description: str, reload: bool=False):
+    """
+    Builds a stand-in tool class that describes the tool from the manifest and
+    only imports the real tool the first time one of its methods is used.
+
+    @module_name: Module that contains the tool
+    @class_name: Name of the tool class (also used as the tool name)
+    @label: Tool label
+    @category: Tool category
+    @description: Tool description
+    @reload: Reload the module when it is imported
+    @return: The stand-in tool class
+    """
+
+    class LazyTool(object):
+        def __init__(self):
+            """Describes the tool without importing it"""
+
+            self.label = label
+            self.alias = class_name
+            self.category = category
+            self.description = description
+            self.canRunInBackground = False
+            self._tool = None
+            return
+
+        def _load(self):
+            """Create the real tool the first time it is needed"""
+            if self._tool is None:
+                self._tool = importTool(module_name, class_name, label, reload)()
+                if self._failed():
+                    # Show the placeholder's category and traceback instead of the manifest's
+                    self.category = self._tool.category
+                    self.description = self._tool.description
+            return self._tool
+
+        def _failed(self) -> bool:
+            """The import failed and the real tool is a development placeholder"""
+            return getattr(self._tool, "execute", None) is None
+
+        def _call(self, method: str, default, *args):
+            """Call a method on the real tool, development placeholders don't have any"""
+            function = getattr(self._load(), method, None)
+            return function(*args) if function else default
+
+        def __getattr__(self, name: str):
+            # Only called for attributes the stand-in doesn't have itself
+            if name.startswith("__") or name == "_tool":
+                raise AttributeError(name)
+            return getattr(self._load(), name)
+
+        def getParameterInfo(self) -> list:
+            return self._call("getParameterInfo", [])
+
+        def isLicensed(self) -> bool:
+            return self._call("isLicensed", True)
+
+        def updateParameters(self, parameters: list) -> None:
+            return self._call("updateParameters", None, parameters)
+
+        def updateMessages(self, parameters: list) -> None:
+            return self._call("updateMessages", None, parameters)
+
+        def execute(self, parameters: list, messages: list) -> None:
+            tool = self._load()
+            if self._failed():
+                if messages is not None:
+                    messages.addErrorMessage(tool.description)
+                raise RuntimeError(f"{label} failed to import:\n{tool.description}")
+            return tool.execute(parameters, messages)
+
+        def postExecute(self, parameters: list) -> None:
+            return self._call("postExecute", None, parameters)
+
+    LazyTool.__name__ = LazyTool.__qualname__ = class_name
+    return LazyTool
+
+def loadTools(manifest: str=MANIFEST, reload: bool=False) -> list:
+    """
+    Builds a lazily imported tool class for each tool in the manifest
+
+    @manifest: Path to the tool manifest (a JSON list of tools with module,
+               class, label, category and description keys)
+    @reload: Reload tool modules when they are imported
+    @return: A list of tool classes
+    """
+
+    with open(manifest) as manifest_file:
+        entries = json.load(manifest_file)
+
+    return [buildLazyTool(e["module"], e["class"], e["label"], e.get("category", "Unassigned"), e.get("description", ""), reload)
+            for e in entries]
+
+def getToolClass(name: str, manifest: str=MANIFEST):
+    """
+    Imports a tool class from the manifest by its class name or label
+
+    @name: Class name or label of the tool
+    @manifest: Path to the tool manifest
+    @raises KeyError: If the tool isn't in the manifest
+    @return: The tool class
+    """
+
+    with open(manifest) as manifest_file:
+        entries = json.load(manifest_file)
+
+    for e in entries:
+        if name in [e["class"], e["label"]]:
+            return getattr(importlib.import_module(e["module"]), e["class"])
+    raise KeyError(f"{name} is not in the tool manifest")
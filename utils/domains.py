@@ -0,0 +1,229 @@
+"""
+Cached attribute domain lookups. Listing the domains of a workspace is slow
+on enterprise geodatabases, so the domains of each workspace are kept in
+memory (and optionally in a Cache) until the workspace's modification stamp
+changes.
+"""
+
+import sqlite3
+from array import array
+from datetime import datetime
+
+import arcpy
+
+import utils.arcpy_tools as archelp
+from utils.arcpy_tools import get_workspace_stamp, np
+from utils.cache import Cache
+
+# Domains of each workspace (In the format {<workspace>: (<stamp>, {<domain name>: <domain>})})
+_domains = {}
+
+# Fields of the domain report, in output order
+REPORT_FIELDS = ["DATASET", "FIELD_NAME", "FIELD_ALIAS", "FIELD_TYPE", "NULLABLE",
+                 "DOMAIN", "DOMAIN_TYPE", "CODED_VALUES", "RANGE_MIN", "RANGE_MAX"]
+
+def _json_value(value) -> object:
+    """
+    @value: Coded value or range value of a domain
+    @return: The value, or its text if it can't be written as JSON (dates)
+    """
+
+    return value if value is None or isinstance(value, (str, int, float)) else str(value)
+
+def _domain_to_dict(domain) -> dict:
+    """
+    @domain: arcpy.da.Domain
+    @return: Domain as a dictionary that can be written as JSON
+    """
+
+    return {"name": domain.name,
+            "type": domain.domainType,
+            "field_type": domain.type,
+            "description": domain.description,
+            # Coded values are kept as pairs so numeric codes survive JSON
+            "coded_values": [[_json_value(code), desc] for code, desc in (domain.codedValues or {}).items()],
+            "range": [_json_value(v) for v in domain.range] if domain.domainType == "Range" else None}
+
+def get_domains(workspace: str, cache: Cache=None) -> dict:
+    """
+    Gets the domains of a workspace, listing them only if the workspace
+    changed since they were last listed.
+
+    @workspace: Path of the workspace
+    @cache: Persistent cache to share the domains between sessions (optional),
+            skipped if the cache database is locked or unreadable
+    @return: Domains (In the format {<domain name>: {"name", "type", "field_type", "description", "coded_values", "range"}})
+    """
+
+    # Workspaces that aren't on disk can't be checked for changes, so they're never cached
+    stamp = get_workspace_stamp(workspace)
+    if stamp is None:
+        return {d.name: _domain_to_dict(d) for d in arcpy.da.ListDomains(workspace)}
+
+    cached = _domains.get(workspace)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    key = f"{workspace}|{stamp}"
+    domains = None
+    if cache is not None:
+        try:
+            domains = cache.get(key)
+        except sqlite3.Error:
+            # Another session holds the database, don't wait on it again to store the domains
+            cache = None
+
+    if domains is None:
+        domains = {d.name: _domain_to_dict(d) for d in arcpy.da.ListDomains(workspace)}
+        if cache is not None:
+            try:
+                cache.set(key, domains)
+            except sqlite3.Error:
+                pass
+
+    _domains[workspace] = (stamp, domains)
+    return domains
+
+def clear_domains(workspace: str=None) -> None:
+    """
+    @workspace: Workspace to forget the domains of, or None for every workspace
+    """
+
+    if workspace is None:
+        _domains.clear()
+    else:
+        _domains.pop(workspace, None)
+    return
+
+def field_report(dataset: str, fields: list, domains: dict) -> list[dict]:
+    """
+    Builds a report row for each field of a dataset
+
+    @dataset: Name of the dataset
+    @fields: arcpy Field objects
+    @domains: Domains of the dataset's workspace (from get_domains())
+    @return: Report rows (In the format {<REPORT_FIELDS field>: <value>})
+    """
+
+    rows = []
+    for field in fields:
+        domain = domains.get(field.domain) if field.domain else None
+        value_range = (domain or {}).get("range") or [None, None]
+        rows.append({"DATASET": dataset,
+                     "FIELD_NAME": field.name,
+                     "FIELD_ALIAS": field.aliasName,
+                     "FIELD_TYPE": field.type,
+                     "NULLABLE": str(field.isNullable),
+                     "DOMAIN": domain["name"] if domain else "",
+                     "DOMAIN_TYPE": domain["type"] if domain else "",
+                     "CODED_VALUES": len(domain["coded_values"]) if domain else 0,
+                     "RANGE_MIN": value_range[0],
+                     "RANGE_MAX": value_range[1]})
+    return rows
+
+def domain_report(workspace: str, cache: Cache=None) -> list[dict]:
+    """
+    Reports the domain of every field of every feature class and table in a
+    geodatabase. Domains are listed once for the whole report.
+
+    @workspace: Path of the geodatabase
+    @cache: Persistent cache for the domains (optional)
+    @return: Report rows (In the format {<REPORT_FIELDS field>: <value>})
+    """
+
+    domains = get_domains(workspace, cache)
+
+    datasets = {name: path for name, path, datatype in archelp.list_datasets(workspace)}
+
+    rows = []
+    for name, path in sorted(datasets.items()):
+        rows.extend(field_report(name, arcpy.ListFields(path), domains))
+    return rows
+
+def _domain_value(value, field_type: str) -> object:
+    """
+    @value: Coded value or range value from get_domains()
+    @field_type: Type of the field the domain is checked against
+    @return: The value as the type stored in the field (dates are cached as text)
+    """
+
+    if field_type == "Date" and isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return value
+
+class DomainValidator(object):
+    """
+    Counts the values in each field that aren't allowed by the field's
+    domain. Columns packed into numpy arrays are checked with numpy.isin and
+    vectorized comparisons, other columns with set lookups. Nulls are never
+    violations.
+
+    @fields: Fields to check (In the format {<field>: (<field type>, <domain>)})
+             with domains from get_domains()
+    @max_oids: Maximum number of offending OIDs to keep for each field
+               (None keeps every OID)
+
+    Usage:
+    >>> validator = DomainValidator({"STATUS": ("SmallInteger", domains["Status"])})
+    >>> for batch in archelp.get_batches(<features>, ["OID@", "STATUS"]):
+    >>>     validator.update(batch)
+    >>> print(validator.counts, validator.oids)
+    """
+
+    def __init__(self, fields: dict, max_oids: int=None) -> None:
+        self.max_oids = max_oids
+        self.num_rows = 0
+        self.counts = {field: 0 for field in fields}
+        self.oids = {field: array("q") for field in fields}
+
+        # Allowed codes, or (min, max) of range domains
+        self._checks = {}
+        for field, (field_type, domain) in fields.items():
+            if domain["type"] == "CodedValue":
+                codes = [_domain_value(code, field_type) for code, desc in domain["coded_values"]]
+                self._checks[field] = ("coded", set(codes), codes)
+            else:
+                low, high = (_domain_value(v, field_type) for v in domain["range"])
+                self._checks[field] = ("range", low, high)
+        return
+
+    def _violations(self, field: str, column) -> object:
+        """
+        @field: Field of the column
+        @column: Column of values
+        @return: Boolean mask (numpy) or list of positions of the values that violate the domain
+        """
+
+        kind, first, second = self._checks[field]
+        if np is not None and isinstance(column, np.ndarray):
+            if kind == "coded":
+                return ~np.isin(column, second)
+            return (column < first) | (column > second)
+
+        if kind == "coded":
+            return [i for i, value in enumerate(column) if value is not None and value not in first]
+        return [i for i, value in enumerate(column) if value is not None and not (first <= value <= second)]
+
+    def update(self, batch: archelp.Batch, oid_field: str="OID@") -> None:
+        """
+        Check the values in a batch.
+
+        @batch: Batch with an OID column and a column for each field
+        @oid_field: Name of the OID column
+        """
+
+        oids = batch[oid_field]
+        for field in self.counts:
+            violations = self._violations(field, batch[field])
+            if np is not None and isinstance(violations, np.ndarray):
+                bad_oids = np.asarray(oids)[violations]
+            else:
+                bad_oids = [oids[i] for i in violations]
+
+            self.counts[field] += len(bad_oids)
+            room = len(bad_oids) if self.max_oids is None else self.max_oids - len(self.oids[field])
+            if room > 0:
+                self.oids[field].extend(int(oid) for oid in bad_oids[:room])
+
+        self.num_rows += len(batch)
+        return
@@ -0,0 +1,193 @@
+"""
+External sort for counts that don't fit in memory. Counts are spilled to
+temporary files as sorted runs, and the runs are read back a block at a time
+and combined with a k-way merge, so only one block of each run is in memory
+while the sorted output is streamed.
+"""
+
+import heapq
+import os
+import pickle
+import tempfile
+from operator import itemgetter
+
+import utils.constants.ftconstants as ftconstants
+
+# Marks that no key has been merged yet (None is a valid key)
+_NO_KEY = object()
+
+class SortedRuns(object):
+    """
+    Sorted (<key>, <count>) runs in temporary files. Keys must be sortable
+    against each other. The run files can be passed to another process
+    (the object pickles as its list of paths), whoever ends up with them
+    calls close() to remove them.
+
+    @temp_dir: Folder to write the runs to (default is the system temp folder)
+    @max_runs: Number of runs kept before the smaller half of them are merged
+               into one, so a merge never has more than max_runs files open.
+               Runs grow geometrically, so each entry is rewritten about
+               log(count / spill size, max_runs / 2) times
+    @block_size: Number of entries written and read at a time. A merge holds
+                 one block of each run, so memory is about max_runs * block_size
+                 entries (use block_for()) on top of the counts being merged
+
+    Usage:
+    >>> runs = SortedRuns()
+    >>> runs.spill({"a": 2, "b": 1})
+    >>> runs.spill({"a": 1})
+    >>> list(runs.merge({"c": 4}))
+    >>> [("a", 3), ("b", 1), ("c", 4)]
+    >>> runs.close()
+    """
+
+    def __init__(self, temp_dir: str=None, max_runs: int=ftconstants.SPILL_MAX_RUNS,
+                 block_size: int=ftconstants.SPILL_BLOCK_SIZE) -> None:
+        self.temp_dir = temp_dir
+        self.max_runs = max_runs
+        self.block_size = block_size
+        self.paths = []
+        self.sizes = []
+        return
+
+    @staticmethod
+    def block_for(memory_limit: int, max_runs: int=ftconstants.SPILL_MAX_RUNS) -> int:
+        """
+        @memory_limit: Number of entries a merge may hold in memory
+        @max_runs: Number of runs kept before merging
+        @return: Block size that keeps a merge of max_runs runs within memory_limit entries
+        """
+
+        return max(1, int(memory_limit) // max_runs)
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def _write(self, entries) -> tuple[str, int]:
+        """
+        @entries: Sorted (<key>, <count>) pairs
+        @return: (<path of the new run>, <number of entries>)
+        """
+
+        handle, path = tempfile.mkstemp(prefix="FlickToolsSort_", suffix=".run", dir=self.temp_dir)
+        size = 0
+        try:
+            with os.fdopen(handle, "wb") as run_file:
+                block = []
+                for entry in entries:
+                    block.append(entry)
+                    if len(block) >= self.block_size:
+                        pickle.dump(block, run_file, pickle.HIGHEST_PROTOCOL)
+                        size += len(block)
+                        block = []
+                if block:
+                    pickle.dump(block, run_file, pickle.HIGHEST_PROTOCOL)
+                    size += len(block)
+        except BaseException:
+            os.remove(path)
+            raise
+        return path, size
+
+    def _read(self, path: str):
+        """
+        @path: Path of a run
+        @yield: The run's (<key>, <count>) pairs in order
+        """
+
+        with open(path, "rb") as run_file:
+            while True:
+                try:
+                    block = pickle.load(run_file)
+                except EOFError:
+                    return
+                yield from block
+
+    def spill(self, counts: dict) -> None:
+        """
+        Writes counts to a new sorted run. Clear the counts after spilling them.
+
+        @counts: Counts to spill (In the format {<key>: <count>})
+        """
+
+        if not counts:
+            return
+        if len(self.paths) >= self.max_runs:
+            self._compact()
+        self._add(*self._write(sorted(counts.items())))
+        return
+
+    def _add(self, path: str, size: int) -> None:
+        self.paths.append(path)
+        self.sizes.append(size)
+        return
+
+    def _compact(self) -> None:
+        """Merge the smaller half of the runs into one run"""
+
+        order = sorted(range(len(self.paths)), key=self.sizes.__getitem__)
+        chosen = set(order[:max(2, len(order) // 2)])
+        merged = self._write(self._merge([self.paths[i] for i in chosen]))
+        for i in chosen:
+            os.remove(self.paths[i])
+        kept = [i for i in range(len(self.paths)) if i not in chosen]
+        self.paths = [self.paths[i] for i in kept]
+        self.sizes = [self.sizes[i] for i in kept]
+        self._add(*merged)
+        return
+
+    def extend(self, other: "SortedRuns") -> None:
+        """
+        Takes over the runs of another SortedRuns
+
+        @other: Runs to take, left empty
+        """
+
+        for path, size in zip(other.paths, other.sizes):
+            if len(self.paths) >= self.max_runs:
+                self._compact()
+            self._add(path, size)
+        other.paths, other.sizes = [], []
+        return
+
+    def merge(self, counts: dict=None):
+        """
+        Merges the runs (and any counts still in memory), adding up the counts
+        of keys that are in more than one run
+
+        @counts: Counts that weren't spilled (optional)
+        @return: Iterator of (<key>, <count>) pairs sorted by key, each key once
+        """
+
+        sources = [iter(sorted(counts.items()))] if counts else []
+        return self._merge(self.paths, sources)
+
+    def _merge(self, paths: list[str], sources: list=None):
+        """
+        @paths: Runs to merge
+        @sources: Other sorted (<key>, <count>) iterators to merge in (optional)
+        @yield: (<key>, <count>) pairs sorted by key, each key once
+        """
+
+        sources = [self._read(path) for path in paths] + (sources or [])
+
+        current_key, current_count = _NO_KEY, 0
+        for key, count in heapq.merge(*sources, key=itemgetter(0)):
+            if key == current_key:
+                current_count += count
+                continue
+            if current_key is not _NO_KEY:
+                yield current_key, current_count
+            current_key, current_count = key, count
+        if current_key is not _NO_KEY:
+            yield current_key, current_count
+
+    def close(self) -> None:
+        """Removes the run files"""
+
+        for path in self.paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.paths, self.sizes = [], []
+        return
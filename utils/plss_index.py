@@ -0,0 +1,239 @@
+"""
+Local index of PLSS township and section extents stored in a SQLite
+database. Extents are kept in a single spatial reference and projected to
+the map locally, so zooming to a township or section doesn't need a REST
+request once the index has an entry for it.
+
+The index can be built from a feature class or a saved REST query:
+    python -m utils.plss_index <index path> <feature class or .json file>
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+
+import arcpy
+
+import utils.constants.ftconstants as ftconstants
+
+# Attribute names used by the Oregon Department of Forestry PLSS service
+DEFAULT_FIELDS = {"twn": "Twn", "twn_char": "TwnChar", "rng": "Rng", "rng_char": "RngChar", "sec": "Section"}
+
+class PLSSIndex(object):
+    """
+    Township, range and section extents in a SQLite database
+
+    @path: Path to the index database (created if it doesn't exist)
+    @wkid: Spatial reference of new indexes. Existing indexes keep the
+           spatial reference they were built with
+
+    Usage:
+    >>> index = PLSSIndex(<path>)
+    >>> extent = index.lookup("1", "S", "2", "W", "12")
+    """
+
+    def __init__(self, path: str, wkid: int=ftconstants.PLSS_WKID) -> None:
+        self.path = path
+
+        with self._connect() as connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            connection.execute("CREATE TABLE IF NOT EXISTS plss "
+                               "(twn TEXT, twn_char TEXT, rng TEXT, rng_char TEXT, sec TEXT, "
+                               "xmin REAL, ymin REAL, xmax REAL, ymax REAL, "
+                               "PRIMARY KEY (twn, twn_char, rng, rng_char, sec))")
+            connection.execute("INSERT OR IGNORE INTO meta VALUES ('wkid', ?)", (str(wkid),))
+            self.wkid = int(connection.execute("SELECT value FROM meta WHERE key = 'wkid'").fetchone()[0])
+        return
+
+    @contextmanager
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection that commits and closes when the block ends"""
+
+        connection = sqlite3.connect(self.path, timeout=5)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def lookup(self, twn: str, twn_char: str, rng: str, rng_char: str, sec: str=None) -> tuple:
+        """
+        Gets the extent of a township or section. Township extents that
+        weren't indexed directly are built from the township's sections, but
+        only if the index was built from complete section data. Sections
+        cached one at a time from REST would give part of the township.
+
+        @twn: Township number
+        @twn_char: Township direction (N, S)
+        @rng: Range number
+        @rng_char: Range direction (E, W)
+        @sec: Section number, or None for the whole township
+        @return: (xmin, ymin, xmax, ymax) in the index spatial reference, or None
+        """
+
+        key = (str(twn), str(twn_char), str(rng), str(rng_char))
+        with self._connect() as connection:
+            extent = connection.execute("SELECT xmin, ymin, xmax, ymax FROM plss "
+                                        "WHERE twn = ? AND twn_char = ? AND rng = ? AND rng_char = ? AND sec = ?",
+                                        key + (str(sec or ""),)).fetchone()
+            if extent is None and not sec and self._isComplete(connection):
+                extent = connection.execute("SELECT MIN(xmin), MIN(ymin), MAX(xmax), MAX(ymax) FROM plss "
+                                            "WHERE twn = ? AND twn_char = ? AND rng = ? AND rng_char = ? AND sec != ''",
+                                            key).fetchone()
+
+        if extent is None or None in extent:
+            return None
+        return extent
+
+    def _isComplete(self, connection: sqlite3.Connection) -> bool:
+        """
+        @connection: Open index connection
+        @return: True if the index was built from complete PLSS data
+        """
+
+        row = connection.execute("SELECT value FROM meta WHERE key = 'complete'").fetchone()
+        return row is not None and row[0] == "1"
+
+    def add(self, rows, complete: bool=False) -> int:
+        """
+        Adds or replaces extents in the index.
+
+        @rows: Iterable of (twn, twn_char, rng, rng_char, sec, xmin, ymin, xmax, ymax)
+               rows, with sec as "" or None for township extents
+        @complete: The rows hold every section of their townships, so township
+                   extents can be built from the indexed sections
+        @return: count of extents added
+        """
+
+        # Townships and sections can be split into several features, so combine their extents
+        extents = {}
+        for row in rows:
+            key = tuple(str(v or "") for v in row[:5])
+            if key in extents:
+                xmin, ymin, xmax, ymax = extents[key]
+                extents[key] = (min(xmin, row[5]), min(ymin, row[6]), max(xmax, row[7]), max(ymax, row[8]))
+            else:
+                extents[key] = tuple(row[5:9])
+
+        with self._connect() as connection:
+            connection.executemany("INSERT OR REPLACE INTO plss VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                   [key + extent for key, extent in extents.items()])
+            if complete:
+                connection.execute("INSERT OR REPLACE INTO meta VALUES ('complete', '1')")
+        return len(extents)
+
+    def to_extent(self, extent: tuple, spatial_reference: arcpy.SpatialReference=None) -> arcpy.Extent:
+        """
+        Converts an indexed extent to an arcpy Extent.
+
+        @extent: (xmin, ymin, xmax, ymax) from lookup()
+        @spatial_reference: Spatial reference to project to (optional)
+        @return: arcpy Extent
+        """
+
+        return to_extent(extent, self.wkid, spatial_reference)
+
+def to_extent(extent: tuple, wkid: int, spatial_reference: arcpy.SpatialReference=None) -> arcpy.Extent:
+    """
+    Converts a (xmin, ymin, xmax, ymax) extent to an arcpy Extent.
+
+    @extent: (xmin, ymin, xmax, ymax)
+    @wkid: Spatial reference of the extent
+    @spatial_reference: Spatial reference to project to (optional)
+    @return: arcpy Extent
+    """
+
+    xmin, ymin, xmax, ymax = extent
+    ext = arcpy.Extent(XMin = xmin, YMin = ymin, XMax = xmax, YMax = ymax,
+                       spatial_reference = arcpy.SpatialReference(wkid))
+    if spatial_reference is not None and spatial_reference.factoryCode != wkid:
+        ext = ext.projectAs(spatial_reference)
+    return ext
+
+def _geometry_extent(geometry: dict) -> tuple:
+    """
+    Gets the extent of an Esri JSON polygon or envelope.
+
+    @geometry: Esri JSON geometry
+    @return: (xmin, ymin, xmax, ymax)
+    """
+
+    if "xmin" in geometry:
+        return geometry["xmin"], geometry["ymin"], geometry["xmax"], geometry["ymax"]
+
+    xs = [point[0] for ring in geometry["rings"] for point in ring]
+    ys = [point[1] for ring in geometry["rings"] for point in ring]
+    return min(xs), min(ys), max(xs), max(ys)
+
+def build_from_features(path: str, features: str, fields: dict=DEFAULT_FIELDS) -> int:
+    """
+    Adds the extent of every township or section in a feature class to an index.
+    Features without a section field are indexed as townships. The features
+    must cover every section of their townships, township extents are built
+    from them.
+
+    @path: Path to the index database
+    @features: PLSS township or section features
+    @fields: Names of the township, range and section fields
+             (In the format {"twn": <field>, "twn_char": <field>, "rng": <field>, "rng_char": <field>, "sec": <field>})
+    @return: count of extents indexed
+    """
+
+    index = PLSSIndex(path)
+    field_names = [f.name for f in arcpy.ListFields(features)]
+    keys = [k for k in ["twn", "twn_char", "rng", "rng_char", "sec"] if fields.get(k) in field_names]
+
+    rows = []
+    with arcpy.da.SearchCursor(features, [fields[k] for k in keys] + ["SHAPE@"],
+                               spatial_reference = arcpy.SpatialReference(index.wkid)) as cursor:
+        for row in cursor:
+            values = dict(zip(keys, row))
+            ext = row[-1].extent
+            rows.append(tuple(values.get(k) for k in ["twn", "twn_char", "rng", "rng_char", "sec"])
+                        + (ext.XMin, ext.YMin, ext.XMax, ext.YMax))
+
+    return index.add(rows, complete=True)
+
+def build_from_dump(path: str, dump_path: str, fields: dict=DEFAULT_FIELDS) -> int:
+    """
+    Adds the extent of every township or section in a saved REST query
+    (f=json, returnGeometry=true) to an index. The query must have been made
+    with outSR set to the index spatial reference, and must return every
+    section of its townships.
+
+    @path: Path to the index database
+    @dump_path: Path to the saved JSON response
+    @fields: Names of the township, range and section attributes
+    @return: count of extents indexed
+    """
+
+    index = PLSSIndex(path)
+    with open(dump_path) as dump_file:
+        dump = json.load(dump_file)
+
+    wkid = dump.get("spatialReference", {}).get("latestWkid") or dump.get("spatialReference", {}).get("wkid")
+    if wkid is not None and int(wkid) != index.wkid:
+        raise ValueError(f"Saved query is in WKID {wkid}, the index is in WKID {index.wkid}")
+
+    rows = []
+    for feature in dump["features"]:
+        attributes = feature["attributes"]
+        rows.append(tuple(attributes.get(fields[k]) for k in ["twn", "twn_char", "rng", "rng_char", "sec"])
+                    + _geometry_extent(feature["geometry"]))
+
+    return index.add(rows, complete=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or extend a local PLSS extent index.")
+    parser.add_argument("index", help="Path to the index database")
+    parser.add_argument("sources", nargs="+", help="PLSS feature classes or saved REST queries (.json)")
+    args = parser.parse_args()
+
+    for source in args.sources:
+        if os.path.splitext(source)[1].lower() == ".json":
+            count = build_from_dump(args.index, source)
+        else:
+            count = build_from_features(args.index, source)
+        print(f"{source}: {count} extents indexed")
@@ -0,0 +1,272 @@
+"""
+Opt-in timing of tool runs. When profiling is on, every call to a tool's
+execute, updateParameters and updateMessages is timed, along with any named
+spans entered while it runs (rows read, rows written, REST requests). A short
+summary is added to the messages after execute, and every run is appended to
+a JSON lines log so timings can be compared between releases.
+
+Profiling is off unless the FLICKTOOLS_PROFILE environment variable is set
+("1" for timers, "cprofile" to also keep a cProfile of each run) or
+set_profiling() is called. The log is written to FLICKTOOLS_PROFILE_LOG, or
+to FlickToolsProfile.jsonl in the project folder.
+
+Usage:
+>>> with profiler.span("read rows") as span:
+>>>     for batch in archelp.get_batches(<features>, <fields>):
+>>>         span.add(rows=len(batch))
+"""
+
+import cProfile
+import functools
+import json
+import os
+import pstats
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import utils.constants.ftconstants as ftconstants
+from utils.progress import send_message
+
+ENABLED = os.environ.get("FLICKTOOLS_PROFILE", "").lower() not in ["", "0", "false"]
+CPROFILE = os.environ.get("FLICKTOOLS_PROFILE", "").lower() == "cprofile"
+LOG_PATH = os.environ.get("FLICKTOOLS_PROFILE_LOG") or None
+
+# The run being timed, spans are only recorded while a run is active
+_run = None
+
+def set_profiling(enabled: bool=True, cprofile: bool=False, log_path: str=None) -> None:
+    """
+    Turns profiling on or off
+
+    @enabled: Time tool runs
+    @cprofile: Also keep a cProfile of each run
+    @log_path: Path of the JSON lines log (default is the project folder)
+    """
+
+    global ENABLED, CPROFILE, LOG_PATH
+    ENABLED = enabled
+    CPROFILE = enabled and cprofile
+    LOG_PATH = log_path
+    return
+
+class Span(object):
+    """
+    Total time and counters of every entry into a named span
+
+    @name: Name of the span
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.calls = 0
+        self.seconds = 0.0
+        self.counters = {}
+        return
+
+    def add(self, seconds: float=0.0, **counters) -> None:
+        """
+        @seconds: Time to add to the span
+        @counters: Amounts to add to the span's counters (rows=<count>, bytes=<count>)
+        """
+
+        self.seconds += seconds
+        for name, amount in counters.items():
+            self.counters[name] = self.counters.get(name, 0) + amount
+        return
+
+    def as_dict(self) -> dict:
+        """
+        @return: The span (In the format {"calls", "seconds", <counter>: <amount>})
+        """
+
+        return {"calls": self.calls, "seconds": round(self.seconds, 6), **self.counters}
+
+class _NullSpan(object):
+    """Stands in for a Span when no run is being timed"""
+
+    def add(self, seconds: float=0.0, **counters) -> None:
+        return
+
+_NULL_SPAN = _NullSpan()
+
+class ToolRun(object):
+    """
+    Timings of a single call to a tool method
+
+    @tool: Name of the tool class
+    @method: Name of the method (execute, updateParameters, updateMessages)
+    @cprofile: Keep a cProfile of the call
+    """
+
+    def __init__(self, tool: str, method: str, cprofile: bool=False) -> None:
+        self.tool = tool
+        self.method = method
+        self.started = datetime.now().isoformat(timespec="seconds")
+        self.seconds = 0.0
+        self.status = "ok"
+        self.spans = {}
+        self.profile = cProfile.Profile() if cprofile else None
+        return
+
+    def get_span(self, name: str) -> Span:
+        """
+        @name: Name of the span
+        @return: The span, created on first use
+        """
+
+        if name not in self.spans:
+            self.spans[name] = Span(name)
+        return self.spans[name]
+
+    def top_functions(self, count: int=ftconstants.PROFILE_TOP_FUNCTIONS) -> list[dict]:
+        """
+        @count: Number of functions to return
+        @return: The functions with the most cumulative time in the cProfile
+                 (In the format [{"function", "calls", "seconds", "cumulative"}])
+        """
+
+        if self.profile is None:
+            return []
+
+        stats = pstats.Stats(self.profile).stats
+        functions = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:count]
+        return [{"function": f"{os.path.basename(path)}:{line}({name})", "calls": calls,
+                 "seconds": round(total, 6), "cumulative": round(cumulative, 6)}
+                for (path, line, name), (primitive, calls, total, cumulative, callers) in functions]
+
+    def as_dict(self) -> dict:
+        """
+        @return: The run as a JSON-friendly dictionary
+        """
+
+        record = {"tool": self.tool, "method": self.method, "started": self.started, "status": self.status,
+                  "seconds": round(self.seconds, 6), "spans": {name: span.as_dict() for name, span in self.spans.items()}}
+        if self.profile is not None:
+            record["profile"] = self.top_functions()
+        return record
+
+    def summary(self) -> str:
+        """
+        @return: Compact summary of the run for the geoprocessing messages
+        """
+
+        lines = [f"Profile: {self.tool}.{self.method} {self.seconds:.2f} s"]
+        for span in sorted(self.spans.values(), key=lambda span: span.seconds, reverse=True):
+            counters = "".join(f", {name}={amount}" for name, amount in span.counters.items())
+            lines.append(f"{ftconstants.TAB}{span.name}: {span.seconds:.2f} s ({span.calls} calls{counters})")
+        for function in self.top_functions(5):
+            lines.append(f"{ftconstants.TAB}{function['function']}: {function['cumulative']:.2f} s cumulative")
+        return "\n".join(lines)
+
+@contextmanager
+def span(name: str, **counters) -> Span:
+    """
+    Times a block of code as part of the active run. Does nothing if no run
+    is being timed.
+
+    @name: Name of the span, entries with the same name are added together
+    @counters: Amounts to add to the span's counters
+    @yield: The span, use span.add(<counter>=<amount>) to count work done in the block
+    """
+
+    if _run is None:
+        yield _NULL_SPAN
+        return
+
+    current = _run.get_span(name)
+    current.calls += 1
+    current.add(**counters)
+    start = time.perf_counter()
+    try:
+        yield current
+    finally:
+        current.seconds += time.perf_counter() - start
+
+def add(name: str, seconds: float=0.0, **counters) -> None:
+    """
+    Adds time and counters to a span of the active run, for work that is
+    timed by the caller (like reading a batch inside a generator). Does
+    nothing if no run is being timed.
+
+    @name: Name of the span
+    @seconds: Time to add to the span
+    @counters: Amounts to add to the span's counters
+    """
+
+    if _run is not None:
+        current = _run.get_span(name)
+        current.calls += 1
+        current.add(seconds, **counters)
+    return
+
+def write_log(record: dict, log_path: str) -> None:
+    """
+    Appends a run to a JSON lines log
+
+    @record: Run from ToolRun.as_dict()
+    @log_path: Path of the log
+    """
+
+    with open(log_path, "a") as log_file:
+        log_file.write(json.dumps(record, default=str) + "\n")
+    return
+
+def _get_log_path(tool: object) -> str:
+    """
+    @tool: The tool being profiled
+    @return: Path of the log, or None when there is nowhere to write it
+    """
+
+    if LOG_PATH:
+        return LOG_PATH
+    # Profiling must never fail a tool, so any problem finding the project
+    # (no "CURRENT" project when run headless, etc.) skips the log
+    try:
+        return os.path.join(tool.project_location, ftconstants.PROFILE_LOG_NAME)
+    except Exception:
+        return None
+
+def profiled(method):
+    """
+    Decorator for tool methods that times the call when profiling is on. Calls
+    made while another run is being timed (like a tool calling its own
+    updateParameters) are counted as part of that run.
+
+    @method: Tool method to time
+    @return: The wrapped method
+    """
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        global _run
+        if not ENABLED or _run is not None:
+            return method(self, *args, **kwargs)
+
+        run = ToolRun(type(self).__name__, method.__name__, CPROFILE)
+        _run = run
+        start = time.perf_counter()
+        if run.profile is not None: run.profile.enable()
+        try:
+            return method(self, *args, **kwargs)
+        except BaseException:
+            run.status = "error"
+            raise
+        finally:
+            if run.profile is not None: run.profile.disable()
+            run.seconds = time.perf_counter() - start
+            _run = None
+
+            # Validation runs on every parameter change, so only execute adds a summary
+            if method.__name__ == "execute":
+                send_message(run.summary())
+
+            log_path = _get_log_path(self)
+            if log_path:
+                try:
+                    write_log(run.as_dict(), log_path)
+                except OSError as e:
+                    send_message(f"Could not write profile log {log_path}: {e}", "warning")
+
+    wrapper._profiled = True
+    return wrapper
@@ -0,0 +1,203 @@
+"""
+Rate limited progress and messaging for tools. Every progressor update and
+message is a round trip into the ArcGIS Pro UI, so progress is only pushed
+when enough time has passed and the position has moved, and messages are
+collected and sent in blocks.
+"""
+
+import arcpy
+import time
+
+import utils.constants.ftconstants as ftconstants
+
+# Set to True for scripted runs to skip the ArcGIS Pro progressor and message
+# calls. Messages are still printed to the console.
+HEADLESS = False
+
+def set_headless(headless: bool=True) -> None:
+    """
+    Turns the ArcGIS Pro progressor and message calls on or off
+
+    @headless: True to only print messages to the console
+    """
+
+    global HEADLESS
+    HEADLESS = headless
+    return
+
+def send_message(message: str="", level: str="message") -> None:
+    """
+    Prints a message to the console and adds a message to ArcGIS Pro
+
+    @message: The message to print
+    @level: The level of the message (message, warning, error)
+    """
+
+    message = str(message)
+    level = str(level).lower()
+    level = ("message" if level not in ["message", "warning", "error"] else level)
+    # Message
+    if level == "message":
+        print(message)
+        if not HEADLESS: arcpy.AddMessage(message)
+    # Warning
+    elif level == "warning":
+        print(f"WARNING: {message}")
+        if not HEADLESS: arcpy.AddWarning(message)
+    # Error
+    elif level == "error":
+        print(f"ERROR: {message}")
+        if not HEADLESS: arcpy.AddError(message)
+    return
+
+class Progressor(object):
+    """
+    Step progressor that only updates ArcGIS Pro once at least 'interval'
+    seconds have passed and the position has moved by 'min_delta' percent.
+    Calling step() for every row only costs an integer comparison between
+    updates.
+
+    @label: Progressor label
+    @total: Number of steps expected. Without a total a default (spinning)
+            progressor is shown and steps only count rows
+    @interval: Minimum number of seconds between updates
+    @min_delta: Minimum change in percent between updates
+
+    Usage:
+    >>> with Progressor("Reading rows...", <row count>) as progressor:
+    >>>     for row in cursor:
+    >>>         progressor.step()
+    """
+
+    def __init__(self, label: str, total: int=None, interval: float=ftconstants.PROGRESS_INTERVAL, min_delta: int=1) -> None:
+        self.label = label
+        self.total = total
+        self.interval = interval
+        self.min_delta = min_delta
+        self.position = 0
+        self.updates = 0
+
+        self._last_update = 0.0
+        self._step_delta = max(int(total * min_delta / 100), 1) if total else None
+        self._next_check = self._step_delta if total else float("inf")
+
+        if not HEADLESS:
+            if total:
+                arcpy.SetProgressor("step", label, 0, 100, 1)
+            else:
+                arcpy.SetProgressor("default", label)
+        return
+
+    def __enter__(self) -> "Progressor":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+        return
+
+    def step(self, count: int=1) -> None:
+        """
+        @count: Number of steps completed since the last call
+        """
+
+        self.position += count
+        if self.position >= self._next_check:
+            self._update()
+        return
+
+    def update(self, position: int) -> None:
+        """
+        @position: Number of steps completed so far
+        """
+
+        self.position = position
+        if self.position >= self._next_check:
+            self._update()
+        return
+
+    def set_label(self, label: str) -> None:
+        """
+        @label: New progressor label
+        """
+
+        self.label = label
+        if not HEADLESS: arcpy.SetProgressorLabel(label)
+        return
+
+    def _update(self, force: bool=False) -> None:
+        """Push the current position to ArcGIS Pro if enough time has passed"""
+
+        now = time.monotonic()
+        if force or now - self._last_update >= self.interval:
+            self._last_update = now
+            self.updates += 1
+            if not HEADLESS:
+                arcpy.SetProgressorPosition(min(int((self.position / self.total) * 100), 100))
+
+        # Wait for the position to move again before checking the clock
+        self._next_check = self.position + self._step_delta
+        return
+
+    def close(self) -> None:
+        """Show the final position and reset the progressor"""
+
+        if self.total:
+            self._update(force=True)
+        if not HEADLESS: arcpy.ResetProgressor()
+        return
+
+class MessageBuffer(object):
+    """
+    Collects messages and sends them as a single block once 'interval'
+    seconds have passed or 'max_lines' messages are waiting. Warnings and
+    errors flush the buffer and are sent right away so the order is kept.
+
+    @interval: Maximum number of seconds a message waits before it is sent
+    @max_lines: Maximum number of messages in a block
+
+    Usage:
+    >>> with MessageBuffer() as messages:
+    >>>     for value in values:
+    >>>         messages.add(value)
+    """
+
+    def __init__(self, interval: float=ftconstants.MESSAGE_INTERVAL, max_lines: int=1000) -> None:
+        self.interval = interval
+        self.max_lines = max_lines
+        self.lines = []
+        self.flushes = 0
+        self._last_flush = time.monotonic()
+        return
+
+    def __enter__(self) -> "MessageBuffer":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.flush()
+        return
+
+    def add(self, message: str="", level: str="message") -> None:
+        """
+        @message: The message to add
+        @level: The level of the message (message, warning, error)
+        """
+
+        if level != "message":
+            self.flush()
+            send_message(message, level)
+            return
+
+        self.lines.append(str(message))
+        if len(self.lines) >= self.max_lines or time.monotonic() - self._last_flush >= self.interval:
+            self.flush()
+        return
+
+    def flush(self) -> None:
+        """Send any waiting messages as one block"""
+
+        if self.lines:
+            send_message("\n".join(self.lines))
+            self.lines = []
+            self.flushes += 1
+        self._last_flush = time.monotonic()
+        return
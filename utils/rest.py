@@ -0,0 +1,135 @@
+"""
+Shared HTTP client for the REST services used by the tools. A single
+requests.Session is kept for the life of the toolbox so connections are
+reused, every request has a timeout, and failed requests are retried with
+exponential backoff. Responses with an ETag or Last-Modified header are
+revalidated with conditional requests instead of being downloaded again.
+"""
+
+import time
+from collections import OrderedDict
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import utils.constants.ftconstants as ftconstants
+import utils.profiler as profiler
+
+class RestError(Exception):
+    """Raised when a REST service returns an error in a successful response"""
+    pass
+
+_session = None
+
+# Validators and bodies of recent responses (In the format {<url>: (<etag>, <last modified>, <json>)})
+_validators = OrderedDict()
+_MAX_VALIDATORS = 256
+
+# Request instrumentation
+stats = {"requests": 0, "not_modified": 0, "total_time": 0.0, "max_time": 0.0, "last_time": 0.0}
+
+def get_session() -> requests.Session:
+    """
+    Gets the shared session, creating it on first use
+
+    @return: A requests.Session with pooled keep-alive connections and retries
+    """
+
+    global _session
+    if _session is None:
+        retry = Retry(total = ftconstants.REST_RETRIES,
+                      backoff_factor = ftconstants.REST_BACKOFF,
+                      status_forcelist = [429, 500, 502, 503, 504],
+                      allowed_methods = ["GET"])
+        adapter = HTTPAdapter(max_retries = retry, pool_connections = 4, pool_maxsize = 8)
+
+        _session = requests.Session()
+        _session.mount("https://", adapter)
+        _session.mount("http://", adapter)
+    return _session
+
+def close_session() -> None:
+    """Closes the shared session and its connections"""
+
+    global _session
+    if _session is not None:
+        _session.close()
+        _session = None
+    return
+
+def get_json(url: str, params: dict=None, timeout: tuple=ftconstants.REST_TIMEOUT, conditional: bool=True) -> dict:
+    """
+    Sends a GET request and returns the JSON response
+
+    @url: The url to request
+    @params: Query parameters (optional)
+    @timeout: (<connect>, <read>) timeouts in seconds
+    @conditional: Revalidate earlier responses with If-None-Match / If-Modified-Since
+    @raises requests.RequestException: If the request fails after all retries
+    @raises RestError: If the service returns an error message
+    @return: The response as a dictionary
+
+    Usage:
+    >>> resp = get_json(<url>, {"where": "1=1", "f": "json"})
+    """
+
+    session = get_session()
+    request = requests.Request("GET", url, params=params).prepare()
+    headers = {}
+
+    cached = _validators.get(request.url) if conditional else None
+    if cached is not None:
+        etag, last_modified, body = cached
+        if etag: headers["If-None-Match"] = etag
+        if last_modified: headers["If-Modified-Since"] = last_modified
+
+    start = time.perf_counter()
+    resp = session.get(request.url, headers=headers, timeout=timeout)
+    elapsed = time.perf_counter() - start
+    _record(elapsed)
+    profiler.add("rest requests", elapsed, bytes=len(resp.content))
+
+    if resp.status_code == 304 and cached is not None:
+        stats["not_modified"] += 1
+        _validators.move_to_end(request.url)
+        return cached[2]
+
+    resp.raise_for_status()
+    body = resp.json()
+
+    # ArcGIS REST services report errors in the body of a 200 response
+    if isinstance(body, dict) and "error" in body:
+        raise RestError(f"{url}: {body['error'].get('message', body['error'])}")
+
+    etag, last_modified = resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+    if conditional and (etag or last_modified):
+        _validators[request.url] = (etag, last_modified, body)
+        _validators.move_to_end(request.url)
+        while len(_validators) > _MAX_VALIDATORS:
+            _validators.popitem(last=False)
+
+    return body
+
+def _record(elapsed: float) -> None:
+    """
+    @elapsed: Time in seconds the request took
+    """
+
+    stats["requests"] += 1
+    stats["total_time"] += elapsed
+    stats["max_time"] = max(stats["max_time"], elapsed)
+    stats["last_time"] = elapsed
+    return
+
+def get_stats() -> dict:
+    """
+    @return: Request counts and latencies in milliseconds
+    """
+
+    count = stats["requests"]
+    return {"requests": count,
+            "not_modified": stats["not_modified"],
+            "mean_ms": round(stats["total_time"] / count * 1000, 1) if count else 0.0,
+            "max_ms": round(stats["max_time"] * 1000, 1),
+            "last_ms": round(stats["last_time"] * 1000, 1)}
@@ -0,0 +1,267 @@
+"""
+Runs FlickTools tools without ArcGIS Pro. A job file lists the tools to run
+and their parameters, every job runs against a project file instead of the
+"CURRENT" project, and jobs run side by side in a process pool.
+
+Each finished job is appended to a JSON lines results file right away, so a
+run that stops part way can be started again with the same command and only
+the jobs that didn't succeed are run.
+
+    python -m utils.runner <job file> [--results <results file>] [--workers <n>]
+
+Job file format:
+    {
+        "project": "C:/Projects/Parcels/Parcels.aprx",
+        "workspace": "C:/Projects/Parcels/Outputs.gdb",
+        "workers": 4,
+        "jobs": [
+            {"tool": "FieldDomains", "parameters": {"input_features": "C:/Data/Parcels.gdb/Parcels", "fields": ["ZONE"]}},
+            {"tool": "UniqueValuesInField",
+             "datasets": {"crawl": "C:/Data", "datatypes": ["FeatureClass"]},
+             "parameters": {"input_features": "{dataset}", "fields": ["STATUS"], "include_counts": true}}
+        ]
+    }
+
+A job with "datasets" (a list of paths, or {"crawl": <folder>} to use every
+dataset in every geodatabase under the folder) is run once for each dataset,
+with "{dataset}" in its parameters replaced by the dataset path.
+
+Jobs run with the workspace environment set to the job's "workspace", the
+job file's "workspace", or the project's default geodatabase. Parameters are
+validated like the geoprocessing dialog does (updateParameters, then
+updateMessages) and a job with an invalid parameter fails without running.
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import time
+from concurrent.futures import as_completed
+from traceback import format_exc
+
+import arcpy
+
+import utils.arcpy_tools as archelp
+from utils.crawler import crawl_databases
+from utils.dev import getToolClass
+from utils.progress import send_message, set_headless
+
+# Project opened in this process (In the format {<project path>: <project>})
+_projects = {}
+
+class _Messages(object):
+    """Stands in for the messages object ArcGIS Pro passes to execute"""
+
+    def __init__(self) -> None:
+        self.errors = []
+
+    def addMessage(self, message: str) -> None:
+        send_message(message)
+
+    def addWarningMessage(self, message: str) -> None:
+        send_message(message, "warning")
+
+    def addErrorMessage(self, message: str) -> None:
+        self.errors.append(str(message))
+        send_message(message, "error")
+
+def _validate(parameters: list) -> list[str]:
+    """
+    @parameters: Parameters after updateParameters and updateMessages
+    @return: A message for each parameter that has an error or is missing a required value
+    """
+
+    problems = []
+    for parameter in parameters:
+        if parameter.hasError():
+            problems.append(f"{parameter.name}: {parameter.message}")
+        elif parameter.parameterType == "Required" and parameter.enabled and parameter.value is None:
+            problems.append(f"{parameter.name}: Value is required")
+    return problems
+
+def _job_id(tool: str, parameters: dict, workspace: str=None) -> str:
+    """
+    @tool: Tool name
+    @parameters: Job parameters
+    @workspace: Workspace the job runs in (optional)
+    @return: Id that is the same for the same tool, parameters and workspace
+    """
+
+    # Jobs without a workspace keep the ids they had before workspaces were part of the key
+    key = json.dumps([tool, parameters] if workspace is None else [tool, parameters, workspace], sort_keys=True, default=str)
+    return f"{tool}-{hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]}"
+
+def _fill(value: object, dataset: str) -> object:
+    """
+    @value: A parameter value from the job file
+    @dataset: The dataset to put in place of "{dataset}"
+    @return: The value for the dataset
+    """
+
+    if isinstance(value, str):
+        return value.replace("{dataset}", dataset)
+    if isinstance(value, list):
+        return [_fill(v, dataset) for v in value]
+    if isinstance(value, dict):
+        return {k: _fill(v, dataset) for k, v in value.items()}
+    return value
+
+def _list_datasets(datasets: object) -> list[str]:
+    """
+    @datasets: List of dataset paths, or {"crawl": <folder>, "datatypes": [<arcpy.da.Walk data type>]}
+    @return: Dataset paths
+    """
+
+    if isinstance(datasets, list):
+        return datasets
+
+    datatypes = datasets.get("datatypes", ["FeatureClass", "Table"])
+    return [path for database in crawl_databases(datasets["crawl"])
+            for name, path, datatype in archelp.list_datasets(database, datatypes)]
+
+def build_jobs(job_file: dict) -> list[dict]:
+    """
+    Expands a job file into one job per tool run
+
+    @job_file: Contents of the job file
+    @return: Jobs (In the format {"id", "tool", "parameters", "workspace"})
+    """
+
+    jobs = []
+    for entry in job_file["jobs"]:
+        if "datasets" in entry:
+            parameter_sets = [_fill(entry["parameters"], dataset) for dataset in _list_datasets(entry["datasets"])]
+        else:
+            parameter_sets = [entry["parameters"]]
+
+        workspace = entry.get("workspace", job_file.get("workspace"))
+        for parameters in parameter_sets:
+            # An id from the job file can only name a job that isn't expanded over datasets
+            job_id = entry["id"] if "id" in entry and "datasets" not in entry else _job_id(entry["tool"], parameters, workspace)
+            jobs.append({"id": job_id, "tool": entry["tool"], "parameters": parameters, "workspace": workspace})
+    return jobs
+
+def run_job(project_path: str, job: dict) -> dict:
+    """
+    Runs a single tool. This runs in a worker process, so it only takes and
+    returns plain values.
+
+    @project_path: Path to the ArcGIS Pro project the tool runs against
+    @job: Job from build_jobs()
+    @return: Result (In the format {"id", "tool", "parameters", "status", "seconds", "outputs", "messages", "error"})
+    """
+
+    set_headless(True)
+    result = {"id": job["id"], "tool": job["tool"], "parameters": job["parameters"], "status": "ok",
+              "seconds": 0.0, "outputs": {}, "messages": "", "error": None}
+    messages = io.StringIO()
+    start = time.perf_counter()
+
+    try:
+        if project_path not in _projects:
+            _projects[project_path] = archelp.get_project(project_path)
+
+        tool = getToolClass(job["tool"])()
+        tool.project = _projects[project_path]
+
+        parameters = tool.getParameterInfo()
+        by_name = archelp.get_params(parameters)
+        unknown = set(job["parameters"]) - set(by_name)
+        if unknown:
+            raise KeyError(f"{job['tool']} has no parameters named {', '.join(sorted(unknown))}")
+
+        for name, value in job["parameters"].items():
+            by_name[name].value = ";".join(map(str, value)) if isinstance(value, list) else value
+
+        workspace = job.get("workspace") or tool.default_gdb or arcpy.env.scratchGDB
+        tool_messages = _Messages()
+        with contextlib.redirect_stdout(messages), arcpy.EnvManager(workspace=workspace):
+            tool.updateParameters(parameters)
+            tool.updateMessages(parameters)
+            problems = _validate(parameters)
+            if problems:
+                raise ValueError(f"Invalid parameters for {job['tool']}:\n" + "\n".join(problems))
+
+            tool.execute(parameters, tool_messages)
+
+        result["outputs"] = {p.name: p.valueAsText for p in parameters if p.parameterType == "Derived"}
+        if tool_messages.errors:
+            result["status"] = "error"
+            result["error"] = "\n".join(tool_messages.errors)
+    except Exception:
+        result["status"] = "error"
+        result["error"] = format_exc()
+
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    result["messages"] = messages.getvalue()
+    return result
+
+def load_results(results_path: str) -> dict:
+    """
+    @results_path: Path to a JSON lines results file
+    @return: The latest result of each job (In the format {<job id>: <result>})
+    """
+
+    results = {}
+    if not os.path.exists(results_path):
+        return results
+
+    with open(results_path) as results_file:
+        for line in results_file:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                # The last line can be cut off if the run crashed while writing it
+                continue
+            results[result["id"]] = result
+    return results
+
+def run(job_path: str, results_path: str=None, workers: int=None) -> dict:
+    """
+    Runs every job in a job file that hasn't already succeeded
+
+    @job_path: Path to the job file
+    @results_path: Path to the JSON lines results file (default is <job file>.results.jsonl)
+    @workers: Number of jobs run at the same time (default is the job file's "workers", or 1)
+    @return: Counts of jobs (In the format {"total", "skipped", "ok", "error"})
+    """
+
+    with open(job_path) as job_file:
+        job_file = json.load(job_file)
+
+    results_path = results_path or f"{os.path.splitext(job_path)[0]}.results.jsonl"
+    workers = workers or job_file.get("workers", 1)
+    project_path = job_file["project"]
+
+    jobs = build_jobs(job_file)
+    finished = {job_id for job_id, result in load_results(results_path).items() if result["status"] == "ok"}
+    todo = [job for job in jobs if job["id"] not in finished]
+    counts = {"total": len(jobs), "skipped": len(jobs) - len(todo), "ok": 0, "error": 0}
+    print(f"{len(jobs)} jobs, {counts['skipped']} already finished, running {len(todo)} with {workers} workers")
+
+    with open(results_path, "a") as results_file, archelp.get_process_pool(workers) as pool:
+        futures = [pool.submit(run_job, project_path, job) for job in todo]
+        for future in as_completed(futures):
+            result = future.result()
+            counts[result["status"]] += 1
+
+            # Write each result as soon as it finishes so a crash doesn't lose it
+            results_file.write(json.dumps(result, default=str) + "\n")
+            results_file.flush()
+            os.fsync(results_file.fileno())
+            print(f"[{counts['ok'] + counts['error']}/{len(todo)}] {result['id']}: {result['status']} ({result['seconds']} s)")
+
+    return counts
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run FlickTools tools from a job file.")
+    parser.add_argument("jobs", help="Path to the job file")
+    parser.add_argument("--results", help="Path to the JSON lines results file (default is <job file>.results.jsonl)")
+    parser.add_argument("--workers", type=int, help="Number of jobs run at the same time")
+    args = parser.parse_args()
+
+    counts = run(args.jobs, args.results, args.workers)
+    print(f"Finished: {counts['ok']} ok, {counts['error']} failed, {counts['skipped']} skipped")
@@ -0,0 +1,229 @@
+"""
+Streaming random samplers. Each sampler keeps only the sample in memory,
+so a sample can be taken in a single pass over data of any size.
+"""
+
+import heapq
+import random
+from math import exp, floor, log, sqrt
+
+def _open_random(rng: random.Random) -> float:
+    """
+    @rng: Random number generator
+    @return: A random float in the open interval (0, 1)
+    """
+
+    value = rng.random()
+    while value == 0.0:
+        value = rng.random()
+    return value
+
+class Reservoir(object):
+    """
+    Uniform random sample of a fixed number of items from a stream of
+    unknown length (Li's Algorithm L). After the reservoir is full, the
+    number of items to skip before the next replacement is drawn directly,
+    so most items are never looked at.
+
+    @size: Number of items to sample
+    @rng: Random number generator (seed it for reproducible samples)
+
+    Usage:
+    >>> reservoir = Reservoir(<size>, random.Random(<seed>))
+    >>> for batch in archelp.get_batches(<features>, ["OID@"], array_type="array"):
+    >>>     reservoir.add_batch(batch["OID@"])
+    >>> print(reservoir.items)
+    """
+
+    def __init__(self, size: int, rng: random.Random=None) -> None:
+        self.size = max(int(size), 0)
+        self.rng = rng or random.Random()
+        self.items = []
+        self.count = 0
+
+        self._w = 1.0
+        self._next = None
+        return
+
+    def _skip(self) -> None:
+        """Draw the index of the next item that replaces one in the reservoir"""
+
+        self._w *= exp(log(_open_random(self.rng)) / self.size)
+        self._next += floor(log(_open_random(self.rng)) / log(1.0 - self._w)) + 1
+        return
+
+    def add(self, item) -> None:
+        """
+        @item: The next item in the stream
+        """
+
+        self.add_batch([item])
+        return
+
+    def add_batch(self, batch) -> None:
+        """
+        @batch: The next items in the stream (a list, array.array or numpy array)
+        """
+
+        start, num_items = self.count, len(batch)
+        self.count += num_items
+        if self.size == 0:
+            return
+
+        # Fill the reservoir with the first items
+        if len(self.items) < self.size:
+            fill = min(self.size - len(self.items), num_items)
+            self.items.extend(batch[:fill])
+            if len(self.items) == self.size:
+                self._next = self.size - 1
+                self._skip()
+
+        # Replace random items in the reservoir at the drawn positions
+        while self._next is not None and self._next < start + num_items:
+            self.items[self.rng.randrange(self.size)] = batch[self._next - start]
+            self._skip()
+        return
+
+class WeightedReservoir(object):
+    """
+    Weighted random sample of a fixed number of items without replacement
+    (Efraimidis-Spirakis A-Res). Each item gets the key u^(1/weight) and the
+    items with the largest keys are kept in a min-heap. Items with a weight
+    of zero, a negative weight or no weight are never sampled.
+
+    @size: Number of items to sample
+    @rng: Random number generator (seed it for reproducible samples)
+    """
+
+    def __init__(self, size: int, rng: random.Random=None) -> None:
+        self.size = max(int(size), 0)
+        self.rng = rng or random.Random()
+        self.count = 0
+        self._heap = []
+        return
+
+    @property
+    def items(self) -> list:
+        """The sampled items"""
+        return [item for key, order, item in self._heap]
+
+    def add(self, item, weight: float) -> None:
+        """
+        @item: The next item in the stream
+        @weight: Weight of the item
+        """
+
+        self.add_batch([item], [weight])
+        return
+
+    def add_batch(self, batch, weights) -> None:
+        """
+        @batch: The next items in the stream
+        @weights: The weight of each item
+        """
+
+        heap, size = self._heap, self.size
+        for item, weight in zip(batch, weights):
+            self.count += 1
+            if size == 0 or weight is None or weight <= 0:
+                continue
+
+            # log(u) / weight orders items the same as u^(1/weight) without underflowing
+            key = log(_open_random(self.rng)) / weight
+            if len(heap) < size:
+                heapq.heappush(heap, (key, self.count, item))
+            elif key > heap[0][0]:
+                heapq.heapreplace(heap, (key, self.count, item))
+        return
+
+class ProportionSample(object):
+    """
+    Uniform random sample of a fixed proportion of a stream of unknown
+    length. Every item gets a random key and the sample is the
+    round(proportion * count) items with the smallest keys. Keys well above
+    the proportion are very unlikely to end up in the sample, so those items
+    are dropped as they arrive.
+
+    Items are dropped above p + 6 * sqrt(p * (1 - p) / n) + 8 / n, where n is
+    the count so far. A dropped item would have been needed only if the
+    sample's largest key ends up above that, a 6 standard deviation event
+    (about 1e-9 for each batch). The smallest dropped key is kept, so exact is
+    False when it happens and the stratum can be sampled again with a
+    Reservoir of round(proportion * count). Memory is at most about
+    2 * (p * n + 6 * sqrt(p * (1 - p) * n) + 8) candidates, twice the sample size
+    for large n.
+
+    @proportion: Proportion of items to sample (0 - 1)
+    @rng: Random number generator (seed it for reproducible samples)
+    """
+
+    def __init__(self, proportion: float, rng: random.Random=None) -> None:
+        self.proportion = min(max(float(proportion), 0.0), 1.0)
+        self.rng = rng or random.Random()
+        self.count = 0
+        self._candidates = []
+        self._prune_at = 1024
+        self._dropped = 1.0
+        return
+
+    def _threshold(self) -> float:
+        """Largest key that can still end up in the sample (with overwhelming probability)"""
+
+        p = self.proportion
+        return min(1.0, p + 6 * sqrt(p * (1 - p) / max(self.count, 1)) + 8 / max(self.count, 1))
+
+    def _sample(self) -> list:
+        """The (<key>, <item>) pairs in the sample"""
+        return heapq.nsmallest(round(self.proportion * self.count), self._candidates)
+
+    @property
+    def items(self) -> list:
+        """The sampled items"""
+        return [item for key, item in self._sample()]
+
+    @property
+    def exact(self) -> bool:
+        """False if an item that belonged in the sample was dropped"""
+        sample = self._sample()
+        return not sample or sample[-1][0] < self._dropped
+
+    def add(self, item) -> None:
+        """
+        @item: The next item in the stream
+        """
+
+        self.add_batch([item])
+        return
+
+    def add_batch(self, batch) -> None:
+        """
+        @batch: The next items in the stream
+        """
+
+        if self.proportion == 0:
+            self.count += len(batch)
+            return
+
+        rng, candidates, dropped = self.rng, self._candidates, self._dropped
+        threshold = self._threshold()
+        for item in batch:
+            key = rng.random()
+            if key <= threshold:
+                candidates.append((key, item))
+            elif key < dropped:
+                dropped = key
+        self.count += len(batch)
+
+        # Drop candidates that can no longer make the sample
+        if len(candidates) > self._prune_at:
+            threshold = self._threshold()
+            kept = []
+            for candidate in candidates:
+                if candidate[0] <= threshold:
+                    kept.append(candidate)
+                elif candidate[0] < dropped:
+                    dropped = candidate[0]
+            self._candidates = kept
+            self._prune_at = max(2 * len(kept), 1024)
+        self._dropped = dropped
+        return
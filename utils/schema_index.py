@@ -0,0 +1,206 @@
+"""
+Local index of dataset schemas stored in a SQLite database. Each entry is a
+snapshot of a dataset's fields and OID field, tagged with the modification
+stamp of its workspace, so schema questions can be answered without
+describing the dataset again until the workspace changes. Datasets that
+aren't on disk (memory workspaces, services) are always described.
+
+The index can be built or refreshed from the command line:
+    python -m utils.schema_index <index path> <geodatabase or folder> [--force]
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+import arcpy
+
+import utils.arcpy_tools as archelp
+import utils.constants.ftconstants as ftconstants
+from utils.crawler import crawl_databases, is_database
+
+class SchemaIndex(object):
+    """
+    Schema snapshots of datasets in a SQLite database
+
+    @path: Path to the index database (created if it doesn't exist)
+    @stamp_interval: Number of seconds a workspace's modification stamp is
+                     trusted before it is checked again
+
+    Usage:
+    >>> index = SchemaIndex(<path>)
+    >>> schema = index.get(<feature class>)
+    >>> print(schema["oid_field"], [f["name"] for f in schema["fields"]])
+    """
+
+    def __init__(self, path: str, stamp_interval: float=ftconstants.SCHEMA_STAMP_INTERVAL) -> None:
+        self.path = path
+        self.stamp_interval = stamp_interval
+
+        # Recently checked workspace stamps (In the format {<workspace>: (<checked time>, <stamp>)}),
+        # forgotten whenever FlickTools changes a schema
+        self._stamps = {}
+        self._schema_changes = archelp.schema_changes
+
+        with self._connect() as connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS schemas "
+                               "(path TEXT PRIMARY KEY, workspace TEXT, stamp TEXT, snapshot TEXT, updated REAL)")
+            connection.execute("CREATE INDEX IF NOT EXISTS schemas_workspace ON schemas (workspace)")
+        return
+
+    @contextmanager
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection that commits and closes when the block ends"""
+
+        connection = sqlite3.connect(self.path, timeout=5)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def _stamp(self, workspace: str) -> str:
+        """
+        @workspace: Path of the workspace
+        @return: Modification stamp of the workspace, checked at most once per stamp_interval
+        """
+
+        if self._schema_changes != archelp.schema_changes:
+            self._stamps.clear()
+            self._schema_changes = archelp.schema_changes
+
+        now = time.monotonic()
+        checked = self._stamps.get(workspace)
+        if checked is None or now - checked[0] > self.stamp_interval:
+            checked = (now, archelp.get_workspace_stamp(workspace))
+            self._stamps[workspace] = checked
+        return checked[1]
+
+    def _store(self, connection: sqlite3.Connection, snapshot: dict, stamp: str) -> None:
+        """
+        @connection: Open connection to the index
+        @snapshot: Snapshot from archelp.describe_dataset()
+        @stamp: Modification stamp of the dataset's workspace
+        """
+
+        connection.execute("INSERT OR REPLACE INTO schemas VALUES (?, ?, ?, ?, ?)",
+                           (snapshot["path"], snapshot["workspace"], stamp, json.dumps(snapshot), time.time()))
+        return
+
+    def get(self, dataset: str, refresh: bool=True, fields: list[str]=None) -> dict:
+        """
+        Gets the schema of a dataset, describing it again only if its
+        workspace changed since the snapshot was taken.
+
+        @dataset: Path of a feature class or table
+        @refresh: Describe the dataset if there isn't a current snapshot
+        @fields: Fields the caller expects, the dataset is described again if
+                 the snapshot is missing any of them (optional)
+        @return: The snapshot from archelp.describe_dataset(), or None if there
+                 isn't a current snapshot and refresh is False
+        """
+
+        if not archelp.is_file_path(dataset):
+            return archelp.describe_dataset(dataset) if refresh else None
+
+        dataset = os.path.normpath(dataset)
+        with self._connect() as connection:
+            entry = connection.execute("SELECT workspace, stamp, snapshot FROM schemas WHERE path = ?", (dataset,)).fetchone()
+            if entry is not None and entry[1] == self._stamp(entry[0]):
+                snapshot = json.loads(entry[2])
+                if _has_fields(snapshot, fields):
+                    return snapshot
+            if not refresh:
+                return None
+
+            snapshot = archelp.describe_dataset(dataset)
+            stamp = self._stamp(snapshot["workspace"])
+            if stamp is not None:
+                self._store(connection, snapshot, stamp)
+        return snapshot
+
+    def refresh(self, database: str, force: bool=False) -> int:
+        """
+        Snapshots every dataset in a geodatabase. Nothing is described if the
+        geodatabase hasn't changed since the last refresh.
+
+        @database: Path of the geodatabase
+        @force: Describe every dataset even if the geodatabase hasn't changed
+        @return: count of datasets described
+        """
+
+        # Skip the whole geodatabase if every snapshot in it is current
+        database = archelp.normalize_path(database)
+        self._stamps.pop(database, None)
+        stamp = self._stamp(database)
+        if stamp is None:
+            return 0
+        with self._connect() as connection:
+            stamps = {row[0] for row in connection.execute("SELECT stamp FROM schemas WHERE workspace = ?", (database,))}
+        if stamps == {stamp} and not force:
+            return 0
+
+        snapshots = [archelp.describe_dataset(path) for name, path, datatype in archelp.list_datasets(database)]
+        with self._connect() as connection:
+            # Replace every snapshot of the geodatabase so deleted datasets are dropped
+            connection.execute("DELETE FROM schemas WHERE workspace = ?", (database,))
+            for snapshot in snapshots:
+                self._store(connection, snapshot, stamp)
+        return len(snapshots)
+
+def _has_fields(snapshot: dict, fields: list[str]) -> bool:
+    """
+    @snapshot: Snapshot from archelp.describe_dataset()
+    @fields: Field names (optional)
+    @return: True if the snapshot has every field
+    """
+
+    if not fields:
+        return True
+    names = {f["name"].lower() for f in snapshot["fields"]}
+    return all(field.lower() in names for field in fields)
+
+def get_schema(features: object, index: SchemaIndex=None, fields: list[str]=None) -> dict:
+    """
+    Gets the schema of a dataset, layer or layer object from an index, or by
+    describing it if there is no index. Layers are looked up by their data
+    source, so fields the layer adds (joined fields, qualified names) are
+    only found by listing the layer's fields, which is done when any of the
+    expected fields are missing from the data source's schema.
+
+    @features: Path of a dataset, a layer name or an arcpy.mp Layer
+    @index: Schema index (optional)
+    @fields: Fields the caller expects, see SchemaIndex.get() (optional)
+    @return: The snapshot from archelp.describe_dataset()
+    """
+
+    # Map layers know their data source, anything else is looked up by its catalog path
+    path = getattr(features, "dataSource", None)
+    if path is None:
+        path = str(features)
+        if not os.path.isabs(path) and "://" not in path:
+            path = arcpy.Describe(path).catalogPath
+
+    snapshot = archelp.describe_dataset(path) if index is None else index.get(path, fields=fields)
+
+    # The layer's own fields, keeping the data source's path and workspace
+    if path != features and not _has_fields(snapshot, fields):
+        snapshot = dict(snapshot, fields=[archelp.field_to_dict(f) for f in arcpy.ListFields(features)])
+    return snapshot
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or refresh a local index of dataset schemas.")
+    parser.add_argument("index", help="Path to the index database")
+    parser.add_argument("sources", nargs="+", help="Geodatabases, or folders to search for file geodatabases")
+    parser.add_argument("--force", action="store_true", help="Describe every dataset even if its geodatabase hasn't changed")
+    args = parser.parse_args()
+
+    index = SchemaIndex(args.index)
+    for source in args.sources:
+        databases = [source] if is_database(source) or source.lower().endswith(".sde") else crawl_databases(source)
+        for database in databases:
+            count = index.refresh(database, args.force)
+            print(f"{database}: {count} datasets described" if count else f"{database}: unchanged")
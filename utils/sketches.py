@@ -0,0 +1,164 @@
+"""
+Fixed-memory summaries of value streams. Use these when counting every
+distinct value exactly would take too much memory. All of the summaries
+can be merged, so partial results from separate processes can be combined.
+"""
+
+import heapq
+from hashlib import blake2b
+from math import log, sqrt
+from operator import itemgetter
+
+def stable_hash(value: str) -> int:
+    """
+    64 bit hash of a string that is the same in every process
+    (the built-in hash() is salted per process)
+
+    @value: The string to hash
+    @return: The hash as an integer
+    """
+
+    return int.from_bytes(blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+class HyperLogLog(object):
+    """
+    Estimates the number of distinct values in a stream
+
+    @precision: Number of bits used to pick a register. Memory use is
+                2^precision bytes and the standard error is about
+                1.04 / sqrt(2^precision) (0.8% for the default of 14)
+    """
+
+    def __init__(self, precision: int=14) -> None:
+        self.precision = precision
+        self.num_registers = 1 << precision
+        self.registers = bytearray(self.num_registers)
+        return
+
+    def add(self, value: str) -> None:
+        """
+        @value: The value to add to the estimate
+        """
+
+        hashed = stable_hash(value)
+        index = hashed >> (64 - self.precision)
+        remainder = hashed & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - remainder.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+        return
+
+    def update(self, values) -> None:
+        """
+        @values: Iterable of values to add to the estimate
+        """
+
+        for value in values:
+            self.add(value)
+        return
+
+    def merge(self, other: "HyperLogLog") -> None:
+        """
+        @other: Estimate with the same precision to combine with this one
+        """
+
+        if other.precision != self.precision:
+            raise ValueError("Can only merge HyperLogLog estimates with the same precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return
+
+    @property
+    def relative_error(self) -> float:
+        """Standard error of the estimate as a fraction of the count"""
+        return 1.04 / sqrt(self.num_registers)
+
+    def count(self) -> int:
+        """
+        @return: Estimated number of distinct values added
+        """
+
+        m = self.num_registers
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+
+        # Linear counting is more accurate while most registers are still empty
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * log(m / zeros)
+
+        return int(round(estimate))
+
+class SpaceSaving(object):
+    """
+    Tracks the most frequent values in a stream using a fixed number of
+    counters. Each tracked value has an estimated count and an error, and the
+    true count is always between (count - error) and count.
+
+    @capacity: Maximum number of values tracked
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = max(int(capacity), 1)
+        self.counts = {}
+        self.errors = {}
+        return
+
+    def min_count(self) -> int:
+        """
+        @return: Highest count an untracked value could have
+        """
+
+        if len(self.counts) < self.capacity:
+            return 0
+        return min(self.counts.values())
+
+    def update(self, counts: dict) -> None:
+        """
+        Add a batch of already counted values.
+
+        @counts: Dictionary of counts (In the format {<value>: <count>})
+        """
+
+        floor = self.min_count()
+        for value, count in counts.items():
+            if value in self.counts:
+                self.counts[value] += count
+            else:
+                self.counts[value] = count + floor
+                self.errors[value] = floor
+
+        self._prune()
+        return
+
+    def merge(self, other: "SpaceSaving") -> None:
+        """
+        @other: Summary to combine with this one
+        """
+
+        floor, other_floor = self.min_count(), other.min_count()
+        counts, errors = {}, {}
+        for value in self.counts.keys() | other.counts.keys():
+            counts[value] = self.counts.get(value, floor) + other.counts.get(value, other_floor)
+            errors[value] = self.errors.get(value, floor) + other.errors.get(value, other_floor)
+        self.counts, self.errors = counts, errors
+
+        self._prune()
+        return
+
+    def _prune(self) -> None:
+        """Drop the least frequent values until the summary is at capacity"""
+
+        if len(self.counts) > self.capacity:
+            self.counts = dict(heapq.nlargest(self.capacity, self.counts.items(), key=itemgetter(1)))
+            self.errors = {value: self.errors[value] for value in self.counts}
+        return
+
+    def top(self, num_values: int) -> list[tuple]:
+        """
+        @num_values: Number of values to return
+        @return: The most frequent values, largest first
+                 (In the format [(<value>, <count>, <error>), ...])
+        """
+
+        top_values = heapq.nlargest(num_values, self.counts.items(), key=itemgetter(1))
+        return [(value, count, self.errors[value]) for value, count in top_values]
@@ -1,6 +1,10 @@
 import arcpy
 import os
+import sqlite3
 import utils.arcpy_tools as archelp
+from utils.constants.ftconstants import CATALOG_NAME
+from utils.profiler import profiled
+from utils.schema_index import SchemaIndex, get_schema
 
 class Tool(object):
     """
@@ -10,6 +14,27 @@ class Tool(object):
     any parameters that you think will be useful in multiple tools should be
     defined here so they're available to all tools that inherit this class
     """
+
+    # Project variables shared by every tool in the session. ArcGIS Pro creates
+    # tool objects constantly, so the "CURRENT" project is only opened the first
+    # time a tool uses it. The toolbox calls Tool.resetProject() when it is
+    # loaded, so opening another project opens "CURRENT" again. The home folder
+    # and default gdb are read from the open project every time, they can change
+    # while it is open.
+    _shared_project = {}
+
+    # Methods timed when profiling is on (see utils.profiler)
+    _profiled_methods = ["execute", "updateParameters", "updateMessages"]
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        """Wrap the profiled methods a tool defines with timers"""
+        super().__init_subclass__(**kwargs)
+        for name in cls._profiled_methods:
+            method = cls.__dict__.get(name)
+            if method is not None and not getattr(method, "_profiled", False):
+                setattr(cls, name, profiled(method))
+        return
+
     def __init__(self) -> None:
         """
         Tool Description
@@ -27,19 +52,88 @@ class Tool(object):
         self.canRunInBackground = False
         self.category = "Unassigned"
         
-        # Project variables
-        self.project = arcpy.mp.ArcGISProject("CURRENT")
-        self.project_location = self.project.homeFolder
-        self.project_name = os.path.basename(self.project_location)
-        
-        # Database variables
-        self.default_gdb = self.project.defaultGeodatabase
+        # Project variables (looked up lazily, see the properties below)
+        self._project = None
+        self._project_details = {}
         
         # Parameters
         self.params = {}
         
         return
 
+    @classmethod
+    def resetProject(cls) -> None:
+        """Forget the shared "CURRENT" project so it is opened again on next use"""
+        cls._shared_project.clear()
+        return
+
+    def _getProjectDetail(self, name: str, getter) -> object:
+        """
+        Get a project variable, looking it up the first time it is used.
+
+        @name: Name of the variable
+        @getter: Function that gets the variable from the project
+        @return: The project variable
+        """
+
+        details = self._project_details if self._project is not None else Tool._shared_project
+        if name not in details:
+            details[name] = getter(self.project)
+        return details[name]
+
+    @property
+    def project(self) -> arcpy.mp.ArcGISProject:
+        """arcpy project object ("CURRENT" unless another project has been set)"""
+        if self._project is not None:
+            return self._project
+        if "project" not in Tool._shared_project:
+            Tool._shared_project["project"] = arcpy.mp.ArcGISProject("CURRENT")
+        return Tool._shared_project["project"]
+
+    @project.setter
+    def project(self, project: arcpy.mp.ArcGISProject) -> None:
+        self._project = project
+        self._project_details = {}
+        return
+
+    @property
+    def project_location(self) -> str:
+        """path to the project"""
+        return self.project.homeFolder
+
+    @property
+    def project_name(self) -> str:
+        """name of the project"""
+        return os.path.basename(self.project_location)
+
+    @property
+    def default_gdb(self) -> str:
+        """path to the default gdb"""
+        return self.project.defaultGeodatabase
+
+    @property
+    def schema_index(self) -> SchemaIndex:
+        """index of dataset schemas in the project folder"""
+        location = self.project_location
+        return self._getProjectDetail(f"schema_index:{location}", lambda project: SchemaIndex(os.path.join(location, CATALOG_NAME)))
+
+    def getSchema(self, features: object, fields: list[str]=None) -> dict:
+        """
+        Get the schema of a dataset from the project's schema index, or by
+        describing it when not running in a project or the index can't be used.
+
+        @features: Path of a dataset, a layer name or an arcpy.mp Layer
+        @fields: Fields the tool expects, the dataset is described again if the
+                 indexed schema is missing any of them (optional)
+        @return: Schema snapshot (see archelp.describe_dataset())
+        """
+
+        try:
+            return get_schema(features, self.schema_index, fields)
+        except (OSError, sqlite3.Error):
+            # Not in a project, or the index database is locked or corrupt
+            return get_schema(features, None, fields)
+
     def getParameterInfo(self) -> list:
         """Define parameter definitions"""
         return []